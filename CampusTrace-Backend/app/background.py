@@ -0,0 +1,185 @@
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional
+
+# Registry of every job queue created in this process, used for stats reporting
+_queues: Dict[str, "JobQueue"] = {}
+
+# Strong references to fire-and-forget tasks; the event loop only keeps weak ones
+_detached_tasks: set = set()
+
+
+def spawn(coro: Coroutine) -> asyncio.Task:
+    """Run a coroutine in the background without awaiting it, keeping it alive until it finishes."""
+    task = asyncio.create_task(coro)
+    _detached_tasks.add(task)
+    task.add_done_callback(_detached_tasks.discard)
+    return task
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent first attempts (plus a small floor per second),
+    so a failing provider sees at most `1 + ratio` times the normal load instead of
+    every job retrying at once.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 0.5, window_seconds: float = 60.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window_seconds = window_seconds
+        self._attempts: deque = deque()
+        self._retries: deque = deque()
+        self.denied = 0
+
+    def _prune(self, now: float):
+        cutoff = now - self.window_seconds
+        for events in (self._attempts, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_attempt(self):
+        self._attempts.append(time.monotonic())
+
+    def try_retry(self) -> bool:
+        """Spend one retry if the budget allows it."""
+        now = time.monotonic()
+        self._prune(now)
+        allowed = self.ratio * len(self._attempts) + self.min_per_second * self.window_seconds
+        if len(self._retries) >= allowed:
+            self.denied += 1
+            return False
+        self._retries.append(now)
+        return True
+
+    def stats(self) -> dict:
+        self._prune(time.monotonic())
+        return {"attempts": len(self._attempts), "retries": len(self._retries), "denied": self.denied}
+
+
+class JobQueue:
+    """
+    Bounded in-process work queue drained by a fixed number of worker tasks.
+    Failed jobs are retried with jittered exponential backoff while the retry budget
+    allows it; after that `on_failure` is called. Jobs are plain dicts and are lost
+    on restart, so handlers should keep durable state (e.g. a status column) in the database.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[dict], Awaitable[Any]],
+        workers: int = 2,
+        max_attempts: int = 4,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        max_size: int = 10000,
+        retry_budget: Optional[RetryBudget] = None,
+        on_failure: Optional[Callable[[dict, Exception], Awaitable[Any]]] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget or RetryBudget()
+        self.on_failure = on_failure
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._tasks: List[asyncio.Task] = []
+        self._retry_handles: set = set()
+        self.in_progress = 0
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        _queues[name] = self
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting, running or scheduled for a retry."""
+        return self._queue.qsize() + self.in_progress + len(self._retry_handles)
+
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job: dict) -> bool:
+        """Queue a job. Returns False (and drops it) when the queue is full."""
+        job.setdefault("attempt", 0)
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            print(f"⚠️ {self.name} queue is full; dropping job {job.get('id', '')}")
+            return False
+
+    def _schedule_retry(self, job: dict):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (job["attempt"] - 1)))
+        loop = asyncio.get_running_loop()
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            self.submit(job)
+
+        handle = loop.call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job["attempt"] += 1
+            if job["attempt"] == 1:
+                self.retry_budget.record_attempt()
+            self.in_progress += 1
+            try:
+                await self.handler(job)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if job["attempt"] < self.max_attempts and self.retry_budget.try_retry():
+                    self.retried += 1
+                    print(f"🔁 {self.name} job failed (attempt {job['attempt']}), retrying: {e}")
+                    self._schedule_retry(job)
+                else:
+                    self.failed += 1
+                    print(f"❌ {self.name} job failed after {job['attempt']} attempt(s): {e}")
+                    if self.on_failure:
+                        try:
+                            await self.on_failure(job, e)
+                        except Exception as failure_error:
+                            print(f"Error in {self.name} failure handler: {failure_error}")
+            finally:
+                self.in_progress -= 1
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "queued": self._queue.qsize(),
+            "in_progress": self.in_progress,
+            "scheduled_retries": len(self._retry_handles),
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "retry_budget": self.retry_budget.stats(),
+        }
+
+
+def all_queue_stats() -> dict:
+    """Stats for every registered job queue, keyed by queue name."""
+    return {name: queue.stats() for name, queue in list(_queues.items())}
@@ -0,0 +1,131 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+# Registry of every cache created in this process, used for stats reporting
+_caches: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    In-process LRU cache with per-entry TTLs, an optional memory budget and tag-based invalidation.
+    Thread-safe so it can be shared between the event loop and threadpool workers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        default_ttl: float = 60.0,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._sizeof = sizeof or sys.getsizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value, size, tags)
+        self._tags: Dict[str, set] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (refreshing its LRU position) or `default` if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        """Store a value, evicting least-recently-used entries until the cache fits its budget."""
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Never let a single oversized value flush the whole cache
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, value, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a single key. Returns True if it was present."""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+                return True
+            return False
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Drop every entry carrying any of the given tags. Returns the number of entries removed."""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    if key in self._data:
+                        self._remove(key)
+                        removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        # Caller must hold the lock
+        _, _, size, tags = self._data.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def invalidate_tags(*tags: str) -> int:
+    """Invalidate the given tags across every registered cache."""
+    return sum(cache.invalidate_tags(*tags) for cache in list(_caches.values()))
+
+
+def all_cache_stats() -> dict:
+    """Stats for every registered cache, keyed by cache name."""
+    return {name: cache.stats() for name, cache in list(_caches.items())}
@@ -0,0 +1,207 @@
+import re
+import json
+import time
+import asyncio
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app.repositories import repos
+
+# Common categories: Electronics, Accessories, Documents, Clothing, Bags, Books, Keys, Others
+# Order matters: when several keywords match, the one listed first wins.
+CATEGORY_KEYWORDS = {
+    "phone": "Electronics",
+    "cellphone": "Electronics",
+    "smartphone": "Electronics",
+    "laptop": "Electronics",
+    "tablet": "Electronics",
+    "earphone": "Electronics",
+    "headphone": "Electronics",
+    "charger": "Electronics",
+    "powerbank": "Electronics",
+    "wallet": "Accessories",
+    "watch": "Accessories",
+    "bracelet": "Accessories",
+    "necklace": "Accessories",
+    "ring": "Accessories",
+    "glasses": "Accessories",
+    "sunglasses": "Accessories",
+    "umbrella": "Accessories",
+    "id": "Documents",
+    "card": "Documents",
+    "license": "Documents",
+    "certificate": "Documents",
+    "notebook": "Books",
+    "book": "Books",
+    "textbook": "Books",
+    "jacket": "Clothing",
+    "shirt": "Clothing",
+    "pants": "Clothing",
+    "shoes": "Clothing",
+    "bag": "Bags",
+    "backpack": "Bags",
+    "purse": "Bags",
+    "pouch": "Bags",
+    "key": "Keys",
+    "keychain": "Keys",
+    "bottle": "Others",
+    "tumbler": "Others",
+    "lunchbox": "Others",
+}
+
+_KEYWORD_PRIORITY = {keyword: index for index, keyword in enumerate(CATEGORY_KEYWORDS)}
+# One pass over the text finds every (possibly overlapping) keyword occurrence
+_KEYWORD_PATTERN = re.compile("(?=(" + "|".join(re.escape(k) for k in CATEGORY_KEYWORDS) + "))")
+
+
+def category_from_text(text: str) -> Optional[str]:
+    """Category of the highest-priority keyword found anywhere in `text` (substring match)."""
+    matches = [match.group(1) for match in _KEYWORD_PATTERN.finditer(text.lower())]
+    if not matches:
+        return None
+    return CATEGORY_KEYWORDS[min(matches, key=_KEYWORD_PRIORITY.__getitem__)]
+
+
+def map_category(object_type: str, keywords: Sequence[str]) -> str:
+    """Map a vision answer to a category: the object type first, then the first keyword that is not 'Others'."""
+    category = category_from_text(object_type)
+    if category and category != "Others":
+        return category
+    for keyword in keywords:
+        category = category_from_text(keyword)
+        if category and category != "Others":
+            return category
+    return "Others"
+
+
+def _parse_embedding(value) -> Optional[List[float]]:
+    # pgvector columns come back from PostgREST as "[0.1,0.2,...]" strings
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value or None
+
+
+class CategoryCentroids:
+    """
+    Nearest-centroid category classifier over a university's approved items with
+    image embeddings. Each university's model is built lazily and rebuilt after
+    `refresh_seconds`. A prediction is confident when the best centroid is similar
+    enough and clearly ahead of the runner-up; otherwise callers should fall back.
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = 0.75,
+        min_margin: float = 0.05,
+        refresh_seconds: float = 3600,
+        min_items_per_category: int = 3,
+        max_items: int = 5000,
+        page_size: int = 1000,
+    ):
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.refresh_seconds = refresh_seconds
+        self.min_items_per_category = min_items_per_category
+        self.max_items = max_items
+        self.page_size = page_size
+        self._models: Dict[int, tuple] = {}  # university id -> (built_at, model or None)
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self.predictions = 0
+        self.confident = 0
+
+    async def _build(self, university_id: int) -> Optional[dict]:
+        rows = []
+        while len(rows) < self.max_items:
+            page = await repos.items.page_image_embeddings(university_id, len(rows), self.page_size)
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+        # Parsing and averaging thousands of embeddings stays off the event loop
+        return await run_in_threadpool(self._fit, university_id, rows)
+
+    def _fit(self, university_id: int, rows: List[dict]) -> Optional[dict]:
+        titles, labels, vectors = [], [], []
+        for row in rows:
+            embedding = _parse_embedding(row.get("image_embedding"))
+            if embedding and row.get("category"):
+                titles.append(row.get("title") or "")
+                labels.append(row["category"])
+                vectors.append(embedding)
+        if not vectors:
+            return None
+
+        embeddings = np.asarray(vectors, dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        labels = np.asarray(labels)
+
+        categories = [c for c in np.unique(labels) if (labels == c).sum() >= self.min_items_per_category]
+        if len(categories) < 2:
+            return None  # Nothing to tell apart yet
+        centroids = np.stack([embeddings[labels == c].mean(axis=0) for c in categories])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+
+        print(f"🧭 Category classifier for university {university_id}: {len(vectors)} items, {len(categories)} categories")
+        return {
+            "categories": [str(c) for c in categories],
+            "centroids": centroids,
+            "embeddings": embeddings,
+            "labels": labels,
+            "titles": titles,
+        }
+
+    async def _model(self, university_id: int) -> Optional[dict]:
+        entry = self._models.get(university_id)
+        if entry and time.monotonic() - entry[0] < self.refresh_seconds:
+            return entry[1]
+        lock = self._locks.setdefault(university_id, asyncio.Lock())
+        async with lock:
+            entry = self._models.get(university_id)
+            if entry and time.monotonic() - entry[0] < self.refresh_seconds:
+                return entry[1]
+            model = await self._build(university_id)
+            self._models[university_id] = (time.monotonic(), model)
+            return model
+
+    async def is_ready(self, university_id: int) -> bool:
+        """Whether the university has enough labelled photos for a local prediction."""
+        return await self._model(university_id) is not None
+
+    async def classify(self, university_id: int, embedding: Sequence[float]) -> Optional[dict]:
+        """
+        Predict a category for an image embedding. Returns the category, its similarity
+        and the title of the closest labelled item in it, or None when not confident.
+        """
+        model = await self._model(university_id)
+        if model is None or not embedding:
+            return None
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-12
+
+        similarities = model["centroids"] @ query
+        order = np.argsort(similarities)[::-1]
+        best, runner_up = float(similarities[order[0]]), float(similarities[order[1]])
+        self.predictions += 1
+        if best < self.min_similarity or best - runner_up < self.min_margin:
+            return None
+        self.confident += 1
+
+        category = model["categories"][order[0]]
+        in_category = np.flatnonzero(model["labels"] == category)
+        item_similarities = model["embeddings"][in_category] @ query
+        nearest = int(in_category[int(np.argmax(item_similarities))])
+        return {
+            "category": category,
+            "similarity": round(best, 4),
+            "margin": round(best - runner_up, 4),
+            "nearest_title": model["titles"][nearest],
+            "nearest_similarity": round(float(item_similarities.max()), 4),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "universities": sum(1 for _, model in self._models.values() if model is not None),
+            "predictions": self.predictions,
+            "confident": self.confident,
+        }
@@ -7,14 +7,22 @@ from typing import List, Optional, Union
 class Settings(BaseSettings):
     PYTHON_SUPABASE_URL: str
     PYTHON_SUPABASE_KEY: str
+    DB_EXECUTOR_WORKERS: int = 32  # Threads running Supabase calls off the event loop, per worker process
+    DB_POOL_SIZE: int = 32  # Keep-alive HTTP connections to Supabase shared by those threads
+    DB_TIMEOUT_SECONDS: float = 30.0
+    DATA_BACKEND: str = "supabase"  # "memory" runs on in-process tables instead (tests, benchmarks, offline load tests)
+    DATA_SEED_FILE: Optional[str] = None  # JSON {table: [rows]} loaded into the memory backend on start
 
     GEMINI_API_KEY: Optional[str] = None 
+    GEMINI_API_ENDPOINT: Optional[str] = None  # host:port override, e.g. the fakes.gemini stand-in for load tests
 
     JINA_API_KEY: Optional[str] = None
+    JINA_EMBEDDING_URL: str = "https://api.jina.ai/v1/embeddings"
 
     RESEND_API_KEY: Optional[str] = None
     RESEND_SENDER_EMAIL: str = "CampusTrace <noreply@campustrace.site>"
     RECAPTCHA_SECRET_KEY: Optional[str] = None
+    RECAPTCHA_VERIFY_URL: str = "https://www.google.com/recaptcha/api/siteverify"
     CORS_ORIGINS: Union[str, List[str]] = ["http://localhost:5173", "http://127.0.0.1:5173", "https://campustrace.site"]
     DEBUG: bool = False
     EMAIL_CONFIRM_REDIRECT: Union[str, List[str]] = ["http://localhost:5173/confirm-email", "https://campustrace.site/confirm-email"]
@@ -22,6 +30,67 @@ class Settings(BaseSettings):
     
     MAX_ID_IMAGE_SIZE: int = 10485760  # 10MB in bytes
     MAX_IMAGE_SIZE: int = Field(5242880, env="MAX_IMAGE_SIZE")
+    MAX_UPLOAD_SIZE: int = 20971520  # 20MB hard cap per uploaded file, enforced while streaming
+    MAX_IMAGE_PIXELS: int = 40000000  # Decoded pixel cap (decompression-bomb guard)
+
+    STORAGE_MAX_CONNECTIONS: int = 20
+    STORAGE_UPLOAD_MAX_TRIES: int = 3
+
+    IMAGE_POOL_MODE: str = "process"  # "process" for CPU isolation, "thread" for constrained hosts
+    IMAGE_POOL_WORKERS: int = 2
+    IMAGE_POOL_MAX_PENDING: int = 16  # Queued + running image operations before returning 503
+    IMAGE_DUPLICATE_MAX_DISTANCE: int = 6  # dHash bits that may differ for a photo to count as a near-duplicate
+    IMAGE_SEARCH_HASH_MAX_DISTANCE: int = 4  # Near-exact photos answered from the hash index without Jina
+    CATEGORY_CLASSIFIER_MIN_SIMILARITY: float = 0.75  # Below this the suggestion falls back to Gemini Vision
+    CATEGORY_CLASSIFIER_MIN_MARGIN: float = 0.05  # Required lead of the best category over the runner-up
+    CATEGORY_CLASSIFIER_REFRESH_SECONDS: int = 3600
+    IMAGE_VARIANT_CACHE_DIR: str = "/tmp/campustrace/image_variants"
+    IMAGE_VARIANT_CACHE_MAX_BYTES: int = 536870912  # 512MB in bytes
+
+    GEMINI_MAX_CONCURRENCY: int = 4  # Concurrent Gemini requests per worker
+    GEMINI_RATE_PER_SECOND: float = 5.0
+    GEMINI_BURST: int = 10
+    GEMINI_MAX_WAIT_SECONDS: float = 10.0  # Interactive calls queued longer than this get a 503
+    JINA_MAX_CONCURRENCY: int = 8
+    JINA_RATE_PER_SECOND: float = 10.0
+    JINA_BURST: int = 20
+    JINA_MAX_WAIT_SECONDS: float = 10.0
+
+    GEMINI_TIMEOUT_SECONDS: float = 60.0
+    GEMINI_MAX_TRIES: int = 2
+    JINA_TIMEOUT_SECONDS: float = 20.0  # Per attempt
+    JINA_MAX_TRIES: int = 3
+    JINA_HEDGE: bool = True  # Send a second embedding request when the first is slower than the recent p95
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures before a provider is short-circuited
+    CIRCUIT_BREAKER_RECOVERY_SECONDS: float = 30.0
+    AI_TAG_CACHE_TTL_SECONDS: int = 86400
+    AI_TAG_CACHE_MAX_ENTRIES: int = 10000
+    AI_TAG_BATCH_SIZE: int = 20  # Items per prompt in batch tagging
+
+    ENRICHMENT_WORKERS: int = 2
+    ENRICHMENT_MAX_ATTEMPTS: int = 4
+    ENRICHMENT_RETRY_BUDGET_RATIO: float = 0.2  # Retries allowed per first attempt over the last minute
+    ENRICHMENT_RECOVER_ON_STARTUP: bool = True  # Disable on all but one worker when running several
+
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    RESPONSE_CACHE_MAX_BYTES: int = 33554432  # 32MB in bytes
+
+    EXPO_PUSH_URL: str = "https://api.expo.dev/v2/push/send"
+    EXPO_RECEIPTS_URL: str = "https://api.expo.dev/v2/push/getReceipts"
+    EXPO_ACCESS_TOKEN: Optional[str] = None
+    PUSH_BATCH_LINGER_MS: int = 250
+    PUSH_RECEIPT_DELAY_SECONDS: int = 900  # Expo recommends waiting ~15 minutes for receipts
+    PUSH_MAX_PENDING_RECEIPTS: int = 50000  # Oldest tickets are dropped unchecked beyond this
+    UNREAD_COUNT_RESYNC_SECONDS: int = 300
+    NOTIFICATION_STREAM_MAX_CONNECTIONS: int = 1000
+    NOTIFICATION_STREAM_MAX_PER_USER: int = 5
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: int = 15
+    DESCRIPTION_STREAM_DISCONNECT_POLL_SECONDS: float = 1.0  # How often a streamed description checks for a gone client
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = 0.1  # Event-loop lag sampling period; 0 disables the monitor
+    SERVER_TIMING_ENABLED: bool = False  # Return per-request span timings (db, jina, gemini, image...) in a Server-Timing header
+    SLOW_REQUEST_MS: int = 2000  # Log the span breakdown of requests slower than this; 0 disables
+    PROMETHEUS_MULTIPROC_DIR: Optional[str] = None  # Directory shared by all workers for /metrics; empty it before starting the server
+    METRICS_SAMPLE_SECONDS: float = 5.0  # How often queue depths and cache counters are copied into /metrics
 
     class Config:   
         env_file = ".env"
@@ -0,0 +1,116 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+import httpx
+from supabase import Client, create_client
+from supabase.lib.client_options import SyncClientOptions
+
+from app.config import get_settings
+from app.metrics import external_call, supabase_operation
+from app.timing import span
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class Database:
+    """
+    Async access to Supabase for the API's event loop.
+
+    supabase-py's client is synchronous, so every round trip runs on a dedicated
+    thread pool of `workers` threads instead of the event loop (or the default
+    threadpool shared with file and image work). All threads share one HTTP
+    connection pool of `pool_size` keep-alive connections.
+
+        res = await db.execute(supabase.table("items").select("*").eq("id", item_id))
+        user = await db.run(supabase.auth.get_user, token)
+    """
+
+    def __init__(self, client: Client, workers: int):
+        self.client = client
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.calls = 0
+        self.errors = 0
+        self._total_ms = 0.0
+        self._total_wait_ms = 0.0
+        self._max_ms = 0.0
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking Supabase call (auth, storage, or a helper doing several queries) off the loop."""
+        return await self._run(getattr(fn, "__name__", "call"), fn, args, kwargs)
+
+    async def _run(self, operation: str, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        submitted = time.monotonic()
+        with self._lock:
+            self._queued += 1
+
+        def call():
+            started = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait_ms += (started - submitted) * 1000
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                elapsed_ms = (time.monotonic() - started) * 1000
+                with self._lock:
+                    self._running -= 1
+                    self.calls += 1
+                    self._total_ms += elapsed_ms
+                    self._max_ms = max(self._max_ms, elapsed_ms)
+
+        with span("db"), external_call("supabase", operation):
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def execute(self, query) -> Any:
+        """Execute a PostgREST query or RPC builder, e.g. `supabase.table(...).select(...)`."""
+        return await self._run(supabase_operation(query), query.execute, (), {})
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": self._queued,
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_ms": round(self._total_ms / self.calls, 1) if self.calls else 0.0,
+                "avg_wait_ms": round(self._total_wait_ms / self.calls, 1) if self.calls else 0.0,
+                "max_ms": round(self._max_ms, 1),
+            }
+
+
+def _create_client() -> Client:
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.DB_POOL_SIZE,
+            max_keepalive_connections=settings.DB_POOL_SIZE,
+        ),
+        timeout=settings.DB_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    )
+    return create_client(
+        settings.PYTHON_SUPABASE_URL,
+        settings.PYTHON_SUPABASE_KEY,
+        options=SyncClientOptions(httpx_client=http_client),
+    )
+
+
+supabase: Client = _create_client()
+db = Database(supabase, workers=settings.DB_EXECUTOR_WORKERS)
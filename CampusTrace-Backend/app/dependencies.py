@@ -1,13 +1,10 @@
 from fastapi import Request, HTTPException, Depends
-from supabase import create_client, Client
 from app.config import get_settings
+from app.repositories import repos
 
 # Get application settings
 settings = get_settings()
 
-# Initialize the Supabase client here
-supabase: Client = create_client(settings.PYTHON_SUPABASE_URL, settings.PYTHON_SUPABASE_KEY)
-
 async def get_current_user_id(request: Request):
     """
     Dependency function to get the current user's ID from the JWT in the Authorization header.
@@ -16,13 +13,28 @@ async def get_current_user_id(request: Request):
     if not token or not token.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    token = token.split("Bearer ")[1]
-    
+    return await _get_user_id_from_token(token.split("Bearer ")[1])
+
+async def get_stream_user_id(request: Request):
+    """
+    Like get_current_user_id, but also accepts the JWT as an `access_token` query parameter,
+    since browser EventSource connections cannot set an Authorization header.
+    """
+    token = request.headers.get("Authorization")
+    if token and token.startswith("Bearer "):
+        return await _get_user_id_from_token(token.split("Bearer ")[1])
+    query_token = request.query_params.get("access_token")
+    if not query_token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return await _get_user_id_from_token(query_token)
+
+async def _get_user_id_from_token(token: str):
+    """Resolve a Supabase JWT to the user's ID."""
     try:
-        user_response = supabase.auth.get_user(token)
-        if not user_response.user:
+        user_id = await repos.auth.get_user_id(token)
+        if not user_id:
             raise HTTPException(status_code=401, detail="Invalid or expired token")
-        return user_response.user.id
+        return user_id
     except Exception as e:
         print(f"Authentication Error: {e}")
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -34,13 +46,11 @@ async def get_admin_university_id(current_user_id: str = Depends(get_current_use
     """
     try:
         # Query the profiles table to get the user's role and university_id
-        profile_response = supabase.table("profiles").select("role, university_id").eq("id", current_user_id).single().execute()
+        profile = await repos.profiles.get(current_user_id, "role, university_id")
         
-        if not profile_response.data:
+        if not profile:
             raise HTTPException(status_code=404, detail="User profile not found")
         
-        profile = profile_response.data
-        
         # Check if user is an admin
         if profile.get("role", "").lower() != "admin":
             raise HTTPException(status_code=403, detail="Admin access required")
@@ -55,4 +65,18 @@ async def get_admin_university_id(current_user_id: str = Depends(get_current_use
         raise
     except Exception as e:
         print(f"Error in get_admin_university_id: {e}")
-        raise HTTPException(status_code=500, detail="Failed to verify admin status")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to verify admin status")
+
+async def get_current_university_id(current_user_id: str = Depends(get_current_user_id)):
+    """
+    Dependency function to return the current user's university_id (None if not set yet).
+    Lets university-wide data be cached per tenant instead of per user.
+    """
+    try:
+        profile = await repos.profiles.get(current_user_id, "university_id")
+    except Exception as e:
+        print(f"Error in get_current_university_id: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load user profile")
+    if not profile:
+        raise HTTPException(status_code=404, detail="User profile not found.")
+    return profile.get("university_id")
@@ -0,0 +1,75 @@
+import time
+import asyncio
+from typing import List, Optional, Sequence
+
+from app.config import get_settings
+from app.metrics import EVENT_LOOP_LAG
+
+settings = get_settings()
+
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is unbounded
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class EventLoopMonitor:
+    """
+    Measures event-loop lag: a background task sleeps `interval` seconds and records how
+    much later than requested it woke up. Blocking calls on the loop show up directly as
+    lag. Samples are kept as a cumulative histogram so readers can diff two snapshots.
+    """
+
+    def __init__(self, interval: float = 0.1, buckets_ms: Sequence[float] = LAG_BUCKETS_MS):
+        self.interval = interval
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts: List[int] = [0] * (len(self.buckets_ms) + 1)
+        self._task: Optional[asyncio.Task] = None
+        self.samples = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, lag_ms: float):
+        index = next((i for i, bound in enumerate(self.buckets_ms) if lag_ms <= bound), len(self.buckets_ms))
+        self._counts[index] += 1
+        self.samples += 1
+        self.total_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+        self.last_ms = lag_ms
+        EVENT_LOOP_LAG.observe(lag_ms / 1000)
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (time.perf_counter() - started - self.interval) * 1000))
+
+    async def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def histogram(self) -> List[list]:
+        """Cumulative [upper bound ms, samples at or below it] pairs; the last bound is "+Inf"."""
+        pairs, running = [], 0
+        for bound, count in zip(list(self.buckets_ms) + ["+Inf"], self._counts):
+            running += count
+            pairs.append([bound, running])
+        return pairs
+
+    def stats(self) -> dict:
+        return {
+            "interval_ms": round(self.interval * 1000, 1),
+            "samples": self.samples,
+            "last_ms": round(self.last_ms, 2),
+            "mean_ms": round(self.total_ms / self.samples, 2) if self.samples else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "histogram": self.histogram(),
+        }
+
+
+event_loop_monitor = EventLoopMonitor(interval=settings.EVENT_LOOP_LAG_INTERVAL_SECONDS)
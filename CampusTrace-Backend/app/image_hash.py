@@ -0,0 +1,134 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.repositories import repos
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def hash_to_hex(value: int) -> str:
+    """Storage format of the items.image_hash column (16 hex chars)."""
+    return f"{value:016x}"
+
+
+def hash_from_hex(value: str) -> int:
+    return int(value, 16)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes with Hamming distance. A radius query
+    only descends into children whose edge distance is within the radius of the
+    query's distance to the node, so lookups touch a small part of the tree.
+    """
+
+    def __init__(self):
+        # Node: [hash, item ids, {edge distance: child node}]
+        self._root: Optional[list] = None
+        self.size = 0
+
+    def add(self, value: int, item_id: Any):
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item_id], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                if item_id not in node[1]:
+                    node[1].append(item_id)
+                else:
+                    self.size -= 1
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item_id], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """All (distance, item id) pairs within `max_distance`, closest first."""
+        if self._root is None:
+            return []
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, item_id) for item_id in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for edge, child in node[2].items() if low <= edge <= high)
+        results.sort(key=lambda r: r[0])
+        return results
+
+
+class ImageHashIndex:
+    """
+    Per-university BK-trees of item photo hashes (items.image_hash). A university's
+    tree is loaded from the database on first use and then kept current by `add`.
+    """
+
+    def __init__(self, max_distance: int = 6, page_size: int = 1000):
+        self.max_distance = max_distance
+        self.page_size = page_size
+        self._trees: Dict[int, BKTree] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self.lookups = 0
+        self.exact_hits = 0
+        self.near_hits = 0
+
+    async def _load(self, university_id: int) -> BKTree:
+        tree = BKTree()
+        offset = 0
+        while True:
+            rows = await repos.items.page_image_hashes(university_id, offset, self.page_size)
+            for row in rows:
+                tree.add(hash_from_hex(row["image_hash"]), row["id"])
+            if len(rows) < self.page_size:
+                break
+            offset += self.page_size
+        print(f"🧬 Loaded {tree.size} image hashes for university {university_id}")
+        return tree
+
+    async def _tree(self, university_id: int) -> BKTree:
+        tree = self._trees.get(university_id)
+        if tree is not None:
+            return tree
+        lock = self._locks.setdefault(university_id, asyncio.Lock())
+        async with lock:
+            tree = self._trees.get(university_id)
+            if tree is None:
+                tree = await self._load(university_id)
+                self._trees[university_id] = tree
+        return tree
+
+    async def find(self, university_id: int, image_hash: int, max_distance: Optional[int] = None) -> List[Tuple[int, Any]]:
+        """Items of the university whose photo is within `max_distance` bits, closest first."""
+        tree = await self._tree(university_id)
+        matches = tree.search(image_hash, self.max_distance if max_distance is None else max_distance)
+        self.lookups += 1
+        if matches:
+            if matches[0][0] == 0:
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+        return matches
+
+    def add(self, university_id: int, image_hash: int, item_id: Any):
+        # Unloaded universities pick the new row up from the database when first used
+        tree = self._trees.get(university_id)
+        if tree is not None:
+            tree.add(image_hash, item_id)
+
+    def stats(self) -> dict:
+        return {
+            "universities": len(self._trees),
+            "hashes": sum(tree.size for tree in self._trees.values()),
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+        }
@@ -0,0 +1,319 @@
+import io
+import time
+import base64
+import asyncio
+import importlib
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.timing import record_span
+
+try:
+    # Optional AVIF encoder for Pillow < 11.3; importing it registers the plugin with Pillow
+    importlib.import_module("pillow_avif")
+except ImportError:
+    pass
+
+# ============= Image Operations =============
+# These run inside the image pool workers, so they must stay module-level (picklable)
+# and take/return plain bytes or strings; encoding happens here rather than on the event loop.
+
+ITEM_IMAGE_SIZE = 800  # Storage + embedding variant (Jina works best at <= 800px)
+THUMBNAIL_SIZE = 200   # List view thumbnail
+
+# Decoded pixel budget per image (decompression-bomb guard); set per worker by the pool
+MAX_IMAGE_PIXELS = 40_000_000
+
+ImageSource = Union[bytes, str]  # Raw image bytes, or a file path
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image's declared dimensions exceed the decoded pixel budget."""
+
+
+def _set_max_image_pixels(max_pixels: int):
+    global MAX_IMAGE_PIXELS
+    MAX_IMAGE_PIXELS = max_pixels
+    # PIL's own bomb check errors at 2x this value, as a backstop for formats we don't inspect
+    Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+def open_image(source: ImageSource) -> Image.Image:
+    """Open an image lazily (header only) and refuse it before any pixels are allocated if too big."""
+    img = Image.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    width, height = img.size
+    if width * height > MAX_IMAGE_PIXELS:
+        img.close()
+        raise ImageTooLarge(f"Image is {width}x{height}; the limit is {MAX_IMAGE_PIXELS} pixels.")
+    return img
+
+
+def _to_rgb(img: Image.Image) -> Image.Image:
+    """Convert to RGB, flattening transparency onto white instead of black."""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[-1])
+        return rgb_img
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def decode_image(image_bytes: ImageSource, max_side: int) -> Image.Image:
+    """
+    Decode an upload exactly once, at the smallest resolution that still covers `max_side`.
+    JPEGs use draft mode so libjpeg scales by 1/2, 1/4 or 1/8 while decoding; a 12MP
+    photo destined for 800px never materialises at full size. EXIF orientation is applied.
+    """
+    img = open_image(image_bytes)
+    if img.format == "JPEG":
+        width, height = img.size
+        scale = max_side / max(width, height)
+        if scale < 1:
+            # Request the aspect-correct target so only the long side needs to reach max_side
+            img.draft("RGB", (max(1, int(width * scale)), max(1, int(height * scale))))
+    img = ImageOps.exif_transpose(img)
+    img = _to_rgb(img)
+    img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    return img
+
+
+def _encode_jpeg(img: Image.Image, quality: int, optimize: bool = False) -> bytes:
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=quality, optimize=optimize)
+    return output.getvalue()
+
+
+def image_data_url(img: Image.Image) -> str:
+    """JPEG data URL of an image, the form in which images are sent to Jina for embeddings."""
+    return "data:image/jpeg;base64," + base64.b64encode(_encode_jpeg(img, quality=90)).decode("ascii")
+
+
+def process_image_efficiently(image_bytes: ImageSource, max_size=(1920, 1920)):
+    """Process images efficiently."""
+    img = decode_image(image_bytes, max(max_size))
+    # Resize if larger than max_size (decode_image fits the long side to a square box)
+    img.thumbnail(max_size, Image.Resampling.LANCZOS)
+    return _encode_jpeg(img, quality=90, optimize=True)
+
+
+def prepare_item_image(image_bytes: ImageSource) -> Tuple[bytes, bytes, Image.Image]:
+    """
+    Build every variant of an item photo from a single decode: the 800px JPEG for
+    storage, the 800px RGB image for the embedding, and the 200px thumbnail, which is
+    derived from the 800px intermediate rather than the full-resolution original.
+    """
+    pil_image = decode_image(image_bytes, ITEM_IMAGE_SIZE)
+    storage_bytes = _encode_jpeg(pil_image, quality=90)
+
+    thumbnail_image = pil_image.copy()
+    thumbnail_image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+    thumbnail_bytes = _encode_jpeg(thumbnail_image, quality=85)
+
+    return storage_bytes, thumbnail_bytes, pil_image
+
+
+def dhash(img: Image.Image, hash_size: int = 8) -> int:
+    """
+    64-bit difference hash: compares neighbouring pixels of a tiny grayscale copy.
+    Robust to re-encoding and resizing, so reposted photos land within a few bits.
+    """
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def prepare_item_image_hashed(image_bytes: ImageSource) -> Tuple[bytes, bytes, int]:
+    """The storage JPEG, thumbnail and perceptual hash of an item photo, from one decode."""
+    storage_bytes, thumbnail_bytes, pil_image = prepare_item_image(image_bytes)
+    return storage_bytes, thumbnail_bytes, dhash(pil_image)
+
+
+def hash_image(image_bytes: ImageSource) -> int:
+    """Perceptual hash of a stored image, computed at the same size as on upload."""
+    return dhash(decode_image(image_bytes, ITEM_IMAGE_SIZE))
+
+
+def prepare_search_image(image_bytes: ImageSource, max_side: int = ITEM_IMAGE_SIZE) -> str:
+    """Decode an image and return it as the embedding data URL, sized so the Jina request stays small."""
+    return image_data_url(decode_image(image_bytes, max_side))
+
+
+def prepare_search_image_hashed(image_bytes: ImageSource, max_side: int = ITEM_IMAGE_SIZE) -> Tuple[str, int]:
+    """`prepare_search_image` plus the perceptual hash, comparable with stored item hashes."""
+    img = decode_image(image_bytes, max_side)
+    return image_data_url(img), dhash(img)
+
+
+def prepare_vision_image(image_bytes: ImageSource, max_side: int = 1920) -> Image.Image:
+    """Decode an upload for Gemini Vision, capped at 1920px."""
+    return decode_image(image_bytes, max_side)
+
+
+def prepare_suggest_image(image_bytes: ImageSource) -> Tuple[bytes, str, int]:
+    """
+    One decode for the suggest-details flow: the 1920px Gemini Vision JPEG, the 800px
+    embedding data URL and the perceptual hash used by the local classifier.
+    """
+    vision_image = decode_image(image_bytes, 1920)
+    vision_bytes = _encode_jpeg(vision_image, quality=90)
+    vision_image.thumbnail((ITEM_IMAGE_SIZE, ITEM_IMAGE_SIZE), Image.Resampling.LANCZOS)
+    return vision_bytes, image_data_url(vision_image), dhash(vision_image)
+
+
+VARIANT_FORMATS = {
+    # format -> (PIL format name, content type, save options)
+    "avif": ("AVIF", "image/avif", {"quality": 55}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def avif_supported() -> bool:
+    """Whether this Pillow build can encode AVIF."""
+    return ".avif" in Image.registered_extensions()
+
+
+def render_variant(image_bytes: ImageSource, width: int, fmt: str) -> bytes:
+    """Render a resized copy of a stored image (never upscaled) in the requested format."""
+    pil_format, _, options = VARIANT_FORMATS[fmt]
+    img = decode_image(image_bytes, width)
+    output = io.BytesIO()
+    img.save(output, format=pil_format, **options)
+    return output.getvalue()
+
+
+def render_variant_set(image_bytes: ImageSource, widths: Tuple[int, ...], fmt: str) -> Dict[int, bytes]:
+    """Render several widths of one image from a single decode (largest first)."""
+    pil_format, _, options = VARIANT_FORMATS[fmt]
+    img = decode_image(image_bytes, max(widths))
+    variants = {}
+    for width in sorted(widths, reverse=True):
+        img.thumbnail((width, width), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        img.save(output, format=pil_format, **options)
+        variants[width] = output.getvalue()
+    return variants
+
+
+def build_thumbnail(image_bytes: ImageSource) -> bytes:
+    """Build the standard 200px list-view thumbnail JPEG."""
+    return _encode_jpeg(decode_image(image_bytes, THUMBNAIL_SIZE), quality=85)
+
+
+# ============= Image Pool =============
+class ImageProcessingPool:
+    """
+    Bounded executor for all PIL work, keeping decode/resize/encode off the event loop.
+    Uses a process pool by default so CPU-heavy images cannot starve request handling.
+    When more than `max_pending` operations are queued or running, new work is refused with 503.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16, mode: str = "process", max_pixels: int = MAX_IMAGE_PIXELS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.mode = mode
+        self.max_pixels = max_pixels
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.rejected = 0
+        self.timings: Dict[str, dict] = {}
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "thread":
+                _set_max_image_pixels(self.max_pixels)
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image")
+            else:
+                # Spawn instead of fork: the server process has live threads and an event loop
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_set_max_image_pixels,
+                    initargs=(self.max_pixels,),
+                )
+        return self._executor
+
+    async def run(self, operation: str, fn: Callable, *args):
+        """Run an image operation in the pool and record how long it took."""
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Image processing is busy. Please try again shortly.",
+                headers={"Retry-After": "2"},
+            )
+
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except (ImageTooLarge, Image.DecompressionBombError) as e:
+            raise HTTPException(status_code=413, detail=f"Image dimensions are too large. {e}")
+        except UnidentifiedImageError:
+            raise HTTPException(status_code=400, detail="Unsupported or corrupt image file.")
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed on a huge decode); start a fresh pool for the next call
+            self._reset_executor(executor)
+            raise HTTPException(
+                status_code=503,
+                detail="Image processing was interrupted. Please try again.",
+                headers={"Retry-After": "1"},
+            )
+        finally:
+            self._pending -= 1
+            elapsed = time.perf_counter() - started
+            self._record(operation, elapsed)
+            record_span("image", elapsed)
+
+    def _record(self, operation: str, seconds: float):
+        timing = self.timings.setdefault(operation, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = seconds * 1000
+        timing["count"] += 1
+        timing["total_ms"] += ms
+        timing["max_ms"] = max(timing["max_ms"], ms)
+        print(f"🖼️ Image op '{operation}' took {ms:.1f}ms")
+
+    def _reset_executor(self, broken: Executor):
+        # Concurrent failures all see the same broken pool; only the first replaces it
+        if self._executor is broken:
+            self._executor = None
+            print("⚠️ Image pool worker died; restarting the pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "operations": {
+                name: {
+                    "count": t["count"],
+                    "avg_ms": round(t["total_ms"] / t["count"], 1) if t["count"] else 0.0,
+                    "max_ms": round(t["max_ms"], 1),
+                }
+                for name, t in self.timings.items()
+            },
+        }
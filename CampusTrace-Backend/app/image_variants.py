@@ -0,0 +1,267 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import PurePosixPath
+from typing import Optional
+from urllib.parse import unquote, urlparse
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.repositories import repos
+from app.image_processing import (
+    ITEM_IMAGE_SIZE, VARIANT_FORMATS, ImageProcessingPool,
+    avif_supported, build_thumbnail, render_variant, render_variant_set
+)
+from app.singleflight import SingleFlight
+from app.storage import AsyncStorage, StorageError, TransientStorageError
+
+# Widths the clients may request; anything else would let callers fill the caches with junk sizes
+VARIANT_WIDTHS = (160, 320, 480, 640, ITEM_IMAGE_SIZE)
+VARIANT_PREFIX = "variants"
+
+
+class DiskLRUCache:
+    """
+    Size-bounded file cache on local disk. The index lives in memory and is rebuilt
+    from file modification times on first use, so it survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # file name -> size
+        self._total = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _file_name(self, key: str) -> str:
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total += size
+        self._loaded = True
+
+    def get(self, key: str) -> Optional[bytes]:
+        name = self._file_name(key)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if name not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Keep recency across restarts
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._index.pop(name, 0)
+                self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def set(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+        # Write to a temp file and rename so readers never see a partial variant
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        evicted = []
+        with self._lock:
+            self._total -= self._index.pop(name, 0)
+            self._index[name] = len(data)
+            self._total += len(data)
+            while self._total > self.max_bytes and self._index:
+                old_name, old_size = self._index.popitem(last=False)
+                self._total -= old_size
+                self.evictions += 1
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.unlink(os.path.join(self.directory, old_name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def storage_path_from_url(public_url: str, bucket: str) -> Optional[str]:
+    """Extract the object path from a public storage URL of `bucket`."""
+    marker = f"/object/public/{bucket}/"
+    path = urlparse(public_url).path
+    if marker not in path:
+        return None
+    return unquote(path.split(marker, 1)[1])
+
+
+def variant_storage_path(path: str, width: int, fmt: str) -> str:
+    stem = PurePosixPath(path).with_suffix("")
+    return f"{VARIANT_PREFIX}/{stem}_w{width}.{fmt}"
+
+
+class ImageVariantService:
+    """
+    Serves resized WebP/AVIF/JPEG copies of stored item images, generated on first request.
+    Lookups go local disk LRU -> variant stored in the bucket -> render from the original,
+    and every rendered variant is written back to both caches. Variant paths never change
+    for a given original, so responses can be cached by clients as immutable.
+    """
+
+    def __init__(self, storage: AsyncStorage, pool: ImageProcessingPool, disk_cache: DiskLRUCache, bucket: str = "item_images"):
+        self.storage = storage
+        self.pool = pool
+        self.disk_cache = disk_cache
+        self.bucket = bucket
+        self.avif = avif_supported()
+        self._flight = SingleFlight("image_variants")
+        self.rendered = 0
+        self.storage_hits = 0
+        self.backfill_running = False
+        self.backfilled = 0
+
+    def negotiate_format(self, requested: str, accept: str) -> str:
+        """Pick the output format: an explicit request, or the best one the client accepts."""
+        if requested != "auto":
+            if requested not in VARIANT_FORMATS:
+                raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: auto, {', '.join(VARIANT_FORMATS)}.")
+            if requested == "avif" and not self.avif:
+                raise HTTPException(status_code=400, detail="AVIF output is not available on this server.")
+            return requested
+        accept = accept or ""
+        if self.avif and "image/avif" in accept:
+            return "avif"
+        if "image/webp" in accept:
+            return "webp"
+        return "jpeg"
+
+    def validate(self, path: str, width: int):
+        if width not in VARIANT_WIDTHS:
+            raise HTTPException(status_code=400, detail=f"Unsupported width. Use one of: {', '.join(map(str, VARIANT_WIDTHS))}.")
+        parts = PurePosixPath(path).parts
+        if not parts or parts[0] != "public" or ".." in parts:
+            raise HTTPException(status_code=404, detail="Image not found.")
+
+    async def get(self, path: str, width: int, fmt: str) -> bytes:
+        """Return the variant bytes, rendering and caching them on a miss."""
+        self.validate(path, width)
+        variant_path = variant_storage_path(path, width, fmt)
+
+        data = await run_in_threadpool(self.disk_cache.get, variant_path)
+        if data is not None:
+            return data
+        # Concurrent requests for a missing variant share one download + render
+        return await self._flight.do(variant_path, self._load_or_render, path, variant_path, width, fmt)
+
+    async def _load_or_render(self, path: str, variant_path: str, width: int, fmt: str) -> bytes:
+        try:
+            data = await self.storage.download(self.bucket, variant_path)
+            self.storage_hits += 1
+        except TransientStorageError:
+            raise HTTPException(status_code=503, detail="Image storage is temporarily unavailable.")
+        except StorageError:
+            data = await self._render(path, variant_path, width, fmt)
+        await run_in_threadpool(self.disk_cache.set, variant_path, data)
+        return data
+
+    async def _render(self, path: str, variant_path: str, width: int, fmt: str) -> bytes:
+        try:
+            original = await self.storage.download(self.bucket, path)
+        except TransientStorageError:
+            raise HTTPException(status_code=503, detail="Image storage is temporarily unavailable.")
+        except StorageError:
+            raise HTTPException(status_code=404, detail="Image not found.")
+
+        data = await self.pool.run("image_variant", render_variant, original, width, fmt)
+        self.rendered += 1
+        try:
+            _, content_type, _ = VARIANT_FORMATS[fmt]
+            await self.storage.upload(self.bucket, variant_path, data, content_type=content_type, upsert=True)
+        except StorageError as e:
+            # Still serve the variant; it is rendered again on the next disk cache miss
+            print(f"Could not store image variant {variant_path}: {e}")
+        return data
+
+    async def backfill(self, university_id: int, limit: int = 200, formats=("webp",)) -> int:
+        """
+        Build missing thumbnails, and pre-generate variants, for a university's items
+        without a `thumbnail_url`. Runs one image at a time so it never crowds out
+        interactive uploads in the image pool. Returns how many items were updated.
+        """
+        if self.backfill_running:
+            return 0
+        self.backfill_running = True
+        updated = 0
+        try:
+            items = await repos.items.list_missing(university_id, "thumbnail_url", "id, image_url", limit, require_image=True)
+            for item in items:
+                path = storage_path_from_url(item["image_url"], self.bucket)
+                if not path:
+                    continue
+                try:
+                    original = await self.storage.download(self.bucket, path)
+                    thumbnail_bytes = await self.pool.run("backfill_thumbnail", build_thumbnail, original)
+                    thumbnail_path = f"{PurePosixPath(path).with_suffix('')}_thumb.jpg"
+                    thumbnail_url = await self.storage.upload(
+                        self.bucket, thumbnail_path, thumbnail_bytes, content_type="image/jpeg", upsert=True
+                    )
+                    for fmt in formats:
+                        _, content_type, _ = VARIANT_FORMATS[fmt]
+                        variants = await self.pool.run("backfill_variants", render_variant_set, original, VARIANT_WIDTHS, fmt)
+                        # Variants may already exist (rendered on demand, or from an earlier partial run)
+                        await self.storage.upload_many([
+                            (self.bucket, variant_storage_path(path, width, fmt), data, content_type)
+                            for width, data in variants.items()
+                        ], upsert=True)
+                    await repos.items.update(item["id"], {"thumbnail_url": thumbnail_url})
+                    updated += 1
+                    self.backfilled += 1
+                except Exception as e:
+                    print(f"Image backfill failed for item {item['id']}: {e}")
+            print(f"🖼️ Image backfill for university {university_id}: {updated} item(s) updated")
+            return updated
+        finally:
+            self.backfill_running = False
+
+    def stats(self) -> dict:
+        return {
+            "avif_supported": self.avif,
+            "rendered": self.rendered,
+            "storage_hits": self.storage_hits,
+            "disk_cache": self.disk_cache.stats(),
+            "backfill_running": self.backfill_running,
+            "backfilled": self.backfilled,
+        }
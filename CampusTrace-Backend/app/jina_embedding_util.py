@@ -1,119 +1,129 @@
-import io
-import base64
-import requests
+from typing import Optional
+
+import httpx
 from PIL import Image
 from app.config import get_settings
+from app.image_processing import image_data_url
+from app.rate_limit import jina_limiter
+from app.resilience import ProviderUnavailable, jina_provider, raise_for_retryable_status
 
 settings = get_settings()
 
-JINA_API_URL = getattr(settings, "JINA_EMBEDDING_URL", "https://api.jina.ai/v1/embeddings")
+JINA_API_URL = settings.JINA_EMBEDDING_URL
 JINA_API_TOKEN = getattr(settings, "JINA_API_KEY", None)
 HEADERS = {"Authorization": f"Bearer {JINA_API_TOKEN}"} if JINA_API_TOKEN else {}
 
+# One pooled client for all embedding calls (keep-alive instead of a new TLS handshake per request)
+_client: Optional[httpx.AsyncClient] = None
 
-async def get_jina_embedding_async(input_data):
-    """Generate a Jina embedding from text or image (auto-detect type)."""
-    try:
-        print(f"🧩 Input type at runtime: {type(input_data)}")
-
-        # --- Image input ---
-        if isinstance(input_data, Image.Image):
-            buffered = io.BytesIO()
-            input_data.save(buffered, format="PNG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-            payload = {
-                "model": "jina-embeddings-v4",
-                "input": [{"image": f"data:image/png;base64,{img_base64}"}],
-            }
-
-        # --- Text input ---
-        elif isinstance(input_data, str):
-            payload = {
-                "model": "jina-embeddings-v4",
-                "input": [input_data],
-            }
 
-        else:
-            raise TypeError(f"Unsupported input type for Jina embedding: {type(input_data)}")
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            # Per-attempt deadlines are enforced by jina_provider
+            timeout=httpx.Timeout(None, connect=5.0),
+            limits=httpx.Limits(max_connections=settings.JINA_MAX_CONCURRENCY * 2, max_keepalive_connections=settings.JINA_MAX_CONCURRENCY),
+        )
+    return _client
 
-        response = requests.post(JINA_API_URL, headers=HEADERS, json=payload, timeout=30)
-        response.raise_for_status()
-        result = response.json()
 
-        embedding = result.get("data", [{}])[0].get("embedding", [])
-        return embedding
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
-    except requests.exceptions.Timeout:
-        print(f"⏱️ Timeout calling Jina API (30s)")
-        return None
-    except requests.exceptions.RequestException as e:
-        print(f"❌ HTTP error calling Jina API: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"🧾 Response body: {e.response.text}")
-        return None
-    except Exception as e:
-        print(f"❌ General error generating Jina embedding: {e}")
-        return None
 
+async def _post_embedding(payload: dict) -> list:
+    response = raise_for_retryable_status(await _get_client().post(JINA_API_URL, json=payload))
+    result = response.json()
+    return result.get("data", [{}])[0].get("embedding", [])
 
-async def get_multimodal_embedding(text: str = None, image: Image.Image = None):
-    """Generate a multimodal (text + image) embedding."""
-    try:
-        # Handle text-only case
-        if text and not image:
-            print(f"🧩 Generating text-only embedding. text type={type(text)}")
-            payload = {
-                "model": "jina-embeddings-v4",
-                "input": [text],
-            }
-        
-        # Handle image-only case
-        elif image and not text:
-            print(f"🧩 Generating image-only embedding. image type={type(image)}")
-            buffered = io.BytesIO()
-            image.save(buffered, format="PNG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-            
-            payload = {
-                "model": "jina-embeddings-v4",
-                "input": [{"image": f"data:image/png;base64,{img_base64}"}],
-            }
-        
-        # Handle multimodal case (both text and image)
-        elif text and image:
-            print(f"🧩 Generating multimodal embedding. text type={type(text)}, image type={type(image)}")
-            buffered = io.BytesIO()
-            image.save(buffered, format="PNG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-            payload = {
-                "model": "jina-embeddings-v4",
-                "input": [{
-                    "text": text,
-                    "image": f"data:image/png;base64,{img_base64}"
-                }],
-            }
-        
-        else:
-            raise ValueError("Either text or image (or both) must be provided")
 
-        response = requests.post(JINA_API_URL, headers=HEADERS, json=payload, timeout=60)
-        response.raise_for_status()
-        result = response.json()
+async def _embed(payload: dict, label: str):
+    """
+    Call Jina with retries, hedging and the circuit breaker. Returns None on failure,
+    except that a saturated or short-circuited provider surfaces as a 503.
+    """
+    async with jina_limiter.slot():
+        try:
+            return await jina_provider.call(_post_embedding, payload)
+        except ProviderUnavailable:
+            raise
+        except httpx.HTTPStatusError as e:
+            print(f"❌ HTTP error ({label}) calling Jina API: {e}")
+            print(f"🧾 Response body: {e.response.text}")
+            return None
+        except Exception as e:
+            print(f"❌ Error ({label}) calling Jina API: {e!r}")
+            return None
 
-        embedding = result.get("data", [{}])[0].get("embedding", [])
-        return embedding
 
-    except requests.exceptions.RequestException as e:
-        print(f"❌ HTTP error (multimodal) calling Jina API: {e}")
-        if e.response is not None:
-            print(f"🧾 Response body: {e.response.text}")
+async def get_jina_embedding_async(input_data):
+    """Generate a Jina embedding from text or image (auto-detect type)."""
+    print(f"🧩 Input type at runtime: {type(input_data)}")
+
+    # --- Image input (encoded here, on the event loop; the app passes pool-built data URLs instead) ---
+    if isinstance(input_data, Image.Image):
+        payload = {
+            "model": "jina-embeddings-v4",
+            "input": [{"image": image_data_url(input_data)}],
+        }
+
+    # --- Text input ---
+    elif isinstance(input_data, str):
+        payload = {
+            "model": "jina-embeddings-v4",
+            "input": [input_data],
+        }
+
+    else:
+        print(f"❌ Unsupported input type for Jina embedding: {type(input_data)}")
         return None
-    except Exception as e:
-        print(f"❌ General error generating multimodal embedding: {e}")
+
+    return await _embed(payload, "single")
+
+
+async def get_multimodal_embedding(text: str = None, image: str = None):
+    """
+    Generate a multimodal (text + image) embedding. `image` is a data URL built in the
+    image pool (see image_processing.image_data_url), so no encoding runs on the event loop.
+    """
+    # Handle text-only case
+    if text and not image:
+        print(f"🧩 Generating text-only embedding. text type={type(text)}")
+        payload = {
+            "model": "jina-embeddings-v4",
+            "input": [text],
+        }
+
+    # Handle image-only case
+    elif image and not text:
+        print(f"🧩 Generating image-only embedding ({len(image) // 1024}KB data URL)")
+        payload = {
+            "model": "jina-embeddings-v4",
+            "input": [{"image": image}],
+        }
+
+    # Handle multimodal case (both text and image)
+    elif text and image:
+        print(f"🧩 Generating multimodal embedding. text type={type(text)}, image {len(image) // 1024}KB data URL")
+        payload = {
+            "model": "jina-embeddings-v4",
+            "input": [{
+                "text": text,
+                "image": image
+            }],
+        }
+
+    else:
+        print("❌ Either text or image (or both) must be provided")
         return None
 
+    return await _embed(payload, "multimodal")
+
 
 async def test_jina_embedding():
     """Test Jina embedding on both text and image to confirm multimodal support."""
@@ -137,9 +147,10 @@ async def test_jina_embedding():
         try:
             # Create a simple test image (100x100 red square)
             test_img = Image.new('RGB', (100, 100), color='red')
+            test_image_url = image_data_url(test_img)
             
             print(f"🔹 Testing image-only embedding...")
-            image_emb = await get_multimodal_embedding(image=test_img)
+            image_emb = await get_multimodal_embedding(image=test_image_url)
 
             if image_emb and len(image_emb) > 0:
                 print(f"✅ Image embedding OK (dim={len(image_emb)})")
@@ -148,7 +159,7 @@ async def test_jina_embedding():
 
             # Test multimodal
             print(f"🔹 Testing multimodal (text + image) embedding...")
-            multimodal_emb = await get_multimodal_embedding(text=sample_text, image=test_img)
+            multimodal_emb = await get_multimodal_embedding(text=sample_text, image=test_image_url)
 
             if multimodal_emb and len(multimodal_emb) > 0:
                 print(f"✅ Multimodal embedding OK (dim={len(multimodal_emb)})")
@@ -2,31 +2,100 @@ import os
 import gc
 from pathlib import Path
 from uuid import uuid4
-from datetime import datetime
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Request
 from pydantic import BaseModel, EmailStr
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from typing import List, Optional
 import traceback
-from PIL import Image
 import io
 import google.generativeai as genai
 import httpx
 import json
 import resend
 import asyncio
+import base64
 from fastapi.concurrency import run_in_threadpool
 
 from app.config import get_settings
-from app.dependencies import get_current_user_id, get_admin_university_id, supabase
+from app.dependencies import get_current_user_id, get_admin_university_id, get_current_university_id, get_stream_user_id
+from app.repositories import repos
 from app import jina_embedding_util
+from app.response_cache import cached_response, invalidate_tags
+from app.singleflight import SingleFlight, all_singleflight_stats
+from app.notifications import (
+    create_notification, create_notifications_bulk, notify_university_admins,
+    unread_counter, notification_broker, publish_unread_delta
+)
+from app.notification_broker import StreamLimitExceeded, format_sse
+from app.uploads import BodySizeLimitMiddleware, read_upload_capped
+from app.storage import storage
+from app.image_processing import (
+    VARIANT_FORMATS, ImageProcessingPool, process_image_efficiently,
+    hash_image, prepare_item_image_hashed, prepare_search_image, prepare_search_image_hashed,
+    prepare_suggest_image
+)
+from app.image_hash import ImageHashIndex, hash_to_hex
+from app.image_variants import DiskLRUCache, ImageVariantService, storage_path_from_url
+from app.push_dispatcher import push_dispatcher
+from app.event_loop_monitor import event_loop_monitor
+from app.timing import TimingMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.metrics import MetricsMiddleware, metrics_sampler, render_metrics
+from app.cache import all_cache_stats
+from app.background import JobQueue, RetryBudget, all_queue_stats, spawn
+from app.resilience import all_provider_stats, gemini_provider, recaptcha_provider, resend_provider
+from app.rate_limit import (
+    PRIORITY_BACKFILL, PRIORITY_BACKGROUND, all_limiter_stats, gemini_limiter, request_priority
+)
+from app.tagging import AITagger
+from app.category_classifier import CategoryCentroids, map_category
 
 # Load application settings and initialize global variables
 settings = get_settings()
 model = None  # Will hold the Gemini AI model after startup
 
+# All PIL decode/resize/encode work runs in this bounded pool, off the event loop
+image_pool = ImageProcessingPool(
+    workers=settings.IMAGE_POOL_WORKERS,
+    max_pending=settings.IMAGE_POOL_MAX_PENDING,
+    mode=settings.IMAGE_POOL_MODE,
+    max_pixels=settings.MAX_IMAGE_PIXELS
+)
+
+# Cached, concurrency-limited Gemini tagging (model attached on startup)
+ai_tagger = AITagger(
+    limiter=gemini_limiter,
+    cache_ttl=settings.AI_TAG_CACHE_TTL_SECONDS,
+    cache_entries=settings.AI_TAG_CACHE_MAX_ENTRIES,
+    batch_size=settings.AI_TAG_BATCH_SIZE
+)
+
+# Perceptual hashes of item photos per university, for duplicate detection
+image_hash_index = ImageHashIndex(max_distance=settings.IMAGE_DUPLICATE_MAX_DISTANCE)
+
+# Local category prediction for suggest-details-from-image; Gemini Vision only when unsure
+category_classifier = CategoryCentroids(
+    min_similarity=settings.CATEGORY_CLASSIFIER_MIN_SIMILARITY,
+    min_margin=settings.CATEGORY_CLASSIFIER_MIN_MARGIN,
+    refresh_seconds=settings.CATEGORY_CLASSIFIER_REFRESH_SECONDS
+)
+suggest_stats = {"requests": 0, "hash_hits": 0, "classifier_hits": 0, "gemini_calls": 0}
+
+# Which stage answered /api/items/image-search requests
+image_search_stats = {"searches": 0, "hash_hits": 0, "embedding_searches": 0}
+
+# Responsive item image variants, rendered on demand and cached on disk + in storage
+image_variants = ImageVariantService(
+    storage,
+    image_pool,
+    DiskLRUCache(settings.IMAGE_VARIANT_CACHE_DIR, settings.IMAGE_VARIANT_CACHE_MAX_BYTES)
+)
+
 # List of blacklisted public email domains
 PUBLIC_EMAIL_DOMAINS = {
     'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'aol.com',
@@ -63,8 +132,12 @@ async def startup_event():
     # Initialize Gemini AI for generating descriptions and tags
     if settings.GEMINI_API_KEY:
         try:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
+            genai.configure(
+                api_key=settings.GEMINI_API_KEY,
+                client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT} if settings.GEMINI_API_ENDPOINT else None
+            )
             model = genai.GenerativeModel("gemini-2.5-flash")
+            ai_tagger.model = model
             print("✅ Gemini AI generation/vision model (gemini-2.5-flash) configured successfully.")
         except Exception as e:
             print(f"❌ ERROR: Could not configure Gemini AI: {e}")
@@ -79,6 +152,21 @@ async def startup_event():
             print(f"❌ ERROR: Could not test Jina embedding model: {e}")
     else:
         print("⚠️ WARNING: JINA_API_KEY not found. Embedding features will be disabled.")
+
+    # Start the batching Expo push dispatcher
+    await push_dispatcher.start()
+
+    # Sample event-loop lag (reported in /health)
+    await event_loop_monitor.start()
+    await metrics_sampler.start()
+
+    # Start background item enrichment (tags + embeddings)
+    await enrichment_queue.start()
+    if settings.ENRICHMENT_RECOVER_ON_STARTUP:
+        try:
+            await recover_pending_enrichment()
+        except Exception as e:
+            print(f"❌ ERROR: Could not re-queue pending enrichment: {e}")
         
     print(f"Max image size: {int(os.getenv('MAX_IMAGE_SIZE', '5242880')) / 1024 / 1024:.1f}MB")
     print("🚀 Running API with Jina embedding pipeline")
@@ -89,9 +177,22 @@ async def shutdown_event():
     """Clean up resources on shutdown."""
     global model
     model = None
+    ai_tagger.model = None
+    await push_dispatcher.stop()
+    await event_loop_monitor.stop()
+    await metrics_sampler.stop()
+    await enrichment_queue.stop()
+    image_pool.shutdown()
+    await storage.close()
+    await jina_embedding_util.close_client()
+    repos.close()
     gc.collect()
     print("Shutting down gracefully...")
 
+# Reject oversized request bodies before they are parsed or buffered
+# (multipart overhead allowance on top of the largest accepted file)
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.MAX_UPLOAD_SIZE + 1048576)
+
 # Configure CORS - handle wildcard for development
 cors_origins = settings.CORS_ORIGINS
 if "*" in cors_origins:
@@ -113,23 +214,39 @@ else:
         allow_headers=["*"],
     )
 
-# Optimize images for faster processing and storage
-def process_image_efficiently(image_bytes: bytes, max_size=(1920, 1920)):
-    """Process images efficiently."""
-    with Image.open(io.BytesIO(image_bytes)) as img:
-        # Convert RGBA to RGB if necessary
-        if img.mode in ('RGBA', 'LA'):
-            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-            rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = rgb_img
-        
-        # Resize if larger than max_size
-        img.thumbnail(max_size, Image.Resampling.LANCZOS)
-        
-        # Save to bytes with good quality
-        output = io.BytesIO()
-        img.save(output, format='JPEG', quality=90, optimize=True)
-        return output.getvalue()
+# Added last, so they wrap CORS and body-limit handling and their timings cover it;
+# MetricsMiddleware is the outermost, with TimingMiddleware just inside it
+app.add_middleware(
+    TimingMiddleware,
+    server_timing=settings.SERVER_TIMING_ENABLED,
+    slow_request_ms=settings.SLOW_REQUEST_MS,
+)
+app.add_middleware(MetricsMiddleware)
+
+
+def queue_depths() -> dict:
+    """Work waiting in each in-process queue or pool, for /metrics."""
+    depths = {name: stats["depth"] for name, stats in all_queue_stats().items()}
+    depths.update({f"{name}_limiter": stats["waiting"] for name, stats in all_limiter_stats().items()})
+    depths["push"] = push_dispatcher.stats()["queue_depth"]
+    depths["image_pool"] = image_pool.stats()["pending"]
+    depths["db_executor"] = repos.stats().get("queued", 0)
+    return depths
+
+
+def cache_counts() -> dict:
+    """Cumulative (hits, misses) of each cache and local shortcut, for /metrics."""
+    counts = {name: (stats["hits"], stats["misses"]) for name, stats in all_cache_stats().items()}
+    disk_cache = image_variants.disk_cache.stats()
+    counts["image_variants_disk"] = (disk_cache["hits"], disk_cache["misses"])
+    local_hits = suggest_stats["hash_hits"] + suggest_stats["classifier_hits"]
+    counts["suggest_details_local"] = (local_hits, suggest_stats["requests"] - local_hits)
+    counts["image_search_hash"] = (image_search_stats["hash_hits"], image_search_stats["searches"] - image_search_stats["hash_hits"])
+    return counts
+
+
+metrics_sampler.add_queues(queue_depths)
+metrics_sampler.add_caches(cache_counts)
 
 # ============= Pydantic Models =============
 class UniversityRegistrationRequest(BaseModel):
@@ -196,6 +313,10 @@ class RoleUpdate(BaseModel):
 class StatusUpdate(BaseModel): 
     moderation_status: str
 
+class NotificationSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    all: bool = False
+
 # ============= Routers =============
 auth_router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 public_router = APIRouter(prefix="/api/public", tags=["Public"])
@@ -209,6 +330,14 @@ conversations_router = APIRouter(prefix="/api/conversations", tags=["Conversatio
 backup_router = APIRouter(prefix="/api/backup", tags=["Backup & Restore"])
 badges_router = APIRouter(prefix="/api/badges", tags=["Badges"])
 handover_router = APIRouter(prefix="/api/handover", tags=["Handover"])
+images_router = APIRouter(prefix="/api/images", tags=["Images"])
+
+# ============= Request Coalescing =============
+# Concurrent identical reads share one in-flight Supabase call
+items_feed_flight = SingleFlight("items_feed")
+leaderboard_flight = SingleFlight("leaderboard")
+universities_flight = SingleFlight("universities")
+site_settings_flight = SingleFlight("site_settings")
 
 # ============= Helper Functions =============
 async def get_university_settings(university_id: int):
@@ -217,14 +346,12 @@ async def get_university_settings(university_id: int):
     Returns settings like auto-approval status and keyword blacklist for moderation.
     """
     try:
-        settings_res = supabase.table("site_settings").select("setting_key, setting_value").eq("university_id", university_id).execute()
-        if not settings_res.data:
+        settings_map = await site_settings_flight.do(university_id, repos.settings.get, university_id)
+        if not settings_map:
             return {
                 "auto_approve_posts": False,
                 "keyword_blacklist": []
             }
-
-        settings_map = {item['setting_key']: item['setting_value'] for item in settings_res.data}
         
         return {
             "auto_approve_posts": settings_map.get("auto_approve_posts", "false").lower() == "true",
@@ -246,131 +373,33 @@ async def verify_captcha(token: str, client_ip: Optional[str]):
         print("WARNING: RECAPTCHA_SECRET_KEY not set. Skipping verification for development.")
         return True 
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://www.google.com/recaptcha/api/siteverify",
-            data={
-                "secret": settings.RECAPTCHA_SECRET_KEY,
-                "response": token,
-                "remoteip": client_ip,
-            },
-        )
-        result = response.json()
-        if not result.get("success"):
-            print(f"CAPTCHA verification failed: {result.get('error-codes')}")
-            raise HTTPException(status_code=400, detail="CAPTCHA verification failed.")
-        print("CAPTCHA verified successfully.")
-        return True
-
-def create_notification(recipient_id: str, university_id: int, message: str, link_to: Optional[str] = None, type: str = 'general'):
-    """
-    Create an in-app notification for a user.
-    Types: 'general', 'claim', 'moderation', 'verification', 'message', etc.
-    """
-    try:
-        # 1. (Existing) Create the in-app notification
-        supabase.table("notifications").insert({
-            "recipient_id": recipient_id,
-            "university_id": university_id,
-            "message": message,
-            "link_to": link_to,
-            "type": type,
-        }).execute()
-        print(f"In-app notification created for user {recipient_id}")
-
-        # 2. (NEW) Trigger a push notification asynchronously
-        asyncio.create_task(
-            send_push_notification(recipient_id, message, type, link_to)
-        )
-
-    except Exception as e:
-        print(f"Error creating notification: {e}")
-
-# === ADD THIS NEW ASYNC FUNCTION ===
-async def send_push_notification(recipient_id: str, message: str, notification_type: str, link_to: Optional[str] = None):
-    """
-    Fetches user's push token and sends a push notification via Expo.
-    """
-    try:
-        # Get user's push token and notification preferences
-        profile_res = supabase.table("profiles").select(
-            "push_token, message_notifications, claim_notifications, moderation_notifications"
-        ).eq("id", recipient_id).single().execute()
-
-        if not profile_res.data or not profile_res.data.get("push_token"):
-            print(f"No push token for user {recipient_id}, skipping push.")
-            return
-
-        profile = profile_res.data
-        push_token = profile["push_token"]
-
-        # Check user preferences (based on your profiles table)
-        if notification_type == 'message' and not profile.get('message_notifications', True):
-            print(f"User {recipient_id} has message push notifications disabled.")
-            return
-        if notification_type in ['claim', 'claim_response'] and not profile.get('claim_notifications', True):
-            print(f"User {recipient_id} has claim push notifications disabled.")
-            return
-
-        # Prepare the push message payload
-        push_payload = {
-            "to": push_token,
-            "sound": "default",
-            "title": "CampusTrace", # You can customize this
-            "body": message,
-            "data": { "url": link_to } # Send link_to in data payload
-        }
-
-        # Send the request to Expo's push API
+    async def siteverify():
         async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.expo.dev/v2/push/send",
-                json=push_payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-                    "Accept-Encoding": "gzip, deflate",
-                    # You can add an Expo Access Token here for security if needed
+            return await client.post(
+                settings.RECAPTCHA_VERIFY_URL,
+                data={
+                    "secret": settings.RECAPTCHA_SECRET_KEY,
+                    "response": token,
+                    "remoteip": client_ip,
                 },
             )
 
-        response.raise_for_status() # Raises an error if status code is 4xx/5xx
-        print(f"Push notification sent successfully to user {recipient_id}. Response: {response.json()}")
-
-    except httpx.HTTPStatusError as e:
-        print(f"Error sending push notification to {recipient_id}: {e.response.text}")
-    except Exception as e:
-        print(f"General error in send_push_notification: {e}")
+    response = await recaptcha_provider.call(siteverify)
+    result = response.json()
+    if not result.get("success"):
+        print(f"CAPTCHA verification failed: {result.get('error-codes')}")
+        raise HTTPException(status_code=400, detail="CAPTCHA verification failed.")
+    print("CAPTCHA verified successfully.")
+    return True
 
 async def generate_ai_tags(title: str, description: str) -> Optional[List[str]]:
     """
     Generate AI-powered tags using Gemini model.
     Supports Taglish (Tagalog-English mix) for Philippine universities.
-    Returns up to 7 relevant keywords.
+    Returns up to 7 relevant keywords, or None when Gemini could not be reached.
+    Repeated title/description pairs are served from the tag cache.
     """
-    if not model:
-        return []
-    try:
-        prompt = f"""
-        Generate 5-7 relevant, comma-separated keywords (tags) for a lost or found item in a Philippine university.
-        Include item type, color, brand, and potential Taglish (Tagalog-English) terms.
-        Do not use hashtags.
-        
-        Title: '{title}'
-        Description: '{description}'
-        
-        Example:
-        Title: 'Black Jansport backpack'
-        Description: 'Naiwan sa library, may libro sa loob.'
-        Tags: backpack, itim, jansport, bag, library, libro
-        """
-        response = await model.generate_content_async(prompt)
-        tags_string = response.text.strip().replace("#", "")
-        tags_list = [tag.strip().lower() for tag in tags_string.split(',') if tag.strip()]
-        return tags_list[:7]
-    except Exception as e:
-        print(f"Error generating AI tags: {e}")
-        return []
+    return await ai_tagger.tag(title, description)
 
 def calculate_simple_match_score(lost_item: dict, found_item: dict) -> int:
     """
@@ -436,15 +465,18 @@ async def find_proactive_matches(new_item: dict, university_id: int):
         print(f"\n🔍 [PROACTIVE MATCH] Checking for matches for new Found item: {new_item['title']}")
         
         # Fetch all "Lost" items from the same university with approved moderation status
-        lost_items_res = supabase.table("items").select(
-            "id, title, user_id, text_embedding, image_embedding, category, location"
-        ).eq("university_id", university_id).eq("status", "Lost").eq("moderation_status", "approved").execute()
+        lost_items = await repos.items.list_by_university(
+            university_id,
+            "id, title, user_id, text_embedding, image_embedding, category, location",
+            status="Lost",
+            moderation_status="approved"
+        )
         
-        if not lost_items_res.data:
+        if not lost_items:
             print("📭 No Lost items found to match against.")
             return
         
-        print(f"📊 Found {len(lost_items_res.data)} Lost items to compare.")
+        print(f"📊 Found {len(lost_items)} Lost items to compare.")
         
         # Get embeddings for the new Found item
         new_text_embedding = new_item.get('text_embedding')
@@ -453,7 +485,7 @@ async def find_proactive_matches(new_item: dict, university_id: int):
         high_confidence_threshold = 0.90  # 90% similarity threshold
         matches_found = 0
         
-        for lost_item in lost_items_res.data:
+        for lost_item in lost_items:
             max_similarity = 0.0
             
             # Compare text embeddings if both exist
@@ -473,7 +505,7 @@ async def find_proactive_matches(new_item: dict, university_id: int):
                 print(f"  ✅ HIGH MATCH! Notifying user {lost_item['user_id']}")
                 
                 notification_message = f"We think someone just found your {lost_item['title']}! 🎉"
-                create_notification(
+                await create_notification(
                     recipient_id=lost_item['user_id'],
                     university_id=university_id,
                     message=notification_message,
@@ -488,37 +520,140 @@ async def find_proactive_matches(new_item: dict, university_id: int):
         print(f"❌ Error in find_proactive_matches: {e}")
         traceback.print_exc()
 
-def award_badge(user_id: str, badge_name: str, university_id: int):
+# ============= Item Enrichment =============
+def _valid_embedding(embedding) -> bool:
+    return bool(embedding) and not all(v == 0.0 for v in embedding)
+
+async def enrich_item(job: dict):
+    """Enrichment job handler; its provider calls queue behind interactive requests."""
+    with request_priority(PRIORITY_BACKGROUND):
+        await _enrich_item(job)
+
+async def _enrich_item(job: dict):
+    """
+    Compute an item's missing AI tags and embeddings after it was created, write
+    them back and run proactive matching. Parts that succeed are saved even when
+    another part fails, so a retry only redoes what is still missing.
+    """
+    item_id = job["item_id"]
+    needs = job["needs"]
+    updates = {}
+
+    if "ai_tags" in needs:
+        ai_tags = await generate_ai_tags(job["title"], job["description"])
+        if ai_tags is not None:  # None means the Gemini call failed; [] is a valid answer
+            updates["ai_tags"] = ai_tags
+            needs.discard("ai_tags")
+
+    if not settings.JINA_API_KEY:
+        needs.discard("text_embedding")
+        needs.discard("image_embedding")
+
+    if "text_embedding" in needs:
+        text_embedding = await jina_embedding_util.get_multimodal_embedding(text=job["combined_text"], image=None)
+        if _valid_embedding(text_embedding):
+            updates["text_embedding"] = text_embedding
+            needs.discard("text_embedding")
+
+    if "image_embedding" in needs:
+        # Jobs carry the image URL, not the bytes, so a full queue doesn't hold every upload in memory
+        image_bytes = await storage.download("item_images", storage_path_from_url(job["image_url"], "item_images"))
+        embedding_image = await image_pool.run("enrichment_image", prepare_search_image, image_bytes)
+        image_embedding = await jina_embedding_util.get_multimodal_embedding(text=None, image=embedding_image)
+        if _valid_embedding(image_embedding):
+            updates["image_embedding"] = image_embedding
+            needs.discard("image_embedding")
+
+    if not needs:
+        updates["enrichment_status"] = "complete"
+    if updates:
+        await repos.items.update(item_id, updates)
+    if needs:
+        raise RuntimeError(f"Enrichment of item {item_id} incomplete: {', '.join(sorted(needs))}")
+
+    print(f"✨ Item {item_id} enriched")
+    enriched_item = await repos.items.get(item_id, "id, title, status, moderation_status, text_embedding, image_embedding")
+    if enriched_item:
+        if enriched_item["status"] == "Found" and enriched_item["moderation_status"] == "approved":
+            await find_proactive_matches(enriched_item, job["university_id"])
+
+async def mark_enrichment_failed(job: dict, error: Exception):
+    await repos.items.update(job["item_id"], {"enrichment_status": "failed"})
+
+async def submit_enrichment(job: dict) -> bool:
+    """Queue an enrichment job. When the queue is full the item is marked failed instead of staying pending."""
+    if enrichment_queue.submit(job):
+        return True
+    try:
+        await mark_enrichment_failed(job, RuntimeError("enrichment queue is full"))
+    except Exception as e:
+        print(f"Error marking enrichment of item {job['item_id']} failed: {e}")
+    return False
+
+async def recover_pending_enrichment():
+    """Re-queue items whose enrichment was interrupted by a restart, for the parts still missing."""
+    limit = 500
+    pending = await repos.items.list_pending_enrichment(
+        "id, university_id, title, description, location, category, image_url, ai_tags", limit=limit
+    )
+    if not pending:
+        return
+    # Ids only: the embeddings themselves are large and only their absence matters here
+    missing_text = {row["id"] for row in await repos.items.list_pending_enrichment("id", limit, missing="text_embedding")}
+    missing_image = {row["id"] for row in await repos.items.list_pending_enrichment("id", limit, missing="image_embedding")}
+    for row in pending:
+        needs = set()
+        if row["id"] in missing_text:
+            needs.add("text_embedding")
+        if row.get("ai_tags") is None:
+            needs.add("ai_tags")
+        if row.get("image_url") and row["id"] in missing_image:
+            needs.add("image_embedding")
+        await submit_enrichment({
+            "item_id": row["id"],
+            "university_id": row["university_id"],
+            "title": row["title"],
+            "description": row["description"],
+            "combined_text": f"Title: {row['title']}. Description: {row['description']}. Location: {row['location']}. Category: {row['category']}.",
+            "image_url": row.get("image_url"),
+            "needs": needs,
+        })
+    print(f"🔁 Re-queued enrichment for {len(pending)} item(s)")
+
+enrichment_queue = JobQueue(
+    "enrichment",
+    enrich_item,
+    workers=settings.ENRICHMENT_WORKERS,
+    max_attempts=settings.ENRICHMENT_MAX_ATTEMPTS,
+    retry_budget=RetryBudget(ratio=settings.ENRICHMENT_RETRY_BUDGET_RATIO),
+    on_failure=mark_enrichment_failed
+)
+
+async def award_badge(user_id: str, badge_name: str, university_id: int):
     """
     Award a badge to a user if they don't already have it.
     Returns True if badge was awarded, False if user already has it.
     """
     try:
         # Get badge ID by name
-        badge_res = supabase.table("badges").select("id").eq("name", badge_name).single().execute()
-        if not badge_res.data:
+        badge = await repos.badges.get_by_name(badge_name)
+        if not badge:
             print(f"⚠️ Badge '{badge_name}' not found in database.")
             return False
         
-        badge_id = badge_res.data['id']
+        badge_id = badge['id']
         
         # Check if user already has this badge
-        existing_badge = supabase.table("user_badges").select("id").eq(
-            "user_id", user_id
-        ).eq("badge_id", badge_id).execute()
-        
-        if existing_badge.data:
+        if await repos.badges.has_badge(user_id, badge_id):
             print(f"ℹ️ User {user_id} already has badge '{badge_name}'")
             return False
         
         # Award the badge
-        supabase.table("user_badges").insert({
-            "user_id": user_id,
-            "badge_id": badge_id
-        }).execute()
+        await repos.badges.award(user_id, badge_id)
+        invalidate_tags(f"badges:user:{user_id}")
         
         # Send notification to user
-        create_notification(
+        await create_notification(
             recipient_id=user_id,
             university_id=university_id,
             message=f"🏆 You earned the '{badge_name}' badge!",
@@ -552,37 +687,32 @@ async def register_university(payload: UniversityRegistrationRequest):
             )
         
         # Check if university name already exists
-        uni_exists = supabase.table("universities").select("id").eq("name", payload.university_name).execute()
-        if uni_exists.data:
+        if await repos.universities.find_by_name(payload.university_name):
             raise HTTPException(status_code=400, detail="A university with this name already exists.")
         
         # Check if user email already exists
-        user_exists_res = supabase.from_("profiles").select("id").eq("email", payload.email).execute()
-        if user_exists_res.data:
+        if await repos.profiles.find_by_email(payload.email):
             raise HTTPException(status_code=400, detail="A user with this email already exists.")
 
         # Check if the email domain is already registered to another university
         admin_domain = payload.email.split('@')[1]
-        domain_exists = supabase.table("allowed_domains").select("university_id, universities(name)").eq("domain_name", admin_domain).execute()
-        if domain_exists.data:
-            existing_uni_name = domain_exists.data[0].get('universities', {}).get('name', 'another university')
+        domain_exists = await repos.universities.get_domain(admin_domain)
+        if domain_exists:
+            existing_uni_name = (domain_exists.get('universities') or {}).get('name', 'another university')
             raise HTTPException(
                 status_code=400, 
                 detail=f"The email domain '{admin_domain}' is already registered to {existing_uni_name}. Each university domain can only be registered once."
             )
 
         # Create the new university (initially pending)
-        new_university_res = supabase.table("universities").insert({"name": payload.university_name, "status": "pending"}).execute()
-        new_university_id = new_university_res.data[0]['id']
+        new_university = await repos.universities.create(payload.university_name, "pending")
+        new_university_id = new_university['id']
 
         # Add the admin's email domain to allowed domains
-        supabase.table("allowed_domains").insert({
-            "university_id": new_university_id,
-            "domain_name": admin_domain
-        }).execute()
+        await repos.universities.add_domain(new_university_id, admin_domain)
 
         # Create the admin user in Supabase Auth
-        sign_up_res = supabase.auth.sign_up({
+        sign_up_res = await repos.auth.sign_up({
             "email": payload.email,
             "password": payload.password
         })
@@ -593,34 +723,34 @@ async def register_university(payload: UniversityRegistrationRequest):
         new_user_id = new_user.id
 
         # Update the profile with admin details (trigger should have created it)
-        supabase.table("profiles").update({
+        await repos.profiles.update(new_user.id, {
             "full_name": payload.full_name,
             "role": "admin",
             "university_id": new_university_id
-        }).eq("id", new_user.id).execute()
+        })
 
         # Activate the university
-        supabase.table("universities").update({"status": "active"}).eq("id", new_university_id).execute()
+        await repos.universities.set_status(new_university_id, "active")
 
         return {"message": "University created successfully. Please check your email to verify your account."}
 
     except HTTPException as http_exc:
         # Rollback: Delete created resources if something went wrong
         if new_user_id:
-            try: supabase.auth.admin.delete_user(new_user_id)
+            try: await repos.auth.delete_user(new_user_id)
             except: pass
         if new_university_id:
-            try: supabase.table("universities").delete().eq("id", new_university_id).execute()
+            try: await repos.universities.delete(new_university_id)
             except: pass
         raise http_exc
     except Exception as e:
         traceback.print_exc()
         # Rollback on any error
         if new_user_id:
-            try: supabase.auth.admin.delete_user(new_user_id)
+            try: await repos.auth.delete_user(new_user_id)
             except: pass
         if new_university_id:
-            try: supabase.table("universities").delete().eq("id", new_university_id).execute()
+            try: await repos.universities.delete(new_university_id)
             except: pass
         
         # Handle specific database constraint errors
@@ -656,8 +786,7 @@ async def signup_manual(
     user = None
     try:
         # Check if user already exists
-        user_exists_res = supabase.from_("profiles").select("id").eq("email", email).execute()
-        if user_exists_res.data:
+        if await repos.profiles.find_by_email(email):
             raise HTTPException(status_code=400, detail="A user with this email already exists.")
 
         # Prepare redirect URL for email confirmation
@@ -686,7 +815,7 @@ async def signup_manual(
         if redirect_url:
             signup_options["options"]["email_redirect_to"] = redirect_url
         
-        sign_up_res = supabase.auth.sign_up(signup_options)
+        sign_up_res = await repos.auth.sign_up(signup_options)
         
         if not sign_up_res.user:
             raise Exception("Failed to create user in Auth.")
@@ -694,55 +823,48 @@ async def signup_manual(
         user = sign_up_res.user
 
         # Fallback: ensure profile exists (trigger should handle this)
-        supabase.table("profiles").upsert({
+        await repos.profiles.upsert({
             "id": user.id,
             "full_name": full_name,
             "university_id": university_id,
             "role": "member",
             "is_verified": False 
-        }).execute()
+        })
 
-        # Process and upload the ID image
-        file_bytes = await id_file.read()
-        
+        # Process and upload the ID image (read under the upload cap)
+        file_bytes = await read_upload_capped(id_file, settings.MAX_UPLOAD_SIZE)
         max_id_size = settings.MAX_ID_IMAGE_SIZE
-        
+
         # Resize image if it's too large
         if len(file_bytes) > max_id_size:
-            file_bytes = process_image_efficiently(file_bytes)
+            file_bytes = await image_pool.run("id_image", process_image_efficiently, file_bytes)
         
         file_suffix = Path(id_file.filename or "").suffix
         file_path = f"manual_verifications/{user.id}/{uuid4().hex}{file_suffix}"
         
         # Upload to Supabase storage
-        supabase.storage.from_("other_images").upload(
-            path=file_path,
-            file=file_bytes,
-            file_options={"content-type": id_file.content_type or "application/octet-stream"}
+        id_image_url = await storage.upload(
+            "other_images",
+            file_path,
+            file_bytes,
+            content_type=id_file.content_type or "application/octet-stream"
         )
-        id_image_url = supabase.storage.from_("other_images").get_public_url(file_path)
 
         # Create verification record for admin review
-        supabase.table("user_verifications").insert({
+        await repos.verifications.create({
             "user_id": user.id,
             "university_id": university_id,
             "id_image_url": id_image_url,
             "status": "pending"
-        }).execute()
+        })
 
         # Notify all admins of the university about new verification request
-        admins_res = supabase.table("profiles").select("id").eq("university_id", university_id).eq("role", "admin").execute()
-        
-        if admins_res.data:
-            message = f"New manual verification request from {full_name} is awaiting review."
-            for admin in admins_res.data:
-                create_notification(
-                    recipient_id=admin['id'],
-                    university_id=university_id,
-                    message=message,
-                    link_to="/admin/manual-verification",
-                    type='verification'
-                )
+        await notify_university_admins(
+            university_id,
+            f"New manual verification request from {full_name} is awaiting review.",
+            link_to="/admin/manual-verification",
+            type='verification'
+        )
 
         return {"message": "Registration successful! Please confirm your email. Your account will be usable after an admin approves your ID."}
 
@@ -750,7 +872,7 @@ async def signup_manual(
         # Clean up user if created
         if user:
             try:
-                supabase.auth.admin.delete_user(user.id)
+                await repos.auth.delete_user(user.id)
             except Exception as delete_e:
                 print(f"Failed to clean up user during signup error: {delete_e}")
         raise http_exc
@@ -759,7 +881,7 @@ async def signup_manual(
         # Rollback: delete user on any error
         if user:
             try:
-                supabase.auth.admin.delete_user(user.id)
+                await repos.auth.delete_user(user.id)
             except Exception as delete_e:
                 print(f"Failed to clean up user during signup error: {delete_e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -774,8 +896,8 @@ async def signup_user(payload: SignupRequest, request: Request):
     
     # Verify that email domain is registered
     domain = payload.email.split("@")[-1]
-    domain_res = supabase.table("allowed_domains").select("university_id").eq("domain_name", domain).single().execute()
-    if not domain_res.data:
+    allowed_domain = await repos.universities.get_domain(domain)
+    if not allowed_domain:
         raise HTTPException(status_code=400, detail="This email domain is not registered on CampusTrace.")
     
     try:
@@ -787,7 +909,7 @@ async def signup_user(payload: SignupRequest, request: Request):
             else:
                 redirect_url = settings.EMAIL_CONFIRM_REDIRECT
 
-        university_id = domain_res.data["university_id"]
+        university_id = allowed_domain["university_id"]
 
         signup_options = {
             "email": payload.email,
@@ -806,7 +928,7 @@ async def signup_user(payload: SignupRequest, request: Request):
         if redirect_url:
             signup_options["options"]["email_redirect_to"] = redirect_url
         
-        result = supabase.auth.sign_up(signup_options)
+        result = await repos.auth.sign_up(signup_options)
         
         print(f"Signup result: {result}")
         
@@ -826,13 +948,13 @@ async def signup_user(payload: SignupRequest, request: Request):
                 )
             
             # Fallback: ensure profile exists (trigger should handle this)
-            supabase.table("profiles").upsert({
+            await repos.profiles.upsert({
                 "id": result.user.id,
                 "full_name": payload.full_name,
-                "university_id": domain_res.data["university_id"],
+                "university_id": university_id,
                 "role": "member",
                 "is_verified": True
-            }).execute()
+            })
             
             return {"message": "Check your inbox to confirm your email before signing in."}
         else:
@@ -879,10 +1001,10 @@ async def signup_user_mobile(payload: SignupRequest, request: Request):
     
     domain = email_parts[1].lower()
     
-    # Check if domain is registered (use execute() without single() to avoid exception)
-    domain_res = supabase.table("allowed_domains").select("university_id").eq("domain_name", domain).execute()
+    # Check if domain is registered
+    allowed_domain = await repos.universities.get_domain(domain)
     
-    if not domain_res.data or len(domain_res.data) == 0:
+    if not allowed_domain:
         raise HTTPException(
             status_code=400, 
             detail=f"The email domain '{domain}' is not registered with CampusTrace. Please use your official university email address, or register manually using the 'Manual (University ID)' option with a personal email and your university ID photo."
@@ -897,7 +1019,7 @@ async def signup_user_mobile(payload: SignupRequest, request: Request):
             else:
                 redirect_url = settings.EMAIL_CONFIRM_REDIRECT
 
-        university_id = domain_res.data["university_id"]
+        university_id = allowed_domain["university_id"]
 
         signup_options = {
             "email": payload.email,
@@ -916,7 +1038,7 @@ async def signup_user_mobile(payload: SignupRequest, request: Request):
         if redirect_url:
             signup_options["options"]["email_redirect_to"] = redirect_url
         
-        result = supabase.auth.sign_up(signup_options)
+        result = await repos.auth.sign_up(signup_options)
         
         print(f"Mobile signup result: {result}")
         
@@ -936,13 +1058,13 @@ async def signup_user_mobile(payload: SignupRequest, request: Request):
                 )
             
             # Fallback: ensure profile exists (trigger should handle this)
-            supabase.table("profiles").upsert({
+            await repos.profiles.upsert({
                 "id": result.user.id,
                 "full_name": payload.full_name,
                 "university_id": university_id,
                 "role": "member",
                 "is_verified": True
-            }).execute()
+            })
             
             return {"message": "Check your inbox to confirm your email before signing in."}
         else:
@@ -990,13 +1112,11 @@ async def signup_manual_mobile(
     user = None
     try:
         # Check if user already exists
-        user_exists_res = supabase.from_("profiles").select("id").eq("email", email).execute()
-        if user_exists_res.data:
+        if await repos.profiles.find_by_email(email):
             raise HTTPException(status_code=400, detail="A user with this email already exists.")
 
         # Verify university exists
-        university_check = supabase.table("universities").select("id").eq("id", university_id).maybeSingle().execute()
-        if not university_check.data:
+        if not await repos.universities.get(university_id):
             raise HTTPException(status_code=400, detail="Invalid university selected.")
 
         # Prepare redirect URL for email confirmation
@@ -1025,7 +1145,7 @@ async def signup_manual_mobile(
         if redirect_url:
             signup_options["options"]["email_redirect_to"] = redirect_url
         
-        sign_up_res = supabase.auth.sign_up(signup_options)
+        sign_up_res = await repos.auth.sign_up(signup_options)
         
         if not sign_up_res.user:
             raise Exception("Failed to create user in Auth.")
@@ -1033,55 +1153,48 @@ async def signup_manual_mobile(
         user = sign_up_res.user
 
         # Fallback: ensure profile exists (trigger should handle this)
-        supabase.table("profiles").upsert({
+        await repos.profiles.upsert({
             "id": user.id,
             "full_name": full_name,
             "university_id": university_id,
             "role": "member",
             "is_verified": False 
-        }).execute()
+        })
 
-        # Process and upload the ID image
-        file_bytes = await id_file.read()
-        
+        # Process and upload the ID image (read under the upload cap)
+        file_bytes = await read_upload_capped(id_file, settings.MAX_UPLOAD_SIZE)
         max_id_size = settings.MAX_ID_IMAGE_SIZE
-        
+
         # Resize image if it's too large
         if len(file_bytes) > max_id_size:
-            file_bytes = process_image_efficiently(file_bytes)
+            file_bytes = await image_pool.run("id_image", process_image_efficiently, file_bytes)
         
         file_suffix = Path(id_file.filename or "").suffix
         file_path = f"manual_verifications/{user.id}/{uuid4().hex}{file_suffix}"
         
         # Upload to Supabase storage
-        supabase.storage.from_("other_images").upload(
-            path=file_path,
-            file=file_bytes,
-            file_options={"content-type": id_file.content_type or "application/octet-stream"}
+        id_image_url = await storage.upload(
+            "other_images",
+            file_path,
+            file_bytes,
+            content_type=id_file.content_type or "application/octet-stream"
         )
-        id_image_url = supabase.storage.from_("other_images").get_public_url(file_path)
 
         # Create verification record for admin review
-        supabase.table("user_verifications").insert({
+        await repos.verifications.create({
             "user_id": user.id,
             "university_id": university_id,
             "id_image_url": id_image_url,
             "status": "pending"
-        }).execute()
+        })
 
         # Notify all admins of the university about new verification request
-        admins_res = supabase.table("profiles").select("id").eq("university_id", university_id).eq("role", "admin").execute()
-        
-        if admins_res.data:
-            message = f"New manual verification request from {full_name} is awaiting review."
-            for admin in admins_res.data:
-                create_notification(
-                    recipient_id=admin['id'],
-                    university_id=university_id,
-                    message=message,
-                    link_to="/admin/manual-verification",
-                    type='verification'
-                )
+        await notify_university_admins(
+            university_id,
+            f"New manual verification request from {full_name} is awaiting review.",
+            link_to="/admin/manual-verification",
+            type='verification'
+        )
 
         return {"message": "Registration successful! Please confirm your email. Your account will be usable after an admin approves your ID."}
 
@@ -1089,7 +1202,7 @@ async def signup_manual_mobile(
         # Clean up user if created
         if user:
             try:
-                supabase.auth.admin.delete_user(user.id)
+                await repos.auth.delete_user(user.id)
             except Exception as delete_e:
                 print(f"Failed to clean up user during signup error: {delete_e}")
         raise http_exc
@@ -1098,7 +1211,7 @@ async def signup_manual_mobile(
         # Rollback: delete user on any error
         if user:
             try:
-                supabase.auth.admin.delete_user(user.id)
+                await repos.auth.delete_user(user.id)
             except Exception as delete_e:
                 print(f"Failed to clean up user during signup error: {delete_e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1111,12 +1224,10 @@ async def get_universities():
     Public endpoint - no authentication required.
     """
     try:
-        universities_res = supabase.table("universities").select(
-            "id, name"
-        ).eq("status", "active").order("name").execute()
+        universities = await universities_flight.do("active", repos.universities.list_active)
         
         return {
-            "universities": universities_res.data or []
+            "universities": universities
         }
     except Exception as e:
         traceback.print_exc()
@@ -1142,117 +1253,74 @@ async def get_items_paginated(
     """
     try:
         # Get user's university
-        profile_res = supabase.table("profiles").select("university_id").eq("id", user_id).single().execute()
-        if not profile_res.data:
+        profile = await repos.profiles.get(user_id, "university_id")
+        if not profile:
             raise HTTPException(status_code=404, detail="User profile not found.")
         
-        university_id = profile_res.data['university_id']
+        university_id = profile['university_id']
         
         # Calculate offset
         offset = (page - 1) * limit
         
-        # Build query
-        query = supabase.table("items").select(
-            "*, profiles(id, full_name, email)",
-            count="exact"
-        ).eq("university_id", university_id).eq("moderation_status", "approved")
-        
-        # Apply filters
-        if status and status != "All":
-            query = query.eq("status", status)
-        if category:
-            query = query.eq("category", category)
-        if search:
-            query = query.or_(f"title.ilike.%{search}%,description.ilike.%{search}%")
-        
-        # Apply pagination and sorting
-        query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
-        
-        result = query.execute()
+        # Identical feed requests (same university, page and filters) share one query
+        feed_key = (university_id, page, limit, status, category, search)
+        items, total = await items_feed_flight.do(
+            feed_key,
+            repos.items.list_approved,
+            university_id,
+            status=status if status != "All" else None,
+            category=category,
+            search=search,
+            offset=offset,
+            limit=limit,
+            count=True
+        )
+        total = total or 0
         
         return {
-            "items": result.data or [],
-            "total_items": result.count or 0,
+            "items": items,
+            "total_items": total,
             "current_page": page,
-            "total_pages": ((result.count or 0) + limit - 1) // limit,
+            "total_pages": (total + limit - 1) // limit,
             "items_per_page": limit
         }
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to fetch items: {str(e)}")
 
+async def fetch_leaderboard(university_id: int) -> list:
+    """Fetch the top 10 users for a university. Errors propagate so a failed query is never cached."""
+    return await repos.profiles.leaderboard(university_id, limit=10)
+
 @item_router.get("/leaderboard")
-async def get_leaderboard(user_id: str = Depends(get_current_user_id)):
+@cached_response(ttl=60, scope="university", tags=["leaderboard"])
+async def get_leaderboard(university_id: Optional[int] = Depends(get_current_university_id)):
     """
     Get the top users leaderboard for the current user's university.
     Returns top 10 users ranked by successful returns.
+    The result only depends on the university, so it is cached per university.
     """
+    if not university_id:
+        # Return empty leaderboard if no university set (uncached: it would be keyed on no university)
+        return JSONResponse([])
     try:
-        # Get user's university with timeout protection
-        profile_res = supabase.table("profiles").select("university_id").eq("id", user_id).single().execute()
-        if not profile_res.data:
-            raise HTTPException(status_code=404, detail="User profile not found.")
-        
-        university_id = profile_res.data.get('university_id')
-        if not university_id:
-            # Return empty leaderboard if no university set
-            return []
-
-        # Try RPC first, fallback to direct query if it fails
-        try:
-            leaderboard_res = supabase.rpc('get_leaderboard_for_university', {
-                'p_university_id': university_id,
-                'p_limit': 10
-            }).execute()
-            
-            return leaderboard_res.data if leaderboard_res.data else []
-        except Exception as rpc_error:
-            # Log the specific RPC error and try fallback
-            print(f"Leaderboard RPC error (trying fallback): {str(rpc_error)}")
-            
-            # Fallback: Direct query approach
-            try:
-                # Get profiles from same university with their stats
-                profiles_res = supabase.table("profiles")\
-                    .select("id, full_name, email, avatar_url, successful_returns")\
-                    .eq("university_id", university_id)\
-                    .order("successful_returns", desc=True)\
-                    .limit(10)\
-                    .execute()
-                
-                return profiles_res.data if profiles_res.data else []
-            except Exception as fallback_error:
-                print(f"Leaderboard fallback error: {str(fallback_error)}")
-                return []
-            
-    except HTTPException:
-        raise
+        # Everyone at the same university shares one in-flight leaderboard query
+        return await leaderboard_flight.do(university_id, fetch_leaderboard, university_id)
     except Exception as e:
         traceback.print_exc()
         print(f"Leaderboard error: {str(e)}")
-        # Return empty leaderboard gracefully instead of 500 error
-        return []
+        # Return empty leaderboard gracefully instead of 500 error; as a Response so it is not cached
+        return JSONResponse([])
 
-@item_router.post("/generate-description")
-async def generate_description(payload: DescriptionRequest):
-    """
-    Rewrite and enhance user's draft description using AI.
-    Makes descriptions clearer and more helpful for matching.
-    Supports Taglish for Philippine universities.
-    """
-    if not model:
-        raise HTTPException(status_code=503, detail="AI features are not available.")
-    
-    try:
-        prompt = f"""
+DESCRIPTION_PROMPT = """
         A user in a Philippine university provided a draft description for a lost or found item. 
         Rewrite and enhance it to be clear, detailed, and effective.
         Use simple English but feel free to use common Taglish (Tagalog-English) words if it makes sense (e.g., 'cellphone', 'keychain', 'tumbler').
 
         Original Information:
-        - Item Title: "{payload.title}"
-        - Category: "{payload.category}"
-        - User's Draft Description: "{payload.draft_description}"
+        - Item Title: "{title}"
+        - Category: "{category}"
+        - User's Draft Description: "{draft_description}"
 
         Your task:
         - Refine the language to be clear and concise.
@@ -1261,12 +1329,118 @@ async def generate_description(payload: DescriptionRequest):
         - Ensure the tone is helpful.
         - Return only the improved description text.
         """
-        response = await model.generate_content_async(prompt)
+
+def description_prompt(payload: DescriptionRequest) -> str:
+    return DESCRIPTION_PROMPT.format(
+        title=payload.title, category=payload.category, draft_description=payload.draft_description
+    )
+
+def cancel_gemini_stream(response):
+    """
+    Cancel the gRPC call behind a streamed Gemini response, so nothing more is generated
+    (or billed). Closing the SDK's chunk iterator does not do this; the call lives on
+    in api_core's wrapper generator, whose `self` is the cancellable call.
+    """
+    iterator = getattr(response, "_iterator", None)
+    call = iterator if hasattr(iterator, "cancel") else None
+    frame = getattr(iterator, "ag_frame", None)  # None once the stream has finished
+    if call is None and frame is not None:
+        call = frame.f_locals.get("self")
+    if call is not None and hasattr(call, "cancel"):
+        call.cancel()
+
+@item_router.post("/generate-description")
+async def generate_description(payload: DescriptionRequest):
+    """
+    Rewrite and enhance user's draft description using AI.
+    Makes descriptions clearer and more helpful for matching.
+    Supports Taglish for Philippine universities.
+    """
+    if not model:
+        raise HTTPException(status_code=503, detail="AI features are not available.")
+    
+    try:
+        prompt = description_prompt(payload)
+        async with gemini_limiter.slot():
+            response = await gemini_provider.call(model.generate_content_async, prompt)
         return {"description": response.text.strip()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to generate AI description: {str(e)}")
+
+@item_router.post("/generate-description/stream")
+async def stream_description(payload: DescriptionRequest, request: Request):
+    """
+    Streaming variant of /generate-description.
+    Forwards Gemini's output as Server-Sent Events: `delta` events with each text chunk,
+    then one `done` event with the full description (or an `error` event).
+    Generation stops as soon as the client disconnects.
+    """
+    if not model:
+        raise HTTPException(status_code=503, detail="AI features are not available.")
+
+    # Take the Gemini slot and open the stream before responding, so saturation and
+    # provider outages still surface as a plain 503 instead of an event
+    resources = AsyncExitStack()
+    try:
+        await resources.enter_async_context(gemini_limiter.slot())
+        response = await gemini_provider.call(
+            model.generate_content_async, description_prompt(payload), stream=True
+        )
+    except HTTPException:
+        await resources.aclose()
+        raise
     except Exception as e:
+        await resources.aclose()
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to generate AI description: {str(e)}")
 
+    chunks = response.__aiter__()
+    # Synchronous, so it completes even when cleanup runs inside a cancelled task
+    resources.callback(cancel_gemini_stream, response)
+
+    async def event_stream():
+        parts = []
+        try:
+            while True:
+                # Check for a gone client on a timer too, not only when Gemini sends a chunk
+                next_chunk = asyncio.ensure_future(anext(chunks))
+                while not (await asyncio.wait({next_chunk}, timeout=settings.DESCRIPTION_STREAM_DISCONNECT_POLL_SECONDS))[0]:
+                    if await request.is_disconnected():
+                        next_chunk.cancel()  # Cancelling the pending read also cancels the call
+                        print("✂️ Description stream cancelled: client disconnected")
+                        return
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    break
+                if await request.is_disconnected():
+                    print("✂️ Description stream cancelled: client disconnected")
+                    return
+                text = chunk.text
+                if text:
+                    parts.append(text)
+                    yield format_sse("delta", {"text": text})
+            yield format_sse("done", {"description": "".join(parts).strip()})
+        except Exception as e:
+            traceback.print_exc()
+            yield format_sse("error", {"detail": f"Failed to generate AI description: {str(e)}"})
+        finally:
+            await resources.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens are delivered immediately
+        },
+        # Also runs if the client is gone before the stream starts
+        background=BackgroundTask(resources.aclose)
+    )
+
 @item_router.post("/ai/suggest-details-from-image")
 async def suggest_details_from_image(
     image_file: UploadFile = File(...),
@@ -1274,24 +1448,74 @@ async def suggest_details_from_image(
 ):
     """
     TASK 3: Analyze an uploaded image to suggest title and category.
-    Uses Gemini Vision AI to extract descriptive keywords from the image.
+    Tries local predictions first (same photo already posted, then a nearest-centroid
+    classifier over the university's labelled photos) and only asks Gemini Vision
+    to extract descriptive keywords when neither is confident.
     """
-    if not model:
-        raise HTTPException(status_code=503, detail="AI features are not available.")
-    
     try:
         print("\n🤖 [AI SUGGEST] Analyzing image for suggestions...")
-        
-        # Read and process the image
-        image_bytes = await image_file.read()
-        max_image_size = int(os.getenv("MAX_IMAGE_SIZE", "5242880"))
-        
-        # Resize if too large
-        if len(image_bytes) > max_image_size:
-            image_bytes = await run_in_threadpool(process_image_efficiently, image_bytes)
-        
-        # Load image for AI analysis
-        pil_image = Image.open(io.BytesIO(image_bytes))
+        suggest_stats["requests"] += 1
+
+        # Decode once for Gemini (1920px JPEG), the embedding (800px data URL) and the perceptual hash
+        image_upload = await read_upload_capped(image_file, settings.MAX_UPLOAD_SIZE)
+        vision_jpeg, embedding_image, image_hash = await image_pool.run(
+            "suggest_image", prepare_suggest_image, image_upload
+        )
+
+        local_result = None
+        profile = await repos.profiles.get(user_id, "university_id")
+        university_id = profile["university_id"] if profile else None
+
+        if university_id is not None:
+            # Fast path 1: the same photo is already posted
+            hash_matches = await image_hash_index.find(
+                university_id, image_hash, max_distance=settings.IMAGE_SEARCH_HASH_MAX_DISTANCE
+            )
+            if hash_matches:
+                # Only approved posts, so pending or rejected items' titles never leak to other users
+                distances = {}
+                for distance, item_id in hash_matches:
+                    distances.setdefault(item_id, distance)
+                approved = await repos.items.get_many(list(distances), "id, title, category", moderation_status="approved")
+                match = min(approved, key=lambda row: distances[row["id"]], default=None)
+                if match and match.get("category"):
+                    suggest_stats["hash_hits"] += 1
+                    local_result = {
+                        "suggestedTitle": match.get("title") or "Item",
+                        "suggestedCategory": match["category"],
+                        "analysis": "Matched a photo already posted at your university.",
+                        "confidence": "high",
+                        "source": "hash",
+                    }
+
+            # Fast path 2: nearest category centroid (skipped until the university has labelled photos)
+            if local_result is None and await category_classifier.is_ready(university_id):
+                prediction = None
+                try:
+                    embedding = await jina_embedding_util.get_multimodal_embedding(text=None, image=embedding_image)
+                    prediction = await category_classifier.classify(university_id, embedding)
+                except HTTPException as e:
+                    if e.status_code != 503:
+                        raise
+                    # Jina is saturated or its breaker is open: Gemini can still answer
+                    print(f"⚠️ Classifier skipped, Jina unavailable: {e.detail}")
+                if prediction:
+                    suggest_stats["classifier_hits"] += 1
+                    local_result = {
+                        "suggestedTitle": prediction["nearest_title"] or "Item",
+                        "suggestedCategory": prediction["category"],
+                        "analysis": f"Predicted from similar photos (similarity {prediction['similarity']:.2f}).",
+                        "confidence": "high",
+                        "source": "classifier",
+                    }
+
+        if local_result:
+            print(f"✅ Suggestions (local): {local_result}")
+            return local_result
+
+        if not model:
+            raise HTTPException(status_code=503, detail="AI features are not available.")
+        suggest_stats["gemini_calls"] += 1
         
         # Use Gemini Vision to analyze the image
         prompt = """
@@ -1310,7 +1534,10 @@ async def suggest_details_from_image(
         Be specific but brief.
         """
         
-        response = await model.generate_content_async([prompt, pil_image])
+        async with gemini_limiter.slot():
+            response = await gemini_provider.call(
+                model.generate_content_async, [prompt, {"mime_type": "image/jpeg", "data": vision_jpeg}]
+            )
         analysis_text = response.text.strip()
         
         print(f"📸 AI Analysis: {analysis_text}")
@@ -1339,80 +1566,22 @@ async def suggest_details_from_image(
         else:
             suggested_title = "Item"
         
-        # Map to category
-        # Common categories: Electronics, Accessories, Documents, Clothing, Bags, Books, Keys, Others
-        category_mapping = {
-            "phone": "Electronics",
-            "cellphone": "Electronics",
-            "smartphone": "Electronics",
-            "laptop": "Electronics",
-            "tablet": "Electronics",
-            "earphone": "Electronics",
-            "headphone": "Electronics",
-            "charger": "Electronics",
-            "powerbank": "Electronics",
-            "wallet": "Accessories",
-            "watch": "Accessories",
-            "bracelet": "Accessories",
-            "necklace": "Accessories",
-            "ring": "Accessories",
-            "glasses": "Accessories",
-            "sunglasses": "Accessories",
-            "umbrella": "Accessories",
-            "id": "Documents",
-            "card": "Documents",
-            "license": "Documents",
-            "certificate": "Documents",
-            "notebook": "Books",
-            "book": "Books",
-            "textbook": "Books",
-            "jacket": "Clothing",
-            "shirt": "Clothing",
-            "pants": "Clothing",
-            "shoes": "Clothing",
-            "bag": "Bags",
-            "backpack": "Bags",
-            "purse": "Bags",
-            "pouch": "Bags",
-            "key": "Keys",
-            "keychain": "Keys",
-            "bottle": "Others",
-            "tumbler": "Others",
-            "lunchbox": "Others",
-        }
-        
-        suggested_category = "Others"  # Default
-        object_lower = object_type.lower()
-        
-        # Check for matches in category mapping
-        for keyword, category in category_mapping.items():
-            if keyword in object_lower:
-                suggested_category = category
-                break
-        
-        # Also check keywords
-        if suggested_category == "Others":
-            for kw in keywords:
-                kw_lower = kw.lower()
-                for keyword, category in category_mapping.items():
-                    if keyword in kw_lower:
-                        suggested_category = category
-                        break
-                if suggested_category != "Others":
-                    break
-        
-        pil_image.close()
+        # Map to category (object type first, then keywords)
+        suggested_category = map_category(object_type, keywords)
         
         result = {
             "suggestedTitle": suggested_title,
             "suggestedCategory": suggested_category,
             "analysis": analysis_text,
-            "confidence": "high" if object_type else "low"
+            "confidence": "high" if object_type else "low",
+            "source": "gemini"
         }
         
         print(f"✅ Suggestions: {result}")
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to analyze image: {str(e)}")
@@ -1435,11 +1604,11 @@ async def create_item(
         item = ItemCreate.parse_raw(item_data)
 
         # Fetch profile + university
-        profile_res = supabase.table("profiles").select("university_id, full_name").eq("id", user_id).single().execute()
-        if not profile_res.data:
+        profile = await repos.profiles.get(user_id, "university_id, full_name")
+        if not profile:
             raise HTTPException(status_code=404, detail="User profile not found.")
-        university_id = profile_res.data["university_id"]
-        user_full_name = profile_res.data.get("full_name", "A user")
+        university_id = profile["university_id"]
+        user_full_name = profile.get("full_name", "A user")
 
         # Get university moderation settings
         uni_settings = await get_university_settings(university_id)
@@ -1452,89 +1621,69 @@ async def create_item(
         elif uni_settings["auto_approve_posts"]:
             moderation_status = "approved"
 
-        # Generate AI tags for better searchability
-        ai_tags = await generate_ai_tags(item.title, item.description)
-
         # Prepare text for embedding
         combined_text = f"Title: {item.title}. Description: {item.description}. Location: {item.location}. Category: {item.category}."
 
         image_url = None
         thumbnail_url = None
-        pil_image = None
+        image_hash = None
         image_embedding = None
         text_embedding = None
+        ai_tags = None
+        duplicate = None  # Existing item whose photo matches this one
 
         # Upload and process image if provided
         if image_file:
-            image_bytes = await image_file.read()
-            max_image_size = int(os.getenv("MAX_IMAGE_SIZE", "5242880"))
+            image_upload = await read_upload_capped(image_file, settings.MAX_UPLOAD_SIZE)
+            # Decode once and build storage (800px), thumbnail (200px), embedding variants and the dHash
+            image_bytes_for_storage, thumbnail_bytes, image_hash = await image_pool.run(
+                "item_variants", prepare_item_image_hashed, image_upload
+            )
+            print(f"📸 Image resized: {len(image_bytes_for_storage) // 1024}KB, thumbnail {len(thumbnail_bytes) // 1024}KB")
+
+            # Look for the same photo already posted at this university before any paid calls
+            hash_matches = await image_hash_index.find(university_id, image_hash)
+            if hash_matches:
+                distance, duplicate_id = hash_matches[0]
+                duplicate = await repos.items.get(
+                    duplicate_id,
+                    "id, title, description, location, category, ai_tags, image_embedding, text_embedding"
+                )
+                if duplicate:
+                    duplicate["distance"] = distance
+                    print(f"🧬 Photo matches item {duplicate_id} (distance={distance})")
 
-            # Optimize image for embedding: resize first if too large
-            if len(image_bytes) > max_image_size:
-                image_bytes = await run_in_threadpool(process_image_efficiently, image_bytes)
-            
-            # Load and resize to optimal size for Jina (800x800 max)
-            pil_image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-            pil_image.thumbnail((800, 800), Image.Resampling.LANCZOS)
-            print(f"📸 Image resized for embedding: {type(pil_image)} Size: {pil_image.size}")
-
-            # Re-save the resized image for storage
-            output_bytes_io = io.BytesIO()
-            pil_image.save(output_bytes_io, format="JPEG", quality=90)
-            image_bytes_for_storage = output_bytes_io.getvalue()
-
-            # Create thumbnail (200x200) for list views
-            thumbnail_image = pil_image.copy()
-            thumbnail_image.thumbnail((200, 200), Image.Resampling.LANCZOS)
-            thumbnail_bytes_io = io.BytesIO()
-            thumbnail_image.save(thumbnail_bytes_io, format="JPEG", quality=85)
-            thumbnail_bytes = thumbnail_bytes_io.getvalue()
+            if duplicate and duplicate["distance"] == 0 and duplicate.get("image_embedding"):
+                # Exact duplicate: the image embedding is the same. The files are still uploaded
+                # per item, so deleting either item (or its owner's files) never breaks the other.
+                image_embedding = duplicate["image_embedding"]
+                print("♻️ Reusing the image embedding of the duplicate")
 
             file_suffix = Path(image_file.filename or ".jpg").suffix
             file_path = f"public/{user_id}/{uuid4().hex}{file_suffix}"
             thumbnail_path = f"public/{user_id}/{uuid4().hex}_thumb{file_suffix}"
 
-            # Upload original image
-            supabase.storage.from_("item_images").upload(
-                path=file_path,
-                file=image_bytes_for_storage,
-                file_options={"content-type": "image/jpeg"}
-            )
-            image_url = supabase.storage.from_("item_images").get_public_url(file_path)
-
-            # Upload thumbnail
-            supabase.storage.from_("item_images").upload(
-                path=thumbnail_path,
-                file=thumbnail_bytes,
-                file_options={"content-type": "image/jpeg"}
-            )
-            thumbnail_url = supabase.storage.from_("item_images").get_public_url(thumbnail_path)
-
-            # Generate image embedding (image only, no text)
-            print("🔹 Generating image embedding...")
-            image_embedding = await jina_embedding_util.get_multimodal_embedding(
-                text=None,
-                image=pil_image
-            )
-            if image_embedding and not all(v == 0.0 for v in image_embedding):
-                print(f"✅ Image embedding successful (dim={len(image_embedding)})")
-            else:
-                print("⚠️ Image embedding failed")
-                image_embedding = None
-
-            pil_image.close()
-        
-        # Generate text embedding (always, text only)
-        print("🔹 Generating text embedding...")
-        text_embedding = await jina_embedding_util.get_multimodal_embedding(
-            text=combined_text,
-            image=None
-        )
-        if text_embedding and not all(v == 0.0 for v in text_embedding):
-            print(f"✅ Text embedding successful (dim={len(text_embedding)})")
-        else:
-            print("⚠️ Text embedding failed")
-            text_embedding = None
+            # Upload the image and its thumbnail in parallel
+            image_url, thumbnail_url = await storage.upload_many([
+                ("item_images", file_path, image_bytes_for_storage, "image/jpeg"),
+                ("item_images", thumbnail_path, thumbnail_bytes, "image/jpeg"),
+            ])
+
+        if duplicate and duplicate["distance"] == 0 \
+                and duplicate.get("title") == item.title and duplicate.get("description") == item.description:
+            # A straight repost: the tags and (for identical text) the text embedding still apply
+            ai_tags = duplicate.get("ai_tags")
+            if (duplicate.get("location"), duplicate.get("category")) == (item.location, item.category):
+                text_embedding = duplicate.get("text_embedding")
+
+        # AI tags and embeddings not reused from a duplicate are computed in the background
+        enrichment_needs = set()
+        if ai_tags is None:
+            enrichment_needs.add("ai_tags")
+        if text_embedding is None:
+            enrichment_needs.add("text_embedding")
+        if image_url and image_embedding is None:
+            enrichment_needs.add("image_embedding")
 
         # Save item to database
         post_data = {
@@ -1551,48 +1700,55 @@ async def create_item(
             "university_id": university_id,
             "moderation_status": moderation_status,
             "text_embedding": text_embedding,
-            "image_embedding": image_embedding
+            "image_embedding": image_embedding,
+            "image_hash": hash_to_hex(image_hash) if image_hash is not None else None,
+            "possible_duplicate_of": duplicate["id"] if duplicate else None,
+            "enrichment_status": "pending" if enrichment_needs else "complete"
         }
 
-        insert_response = supabase.table("items").insert(post_data).execute()
-        new_item = insert_response.data[0]
+        new_item = await repos.items.create(post_data)
+        if image_hash is not None:
+            image_hash_index.add(university_id, image_hash, new_item["id"])
+
+        if enrichment_needs:
+            await submit_enrichment({
+                "item_id": new_item["id"],
+                "university_id": university_id,
+                "title": item.title,
+                "description": item.description,
+                "combined_text": combined_text,
+                "image_url": image_url,
+                "needs": enrichment_needs,
+            })
 
         # Notify admins if post needs moderation
         if moderation_status == "pending":
-            admins_res = supabase.table("profiles").select("id").eq("university_id", university_id).eq("role", "admin").execute()
-            if admins_res.data:
-                message = f"New item '{item.title}' from {user_full_name} is awaiting moderation."
-                for admin in admins_res.data:
-                    create_notification(
-                        recipient_id=admin["id"],
-                        university_id=university_id,
-                        message=message,
-                        link_to="/admin/post-moderation",
-                        type="moderation"
-                    )
+            await notify_university_admins(
+                university_id,
+                f"New item '{item.title}' from {user_full_name} is awaiting moderation.",
+                link_to="/admin/post-moderation",
+                type="moderation"
+            )
 
         # TASK 2: Award badges for posting achievements
         # Check if this is user's first post
-        user_post_count_res = supabase.table("items").select("id", count="exact").eq("user_id", user_id).execute()
-        if user_post_count_res.count == 1:  # Just posted their first item
-            award_badge(user_id, "New Member", university_id)
+        if await repos.items.count_by_user(user_id) == 1:  # Just posted their first item
+            await award_badge(user_id, "New Member", university_id)
         
         # Check if user reached 10 Found items for Eagle Eye badge
         if item.status == "Found":
-            found_count_res = supabase.table("items").select("id", count="exact").eq(
-                "user_id", user_id
-            ).eq("status", "Found").execute()
-            if found_count_res.count == 10:
-                award_badge(user_id, "Eagle Eye", university_id)
-
-        # TASK 1: Trigger proactive matching if this is a "Found" item and it's approved
-        if item.status == "Found" and moderation_status == "approved":
-            # Run proactive matching asynchronously (non-blocking)
-            asyncio.create_task(find_proactive_matches(new_item, university_id))
-
-        print(f"✅ Item created with text_embedding (dim={len(text_embedding) if text_embedding else 0}) and image_embedding (dim={len(image_embedding) if image_embedding else 0})")
+            if await repos.items.count_by_user(user_id, status="Found") == 10:
+                await award_badge(user_id, "Eagle Eye", university_id)
+
+        # TASK 1: Proactive matching for approved "Found" items runs once enrichment has the embeddings
+        if not enrichment_needs and item.status == "Found" and moderation_status == "approved":
+            spawn(find_proactive_matches(new_item, university_id))
+
+        print(f"✅ Item {new_item['id']} created; enrichment pending for: {', '.join(sorted(enrichment_needs)) or 'nothing'}")
         return {"data": new_item}
 
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -1607,39 +1763,49 @@ async def search_by_image(image_file: UploadFile = File(...), user_id: str = Dep
         print("\n🔍 --- [IMAGE SEARCH DEBUG] ---")
 
         # Get user's university
-        profile_res = supabase.table("profiles").select("university_id").eq("id", user_id).single().execute()
-        if not profile_res.data:
+        profile = await repos.profiles.get(user_id, "university_id")
+        if not profile:
             raise HTTPException(status_code=404, detail="User profile not found.")
-        university_id = profile_res.data["university_id"]
+        university_id = profile["university_id"]
         print(f"🏫 University ID: {university_id}")
+        image_search_stats["searches"] += 1
 
-        # Check how many items exist with image embeddings
-        count_check = supabase.table("items")\
-            .select("id", count="exact")\
-            .eq("university_id", university_id)\
-            .not_.is_("image_embedding", "null")\
-            .eq("moderation_status", "approved")\
-            .execute()
-        print(f"📊 Total items with image embeddings in this university: {count_check.count}")
-
-        # Read and convert uploaded image
-        image_bytes = await image_file.read()
-        pil_image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        print(f"📸 Search image: {pil_image.size} - {pil_image.mode}")
-
-        # Resize if too large (helps with API timeouts)
-        max_search_size = (800, 800)
-        if pil_image.size[0] > max_search_size[0] or pil_image.size[1] > max_search_size[1]:
-            pil_image.thumbnail(max_search_size, Image.Resampling.LANCZOS)
-            print(f"📐 Resized search image to: {pil_image.size}")
+        # Read, convert and resize the uploaded image (max 800px helps with API timeouts)
+        image_upload = await read_upload_capped(image_file, settings.MAX_UPLOAD_SIZE)
+        search_image, image_hash = await image_pool.run("search_image", prepare_search_image_hashed, image_upload)
+        print(f"📸 Search image: {len(search_image) // 1024}KB data URL")
+
+        # Stage 1: near-exact photo matches straight from the local perceptual hash index
+        hash_matches = await image_hash_index.find(
+            university_id, image_hash, max_distance=settings.IMAGE_SEARCH_HASH_MAX_DISTANCE
+        )
+        if hash_matches:
+            distances = {}
+            for distance, item_id in hash_matches:
+                distances.setdefault(item_id, distance)
+            hits = await repos.items.get_many(
+                list(distances),
+                "id, title, description, status, category, location, image_url, thumbnail_url, ai_tags, created_at, user_id, university_id",
+                moderation_status="approved"
+            )
+            if hits:
+                results = sorted(
+                    ({**hit, "similarity": 1 - distances[hit["id"]] / 64, "match_stage": "hash"} for hit in hits),
+                    key=lambda hit: -hit["similarity"]
+                )[:10]
+                image_search_stats["hash_hits"] += 1
+                print(f"🧬 Hash stage answered with {len(results)} match(es)")
+                return {"results": results, "message": f"Found {len(results)} results"}
+
+        # Stage 2: full embedding search
+        image_search_stats["embedding_searches"] += 1
 
         # Generate image embedding (image only, no text)
         print("🔹 Generating Jina image embedding for search...")
         query_embedding = await jina_embedding_util.get_multimodal_embedding(
             text=None,
-            image=pil_image
+            image=search_image
         )
-        pil_image.close()
 
         if not query_embedding:
             print("❌ Embedding generation returned None")
@@ -1655,19 +1821,14 @@ async def search_by_image(image_file: UploadFile = File(...), user_id: str = Dep
         # Search using RPC with threshold of 0.6
         try:
             print(f"🔍 Calling RPC with threshold=0.6, count=10...")
-            matches = supabase.rpc("match_items_by_image_embedding", {
-                "p_university_id": university_id,
-                "p_query_embedding": query_embedding,
-                "p_match_threshold": 0.7,
-                "p_match_count": 10
-            }).execute()
+            matches = await repos.items.match_by_image_embedding(university_id, query_embedding, 0.7, 10)
             
-            print(f"✅ RPC returned {len(matches.data) if matches.data else 0} matches")
+            print(f"✅ RPC returned {len(matches)} matches")
             
-            if matches.data and len(matches.data) > 0:
-                for idx, match in enumerate(matches.data[:3]):
+            if matches:
+                for idx, match in enumerate(matches[:3]):
                     print(f"  Match {idx+1}: {match.get('title')} - similarity: {match.get('similarity', 'N/A'):.4f}")
-                return {"results": matches.data, "message": f"Found {len(matches.data)} results"}
+                return {"results": matches, "message": f"Found {len(matches)} results"}
             else:
                 print("❌ No matches found with similarity >= 0.6")
                 return {"results": [], "message": "No similar items found"}
@@ -1687,6 +1848,8 @@ async def search_by_image(image_file: UploadFile = File(...), user_id: str = Dep
             
             return {"results": [], "message": f"Search failed: {str(rpc_error)}"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Image search failed: {str(e)}")
@@ -1700,15 +1863,12 @@ async def find_matches(item_id: int, user_id: str = Depends(get_current_user_id)
     """
     try:
         # Security check: Verify the item belongs to the user and is 'Lost'
-        item_res = supabase.table("items").select("university_id, user_id, status") \
-            .eq("id", item_id) \
-            .eq("user_id", user_id) \
-            .single().execute()
+        item = await repos.items.get(item_id, "university_id, user_id, status")
         
-        if not item_res.data:
+        if not item or item["user_id"] != user_id:
             raise HTTPException(status_code=404, detail="Item not found or you are not the owner.")
         
-        if item_res.data['status'] != 'Lost':
+        if item['status'] != 'Lost':
             print(f"Match check skipped: Item {item_id} is not a 'Lost' item.")
             return []
 
@@ -1719,17 +1879,13 @@ async def find_matches(item_id: int, user_id: str = Depends(get_current_user_id)
         MATCH_COUNT = 4  # Number of matches to return
 
         print(f"🔍 Finding matches for Lost Item ID: {item_id}...")
-        matches_res = supabase.rpc("find_matches_for_lost_item", {
-            "p_item_id": item_id,
-            "p_text_weight": TEXT_WEIGHT,
-            "p_image_weight": IMAGE_WEIGHT,
-            "p_match_threshold": MATCH_THRESHOLD,
-            "p_match_count": MATCH_COUNT
-        }).execute()
-
-        if matches_res.data:
-            print(f"✅ Found {len(matches_res.data)} matches for item {item_id}.")
-            return matches_res.data
+        matches = await repos.items.find_matches_for_lost_item(
+            item_id, TEXT_WEIGHT, IMAGE_WEIGHT, MATCH_THRESHOLD, MATCH_COUNT
+        )
+
+        if matches:
+            print(f"✅ Found {len(matches)} matches for item {item_id}.")
+            return matches
         else:
             print(f"❌ No matches found for item {item_id} above threshold {MATCH_THRESHOLD}.")
             return []
@@ -1748,31 +1904,29 @@ async def mark_as_recovered(item_id: int, user_id: str = Depends(get_current_use
     """
     try:
         # Get item details
-        item_res = supabase.table("items").select("user_id, title, university_id").eq("id", item_id).single().execute()
-        if not item_res.data:
+        item = await repos.items.get(item_id, "user_id, title, university_id")
+        if not item:
             raise HTTPException(status_code=404, detail="Item not found.")
         
-        finder_id = item_res.data['user_id']
-        university_id = item_res.data['university_id']
+        finder_id = item['user_id']
+        university_id = item['university_id']
         
         # Find the approved claimant (if any)
-        claim_res = supabase.table("claims").select("claimant_id").eq("item_id", item_id).eq("status", "approved").execute()
+        approved_claims = await repos.claims.list_for_item(item_id, status="approved")
         
-        approved_claimant_id = claim_res.data[0]['claimant_id'] if claim_res.data else None
+        approved_claimant_id = approved_claims[0]['claimant_id'] if approved_claims else None
 
         # Security check: Only poster or approved claimant can mark as recovered
         if user_id not in [finder_id, approved_claimant_id]:
             raise HTTPException(status_code=403, detail="You are not authorized to perform this action.")
             
         # Update the item status to recovered
-        supabase.table("items").update({"moderation_status": "recovered"}).eq("id", item_id).execute()
+        await repos.items.update(item_id, {"moderation_status": "recovered"})
+        invalidate_tags("leaderboard")
 
         # Notify both parties
-        message = f"The item '{item_res.data['title']}' has been marked as recovered. This case is now closed."
-        if finder_id:
-            create_notification(recipient_id=finder_id, university_id=university_id, message=message, link_to="/dashboard/my-posts", type='moderation')
-        if approved_claimant_id and approved_claimant_id != finder_id:
-            create_notification(recipient_id=approved_claimant_id, university_id=university_id, message=message, link_to="/dashboard/my-posts", type='moderation')
+        message = f"The item '{item['title']}' has been marked as recovered. This case is now closed."
+        await create_notifications_bulk([finder_id, approved_claimant_id], university_id, message, link_to="/dashboard/my-posts", type='moderation')
             
         return {"message": "Item marked as recovered."}
     except Exception as e:
@@ -1788,46 +1942,37 @@ async def get_or_create_conversation(item_id: int = Form(...), user_id: str = De
     """
     try:
         # Get the item details
-        item_res = supabase.table("items").select("user_id, status").eq("id", item_id).single().execute()
-        if not item_res.data:
+        item = await repos.items.get(item_id, "user_id, status")
+        if not item:
             raise HTTPException(status_code=404, detail="Item not found.")
         
-        poster_id = item_res.data['user_id']
+        poster_id = item['user_id']
         message_sender_id = user_id
 
         # Prevent self-messaging
         if poster_id == message_sender_id:
             raise HTTPException(status_code=400, detail="You cannot start a conversation on your own item.")
 
-        item_status = item_res.data['status']
+        item_status = item['status']
         
         # Determine conversation participants based on item status
         finder_id = poster_id if item_status == 'Found' else message_sender_id
         claimant_id = message_sender_id if item_status == 'Found' else poster_id
         
         # Check if a conversation already exists
-        existing_convo_res = supabase.table("conversations") \
-            .select("id") \
-            .eq("item_id", item_id) \
-            .eq("finder_id", finder_id) \
-            .eq("claimant_id", claimant_id) \
-            .execute()
+        existing_convo = await repos.conversations.find(item_id, finder_id, claimant_id)
 
         # Return existing conversation ID if found
-        if existing_convo_res.data:
-            return {"conversation_id": existing_convo_res.data[0]['id']}
+        if existing_convo:
+            return {"conversation_id": existing_convo['id']}
 
         # Create a new conversation
-        new_convo_res = supabase.table("conversations").insert({
-            "item_id": item_id,
-            "finder_id": finder_id,
-            "claimant_id": claimant_id
-        }).execute()
+        new_convo = await repos.conversations.create(item_id, finder_id, claimant_id)
 
-        if not new_convo_res.data:
+        if not new_convo:
             raise Exception("Failed to create conversation and get ID back.")
 
-        return {"conversation_id": new_convo_res.data[0]['id']}
+        return {"conversation_id": new_convo['id']}
 
     except HTTPException as http_exc:
         raise http_exc
@@ -1843,33 +1988,18 @@ async def delete_conversation(conversation_id: int, user_id: str = Depends(get_c
     """
     try:
         # Verify user is a participant
-        convo_res = supabase.table("conversations")\
-            .select("id, finder_id, claimant_id")\
-            .eq("id", conversation_id)\
-            .single()\
-            .execute()
+        conversation = await repos.conversations.get(conversation_id)
 
-        if not convo_res.data:
+        if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found.")
 
-        conversation = convo_res.data
-
         # Check authorization
         if user_id not in [conversation.get("finder_id"), conversation.get("claimant_id")]:
             raise HTTPException(status_code=403, detail="Not authorized to delete this conversation.")
 
-        # Delete all messages in the conversation first
-        messages_delete_res = supabase.table("messages")\
-            .delete()\
-            .eq("conversation_id", conversation_id)\
-            .execute()
-        print(f"Deleted messages associated with conversation {conversation_id}")
-
-        # Delete the conversation
-        convo_delete_res = supabase.table("conversations")\
-            .delete()\
-            .eq("id", conversation_id)\
-            .execute()
+        # Delete the conversation along with all of its messages
+        await repos.conversations.delete(conversation_id)
+        print(f"Deleted conversation {conversation_id} and its messages")
 
         return {"message": "Conversation deleted successfully."}
 
@@ -1888,15 +2018,15 @@ async def submit_claim(payload: ClaimCreate, claimant_id: str = Depends(get_curr
     """
     try:
         # Get item details and verify it's a 'Found' item
-        item_res = supabase.table("items").select("user_id, title, status, university_id").eq("id", payload.item_id).single().execute()
-        if not item_res.data:
+        item = await repos.items.get(payload.item_id, "user_id, title, status, university_id")
+        if not item:
             raise HTTPException(status_code=404, detail="Item not found.")
-        if item_res.data['status'] != 'Found':
+        if item['status'] != 'Found':
             raise HTTPException(status_code=400, detail="You can only claim 'Found' items.")
         
-        finder_id = item_res.data['user_id']
-        item_title = item_res.data['title']
-        item_university_id = item_res.data['university_id']
+        finder_id = item['user_id']
+        item_title = item['title']
+        item_university_id = item['university_id']
         
         # Prevent claiming own items
         if finder_id == claimant_id:
@@ -1910,15 +2040,15 @@ async def submit_claim(payload: ClaimCreate, claimant_id: str = Depends(get_curr
             "verification_message": payload.verification_message,
             "status": "pending"
         }
-        supabase.table("claims").insert(claim_data).execute()
+        await repos.claims.create(claim_data)
         
         # Get claimant's name for notification
-        claimant_profile_res = supabase.table("profiles").select("full_name").eq("id", claimant_id).single().execute()
-        claimant_name = claimant_profile_res.data.get('full_name', 'A user') if claimant_profile_res.data else 'A user'
+        claimant_profile = await repos.profiles.get(claimant_id, "full_name")
+        claimant_name = claimant_profile.get('full_name', 'A user') if claimant_profile else 'A user'
 
         # Notify the finder
         message = f"{claimant_name} has submitted a claim on your found item: '{item_title}'."
-        create_notification(recipient_id=finder_id, university_id=item_university_id, message=message, link_to="/dashboard/my-posts", type='claim')
+        await create_notification(recipient_id=finder_id, university_id=item_university_id, message=message, link_to="/dashboard/my-posts", type='claim')
         
         return {"message": "Claim submitted successfully. The finder has been notified."}
     except Exception as e:
@@ -1933,14 +2063,12 @@ async def get_claims_for_item(item_id: int, user_id: str = Depends(get_current_u
     """
     try:
         # Verify ownership
-        item_res = supabase.table("items").select("user_id").eq("id", item_id).eq("user_id", user_id).single().execute()
-        if not item_res.data:
+        item = await repos.items.get(item_id, "user_id")
+        if not item or item['user_id'] != user_id:
             raise HTTPException(status_code=403, detail="You are not the owner of this item.")
             
         # Get all pending claims with claimant details
-        claims_res = supabase.table("claims").select("*, claimant:profiles!claimant_id(full_name, email)").eq("item_id", item_id).eq("status", "pending").execute()
-        
-        return claims_res.data
+        return await repos.claims.list_for_item(item_id, status="pending", with_claimant=True)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -1953,11 +2081,10 @@ async def respond_to_claim(claim_id: int, payload: ClaimRespond, finder_id: str
     """
     try:
         # Get claim details and verify authorization
-        claim_res = supabase.table("claims").select("*, item:items(id, title, user_id, university_id)").eq("id", claim_id).single().execute()
-        if not claim_res.data or claim_res.data['finder_id'] != finder_id:
+        claim = await repos.claims.get_with_item(claim_id)
+        if not claim or claim['finder_id'] != finder_id:
             raise HTTPException(status_code=403, detail="You are not authorized to respond to this claim.")
         
-        claim = claim_res.data
         item_id = claim['item']['id']
         item_title = claim['item']['title']
         claimant_id = claim['claimant_id']
@@ -1966,58 +2093,43 @@ async def respond_to_claim(claim_id: int, payload: ClaimRespond, finder_id: str
         new_status = 'approved' if payload.approved else 'rejected'
         
         # Update claim status
-        supabase.table("claims").update({"status": new_status}).eq("id", claim_id).execute()
+        await repos.claims.set_status(claim_id, new_status)
         
         if payload.approved:
             # Change item status to pending return
-            supabase.table("items").update({"moderation_status": "pending_return"}).eq("id", claim['item_id']).execute()
+            await repos.items.update(claim['item_id'], {"moderation_status": "pending_return"})
             
             # Check if conversation already exists, otherwise create one
-            existing_convo_res = supabase.table("conversations") \
-                .select("id") \
-                .eq("item_id", item_id) \
-                .eq("finder_id", finder_id) \
-                .eq("claimant_id", claimant_id) \
-                .execute()
+            existing_convo = await repos.conversations.find(item_id, finder_id, claimant_id)
 
             conversation_id = None
-            if existing_convo_res.data:
+            if existing_convo:
                 # Use existing conversation
-                conversation_id = existing_convo_res.data[0]['id']
+                conversation_id = existing_convo['id']
                 print(f"Claim approval: Found existing conversation {conversation_id}")
             else:
                 # Create new conversation
                 print(f"Claim approval: No conversation found, creating new one...")
-                new_convo_res = supabase.table("conversations").insert({
-                    "item_id": item_id,
-                    "finder_id": finder_id,
-                    "claimant_id": claimant_id
-                }).execute()
+                new_convo = await repos.conversations.create(item_id, finder_id, claimant_id)
                 
-                if not new_convo_res.data:
+                if not new_convo:
                      raise Exception("Failed to create conversation after claim approval.")
-                conversation_id = new_convo_res.data[0]['id']
-
-            # Get email addresses for notifications
-            finder_profile_res = supabase.table("profiles").select("email").eq("id", finder_id).single().execute()
-            claimant_profile_res = supabase.table("profiles").select("email").eq("id", claimant_id).single().execute()
-            finder_email = finder_profile_res.data.get('email', 'N/A')
-            claimant_email = claimant_profile_res.data.get('email', 'N/A')
+                conversation_id = new_convo['id']
 
             finder_message = f"You approved the claim for '{item_title}'. You can now chat with the claimant to arrange the return."
             claimant_message = f"Great news! Your claim for '{item_title}' has been approved. You can now chat with the finder to arrange the return."
             
             chat_link = f"/dashboard/messages/{conversation_id}"
-            create_notification(recipient_id=finder_id, university_id=item_university_id, message=finder_message, link_to=chat_link, type='claim_response')
-            create_notification(recipient_id=claimant_id, university_id=item_university_id, message=claimant_message, link_to=chat_link, type='claim_response')
+            await create_notification(recipient_id=finder_id, university_id=item_university_id, message=finder_message, link_to=chat_link, type='claim_response')
+            await create_notification(recipient_id=claimant_id, university_id=item_university_id, message=claimant_message, link_to=chat_link, type='claim_response')
 
             # Auto-reject other pending claims for this item
-            supabase.table("claims").update({"status": "rejected"}).eq("item_id", claim['item_id']).eq("status", "pending").execute()
+            await repos.claims.reject_pending(claim['item_id'])
 
         else:
             # Notify claimant of rejection
             message = f"Unfortunately, your claim for '{item_title}' was not approved by the finder."
-            create_notification(recipient_id=claimant_id, university_id=item_university_id, message=message, type='claim_response')
+            await create_notification(recipient_id=claimant_id, university_id=item_university_id, message=message, type='claim_response')
             
         return {"message": f"Claim has been {new_status}."}
     except Exception as e:
@@ -2033,29 +2145,29 @@ async def get_manual_verifications(admin_id: str = Depends(get_current_user_id))
     """
     try:
         # Get admin's university
-        profile_res = supabase.table("profiles").select("university_id").eq("id", admin_id).single().execute()
-        if not profile_res.data:
+        profile = await repos.profiles.get(admin_id, "university_id")
+        if not profile:
             raise HTTPException(status_code=404, detail="Admin profile not found.")
-        university_id = profile_res.data['university_id']
+        university_id = profile['university_id']
 
         # Get all pending verifications for this university
-        verifications_res = supabase.table("user_verifications").select("*").eq("university_id", university_id).eq("status", "pending").execute()
+        verifications = await repos.verifications.list_pending(university_id)
 
-        if not verifications_res.data:
+        if not verifications:
             return []
 
         # Get user profiles for these verifications
-        user_ids = [req['user_id'] for req in verifications_res.data]
+        user_ids = [req['user_id'] for req in verifications]
 
-        profiles_res = supabase.table("profiles").select("id, full_name, email").in_("id", user_ids).execute()
-        if not profiles_res.data:
-            return verifications_res.data
+        profiles = await repos.profiles.get_many(user_ids, "id, full_name, email")
+        if not profiles:
+            return verifications
 
         # Combine verification data with user profiles
-        profiles_map = {profile['id']: profile for profile in profiles_res.data}
+        profiles_map = {profile['id']: profile for profile in profiles}
 
         combined_data = []
-        for req in verifications_res.data:
+        for req in verifications:
             req['user'] = profiles_map.get(req['user_id'])
             combined_data.append(req)
 
@@ -2077,43 +2189,43 @@ async def respond_to_verification(
     """
     try:
         # Verify admin authorization
-        admin_profile_res = supabase.table("profiles").select("university_id, role").eq("id", admin_id).single().execute()
-        if not admin_profile_res.data or admin_profile_res.data.get('role') != 'admin':
+        admin_profile = await repos.profiles.get(admin_id, "university_id, role")
+        if not admin_profile or admin_profile.get('role') != 'admin':
              raise HTTPException(status_code=403, detail="User is not an authorized administrator.")
-        admin_university_id = admin_profile_res.data['university_id']
+        admin_university_id = admin_profile['university_id']
 
         # Get the verification request
-        verification_res = supabase.table("user_verifications").select("university_id, user_id").eq("id", verification_id).single().execute()
-        if not verification_res.data:
+        verification = await repos.verifications.get(verification_id)
+        if not verification:
             raise HTTPException(status_code=404, detail="Verification request not found.")
         
         # Check if admin has authority for this university
-        if verification_res.data['university_id'] != admin_university_id:
+        if verification['university_id'] != admin_university_id:
              raise HTTPException(status_code=403, detail="Admin not authorized for this university's request.")
 
-        user_id_to_verify = verification_res.data['user_id']
+        user_id_to_verify = verification['user_id']
         if action.user_id != user_id_to_verify:
              raise HTTPException(status_code=400, detail="User ID mismatch between request body and verification record.")
 
         # Use the university ID from the verification request
-        university_id_for_user = verification_res.data['university_id']
+        university_id_for_user = verification['university_id']
 
         if action.approve:
             # Approve: Update user profile
-            update_res = supabase.table("profiles").update({
+            await repos.profiles.update(user_id_to_verify, {
                 "university_id": university_id_for_user,
                 "is_verified": True
-            }).eq("id", user_id_to_verify).execute()
+            })
 
             # Update verification status
-            supabase.table("user_verifications").update({"status": "approved"}).eq("id", verification_id).execute()
+            await repos.verifications.set_status(verification_id, "approved")
 
             # Get user details for email
-            user_profile_res = supabase.table("profiles").select("email, full_name").eq("id", user_id_to_verify).single().execute()
+            user_profile = await repos.profiles.get(user_id_to_verify, "email, full_name")
             user_email, user_name = None, "there"
-            if user_profile_res.data:
-                user_email = user_profile_res.data.get('email')
-                user_name = user_profile_res.data.get('full_name', user_name)
+            if user_profile:
+                user_email = user_profile.get('email')
+                user_name = user_profile.get('full_name', user_name)
 
             # Send approval email if configured
             if user_email and settings.RESEND_API_KEY:
@@ -2137,13 +2249,13 @@ async def respond_to_verification(
                         "html": email_html,
                     }
 
-                    email_response = resend.Emails.send(params_to_send)
+                    email_response = await resend_provider.call(run_in_threadpool, resend.Emails.send, params_to_send)
                     print(f"Approval email sent to {user_email}, ID: {email_response['id']}")
                 except Exception as email_error:
                     print(f"Failed to send approval email to {user_email}: {email_error}")
 
             # Send in-app notification
-            create_notification(
+            await create_notification(
                 recipient_id=user_id_to_verify,
                 university_id=university_id_for_user,
                 message="Congratulations! Your account has been manually verified. You can now log in.",
@@ -2154,9 +2266,9 @@ async def respond_to_verification(
         
         else:
             # Reject the verification request
-            supabase.table("user_verifications").update({"status": "rejected"}).eq("id", verification_id).execute()
+            await repos.verifications.set_status(verification_id, "rejected")
 
-            create_notification(
+            await create_notification(
                 recipient_id=user_id_to_verify,
                 university_id=university_id_for_user,
                 message="Your manual verification request was not approved. Please ensure your ID image is clear and valid.",
@@ -2176,22 +2288,22 @@ async def set_item_status(item_id: int, data: StatusUpdate, admin_id: str = Depe
     """
     try:
         # Get item details
-        item_res = supabase.table("items").select("user_id, title, university_id").eq("id", item_id).single().execute()
-        if not item_res.data:
+        item = await repos.items.get(item_id, "user_id, title, university_id")
+        if not item:
             raise HTTPException(status_code=404, detail="Item not found.")
         
-        item_owner_id = item_res.data['user_id']
-        item_title = item_res.data['title']
-        university_id = item_res.data['university_id']
+        item_owner_id = item['user_id']
+        item_title = item['title']
+        university_id = item['university_id']
         
         # Update item status
-        resp = supabase.table("items").update({"moderation_status": data.moderation_status}).eq("id", item_id).execute()
+        updated = await repos.items.update(item_id, {"moderation_status": data.moderation_status})
         
         # Notify item owner
         message = f"An admin has updated your post '{item_title}' to a status of: {data.moderation_status}."
-        create_notification(recipient_id=item_owner_id, university_id=university_id, message=message, link_to="/dashboard/my-posts", type='moderation')
+        await create_notification(recipient_id=item_owner_id, university_id=university_id, message=message, link_to="/dashboard/my-posts", type='moderation')
         
-        return {"updated": resp.data}
+        return {"updated": updated}
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -2200,8 +2312,8 @@ async def set_item_status(item_id: int, data: StatusUpdate, admin_id: str = Depe
 async def set_user_ban(user_id: str, data: BanUpdate, admin_id: str = Depends(get_current_user_id)):
     """Ban or unban a user (admin only)."""
     try:
-        resp = supabase.table("profiles").update({"is_banned": data.is_banned}).eq("id", user_id).execute()
-        return {"updated": resp.data}
+        updated = await repos.profiles.update(user_id, {"is_banned": data.is_banned})
+        return {"updated": updated}
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -2210,8 +2322,8 @@ async def set_user_ban(user_id: str, data: BanUpdate, admin_id: str = Depends(ge
 async def set_user_role(user_id: str, data: RoleUpdate, admin_id: str = Depends(get_current_user_id)):
     """Change a user's role (admin only)."""
     try:
-        resp = supabase.table("profiles").update({"role": data.role}).eq("id", user_id).execute()
-        return {"updated": resp.data}
+        updated = await repos.profiles.update(user_id, {"role": data.role})
+        return {"updated": updated}
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -2230,46 +2342,45 @@ async def update_profile(full_name: Optional[str] = Form(None), avatar: Optional
         if avatar is not None:
             file_suffix = Path(avatar.filename or "other_images").suffix
             filename = f"{current_user_id}/{uuid4().hex}{file_suffix}"
-            file_bytes = await avatar.read()
-            
+            file_bytes = await read_upload_capped(avatar, settings.MAX_UPLOAD_SIZE)
             # Resize avatar if too large
             max_avatar_size = int(os.getenv('MAX_AVATAR_SIZE', '2097152'))
             if len(file_bytes) > max_avatar_size:
-                file_bytes = process_image_efficiently(file_bytes, max_size=(400, 400))
+                file_bytes = await image_pool.run("avatar", process_image_efficiently, file_bytes, (400, 400))
             
             # Upload with upsert to replace old avatar
-            supabase.storage.from_("other_images").upload(
-                path=filename,
-                file=file_bytes,
-                file_options={"content-type": "image/jpeg", "upsert": "true"}
-            )
-            public_url = supabase.storage.from_("other_images").get_public_url(filename)
+            public_url = await storage.upload("other_images", filename, file_bytes, content_type="image/jpeg", upsert=True)
             updates["avatar_url"] = f"{public_url}?t={uuid4().hex}"
 
         if not updates:
             raise HTTPException(status_code=400, detail="No update information provided.")
         
         # Apply updates
-        supabase.table("profiles").update(updates).eq("id", current_user_id).execute()
-        profile_result = supabase.table("profiles").select("id, full_name, email, avatar_url, role, is_banned").eq("id", current_user_id).single().execute()
-        return {"profile": profile_result.data}
+        await repos.profiles.update(current_user_id, updates)
+        invalidate_tags("leaderboard")
+        profile = await repos.profiles.get(current_user_id, "id, full_name, email, avatar_url, role, is_banned")
+        return {"profile": profile}
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 @profile_router.get("/preferences")
+@cached_response(ttl=600, scope="user", tags=["preferences:user:{current_user_id}"])
 async def get_user_preferences(current_user_id: str = Depends(get_current_user_id)):
     """
     Get user notification preferences.
     Returns default values if no preferences are set.
     """
     try:
-        profile_result = supabase.table("profiles").select(
+        profile = await repos.profiles.get(
+            current_user_id,
             "match_notifications, claim_notifications, message_notifications, "
             "moderation_notifications, email_notifications_enabled"
-        ).eq("id", current_user_id).single().execute()
+        )
         
-        if not profile_result.data:
+        if not profile:
             return {
                 "preferences": {
                     "match_notifications": True,
@@ -2279,10 +2390,11 @@ async def get_user_preferences(current_user_id: str = Depends(get_current_user_i
                     "email_notifications_enabled": True
                 }
             }
-        return {"preferences": profile_result.data}
+        return {"preferences": profile}
     except Exception as e:
         traceback.print_exc()
-        return {
+        # Defaults as a Response so a transient error is not cached for the next 10 minutes
+        return JSONResponse({
             "preferences": {
                 "match_notifications": True,
                 "claim_notifications": True,
@@ -2290,7 +2402,7 @@ async def get_user_preferences(current_user_id: str = Depends(get_current_user_i
                 "moderation_notifications": True,
                 "email_notifications_enabled": True
             }
-        }
+        })
 
 @profile_router.put("/preferences")
 async def update_user_preferences(preferences: UserPreferences, current_user_id: str = Depends(get_current_user_id)):
@@ -2307,7 +2419,8 @@ async def update_user_preferences(preferences: UserPreferences, current_user_id:
             "email_notifications_enabled": preferences.email_notifications_enabled
         }
         
-        supabase.table("profiles").update(updates).eq("id", current_user_id).execute()
+        await repos.profiles.update(current_user_id, updates)
+        invalidate_tags(f"preferences:user:{current_user_id}")
         
         return {"message": "Preferences updated successfully", "preferences": updates}
     except Exception as e:
@@ -2322,58 +2435,8 @@ async def create_backup(university_id: int = Depends(get_admin_university_id)):
     Only includes data associated with their university_id.
     """
     try:
-        backup_data = {}
-        
-        # Tables that have direct university_id foreign key
-        tenant_tables = ["profiles", "items", "allowed_domains", "site_settings", "user_verifications", "notifications"]
-        
-        # Fetch data from all tenant tables
-        for table in tenant_tables:
-            try:
-                result = supabase.table(table).select("*").eq("university_id", university_id).execute()
-                backup_data[table] = result.data if result.data else []
-            except Exception as e:
-                print(f"Error fetching {table}: {e}")
-                backup_data[table] = []
-        
-        # Get all item_ids from this university's items
-        item_ids = [item["id"] for item in backup_data.get("items", []) if "id" in item]
-        
-        # Fetch related claims
-        if item_ids:
-            try:
-                claims_result = supabase.table("claims").select("*").in_("item_id", item_ids).execute()
-                backup_data["claims"] = claims_result.data if claims_result.data else []
-            except Exception as e:
-                print(f"Error fetching claims: {e}")
-                backup_data["claims"] = []
-        else:
-            backup_data["claims"] = []
-        
-        # Fetch related conversations
-        if item_ids:
-            try:
-                conversations_result = supabase.table("conversations").select("*").in_("item_id", item_ids).execute()
-                backup_data["conversations"] = conversations_result.data if conversations_result.data else []
-            except Exception as e:
-                print(f"Error fetching conversations: {e}")
-                backup_data["conversations"] = []
-        else:
-            backup_data["conversations"] = []
-        
-        # Get all conversation_ids from the fetched conversations
-        convo_ids = [convo["id"] for convo in backup_data.get("conversations", []) if "id" in convo]
-        
-        # Fetch related messages
-        if convo_ids:
-            try:
-                messages_result = supabase.table("messages").select("*").in_("conversation_id", convo_ids).execute()
-                backup_data["messages"] = messages_result.data if messages_result.data else []
-            except Exception as e:
-                print(f"Error fetching messages: {e}")
-                backup_data["messages"] = []
-        else:
-            backup_data["messages"] = []
+        # Every row belonging to this university: tenant tables plus related claims, conversations and messages
+        backup_data = await repos.backups.export_university(university_id)
         
         # Serialize to JSON
         json_data = json.dumps(backup_data, indent=2, default=str)
@@ -2387,11 +2450,7 @@ async def create_backup(university_id: int = Depends(get_admin_university_id)):
         
         # Upload to Supabase storage
         try:
-            supabase.storage.from_("backups").upload(
-                path=storage_path,
-                file=file_io.getvalue(),
-                file_options={"content-type": "application/json"}
-            )
+            await storage.upload("backups", storage_path, file_io.getvalue(), content_type="application/json")
         except Exception as e:
             print(f"Error uploading to storage: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to upload backup: {str(e)}")
@@ -2418,7 +2477,7 @@ async def list_backups(university_id: int = Depends(get_admin_university_id)):
         folder_path = f"university_{university_id}"
         
         try:
-            result = supabase.storage.from_("backups").list(folder_path)
+            result = await storage.list("backups", folder_path)
         except Exception as e:
             print(f"Error listing backups: {e}")
             # If folder doesn't exist yet, return empty list
@@ -2449,7 +2508,7 @@ async def download_backup(file_name: str, university_id: int = Depends(get_admin
         # Security check: List files and verify the requested file exists
         try:
             folder_path = f"university_{university_id}"
-            file_list = supabase.storage.from_("backups").list(folder_path)
+            file_list = await storage.list("backups", folder_path)
             
             # Check if file exists in the list
             file_exists = any(f.get("name") == file_name for f in file_list)
@@ -2464,7 +2523,7 @@ async def download_backup(file_name: str, university_id: int = Depends(get_admin
         
         # Download the file
         try:
-            file_bytes = supabase.storage.from_("backups").download(storage_path)
+            file_bytes = await storage.download("backups", storage_path)
         except Exception as e:
             print(f"Error downloading file: {e}")
             raise HTTPException(status_code=500, detail="Failed to download backup file")
@@ -2494,89 +2553,61 @@ async def get_dashboard_summary(user_id: str = Depends(get_current_user_id)):
     try:
         # Get user's university with error handling
         try:
-            profile_res = supabase.table("profiles").select("university_id, full_name").eq("id", user_id).single().execute()
-            if not profile_res.data:
+            profile = await repos.profiles.get(user_id, "university_id, full_name")
+            if not profile:
                 raise HTTPException(status_code=404, detail="User profile not found.")
             
-            university_id = profile_res.data.get('university_id')
+            university_id = profile.get('university_id')
         except Exception as profile_error:
             print(f"Dashboard profile error: {str(profile_error)}")
             raise HTTPException(status_code=500, detail="Failed to fetch user profile")
         
         # 1. Get user's recent posts (5 most recent for display)
-        my_posts_res = supabase.table("items").select("*").eq("user_id", user_id).order(
-            "created_at", desc=True
-        ).limit(5).execute()
+        my_posts = await repos.items.list_by_user(user_id, "*", limit=5)
         
         # 1b. Get ALL user posts for chart data
-        all_my_posts_res = supabase.table("items").select("category, status, created_at").eq(
-            "user_id", user_id
-        ).execute()
+        all_my_posts = await repos.items.list_by_user(user_id, "category, status, created_at")
         
         # 2. Get recent campus activity (5 most recent approved items from others)
-        recent_activity_res = supabase.table("items").select(
-            "*, profiles(id, full_name, email)"
-        ).eq("university_id", university_id).eq("moderation_status", "approved").neq(
-            "user_id", user_id
-        ).order("created_at", desc=True).limit(5).execute()
+        recent_activity, _ = await repos.items.list_approved(university_id, exclude_user_id=user_id, limit=5)
         
         # 3. Get user's item counts
-        found_count_res = supabase.table("items").select("id", count="exact").eq(
-            "user_id", user_id
-        ).eq("status", "Found").execute()
-        
-        lost_count_res = supabase.table("items").select("id", count="exact").eq(
-            "user_id", user_id
-        ).eq("status", "Lost").execute()
-        
-        pending_count_res = supabase.table("items").select("id", count="exact").eq(
-            "user_id", user_id
-        ).eq("moderation_status", "pending").execute()
+        found_count = await repos.items.count_by_user(user_id, status="Found")
+        lost_count = await repos.items.count_by_user(user_id, status="Lost")
+        pending_count = await repos.items.count_by_user(user_id, moderation_status="pending")
+        recovered_count = await repos.items.count_by_user(user_id, moderation_status="recovered")
         
-        recovered_count_res = supabase.table("items").select("id", count="exact").eq(
-            "user_id", user_id
-        ).eq("moderation_status", "recovered").execute()
-        
-        # 4. Get unread notifications count
-        unread_notif_res = supabase.table("notifications").select("id", count="exact").eq(
-            "recipient_id", user_id
-        ).eq("status", "unread").execute()
+        # 4. Get unread notifications count (incrementally maintained, no table scan)
+        unread_notifications = await unread_counter.get(user_id)
         
         # 5. Get AI matches for user's lost items (top 3 matches)
-        user_lost_items = supabase.table("items").select("id, title").eq(
-            "user_id", user_id
-        ).eq("status", "Lost").eq("moderation_status", "approved").order(
-            "created_at", desc=True
-        ).limit(1).execute()
+        user_lost_items = await repos.items.list_by_user(
+            user_id, "id, title", status="Lost", moderation_status="approved", limit=1
+        )
         
         ai_matches = []
-        if user_lost_items.data and len(user_lost_items.data) > 0:
+        if user_lost_items:
             # Get matches for the most recent lost item
-            lost_item_id = user_lost_items.data[0]["id"]
+            lost_item_id = user_lost_items[0]["id"]
             try:
-                matches_res = supabase.rpc('find_matches_for_lost_item', {
-                    'p_item_id': lost_item_id,
-                    'p_match_count': 3,
-                    'p_text_weight': 0.4,
-                    'p_image_weight': 0.6,
-                    'p_match_threshold': 0.7
-                }).execute()
-                ai_matches = matches_res.data or []
+                ai_matches = await repos.items.find_matches_for_lost_item(
+                    lost_item_id, text_weight=0.4, image_weight=0.6, threshold=0.7, count=3
+                )
             except Exception as match_err:
                 print(f"Error fetching AI matches: {match_err}")
                 ai_matches = []
         
         return {
-            "myRecentPosts": my_posts_res.data or [],
-            "allMyPosts": all_my_posts_res.data or [],
-            "recentActivity": recent_activity_res.data or [],
+            "myRecentPosts": my_posts,
+            "allMyPosts": all_my_posts,
+            "recentActivity": recent_activity,
             "userStats": {
-                "found": found_count_res.count or 0,
-                "lost": lost_count_res.count or 0,
-                "pending": pending_count_res.count or 0,
-                "recovered": recovered_count_res.count or 0
+                "found": found_count,
+                "lost": lost_count,
+                "pending": pending_count,
+                "recovered": recovered_count
             },
-            "unreadNotifications": unread_notif_res.count or 0,
+            "unreadNotifications": unread_notifications,
             "aiMatches": ai_matches
         }
     except HTTPException:
@@ -2599,49 +2630,172 @@ async def get_dashboard_summary(user_id: str = Depends(get_current_user_id)):
             "aiMatches": []
         }
 
+# ============= Notification Routes =============
+def encode_notification_cursor(notification: dict) -> str:
+    """Encode the (created_at, id) keyset position of a notification as an opaque cursor."""
+    raw = json.dumps({"created_at": notification["created_at"], "id": notification["id"]})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_notification_cursor(cursor: str) -> dict:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        # Parsed rather than passed through, since the timestamp ends up in a PostgREST filter
+        created_at = datetime.fromisoformat(position["created_at"])
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return {"created_at": created_at, "id": int(position["id"])}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+@notification_router.get("")
+async def list_notifications(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Get the user's notifications, newest first.
+    Keyset-paginated on (created_at, id): pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        limit = max(1, min(limit, 100))
+        before = decode_notification_cursor(cursor) if cursor else None
+
+        # Fetch one extra row to know whether another page exists
+        rows = await repos.notifications.list_page(user_id, limit + 1, status=status, before=before)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            "notifications": rows,
+            "next_cursor": encode_notification_cursor(rows[-1]) if has_more else None,
+            "has_more": has_more
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to fetch notifications: {str(e)}")
+
+@notification_router.get("/unread-count")
+async def get_unread_notification_count(user_id: str = Depends(get_current_user_id)):
+    """Get the user's unread notification count."""
+    try:
+        return {"unread_count": await unread_counter.get(user_id)}
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to fetch unread count: {str(e)}")
+
+@notification_router.post("/mark-read")
+async def mark_notifications_read(selection: NotificationSelection, user_id: str = Depends(get_current_user_id)):
+    """
+    Mark notifications as read in one statement.
+    Pass `ids` for specific notifications or `all: true` for every unread notification.
+    """
+    if not selection.all and not selection.ids:
+        raise HTTPException(status_code=400, detail="Provide notification ids or set all to true.")
+    try:
+        updated = len(await repos.notifications.mark_read(user_id, None if selection.all else selection.ids))
+
+        if selection.all:
+            unread_counter.reset(user_id, 0)
+        else:
+            unread_counter.adjust([user_id], -updated)
+        publish_unread_delta(user_id, -updated)
+
+        return {"updated": updated}
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to mark notifications as read: {str(e)}")
+
+@notification_router.post("/delete")
+async def delete_notifications(selection: NotificationSelection, user_id: str = Depends(get_current_user_id)):
+    """
+    Delete notifications in one statement.
+    Pass `ids` for specific notifications or `all: true` to clear every notification.
+    """
+    if not selection.all and not selection.ids:
+        raise HTTPException(status_code=400, detail="Provide notification ids or set all to true.")
+    try:
+        deleted = await repos.notifications.delete(user_id, None if selection.all else selection.ids)
+
+        unread_deleted = sum(1 for n in deleted if n.get("status") == "unread")
+        if selection.all:
+            unread_counter.reset(user_id, 0)
+        else:
+            unread_counter.adjust([user_id], -unread_deleted)
+        publish_unread_delta(user_id, -unread_deleted)
+
+        return {"deleted": len(deleted)}
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to delete notifications: {str(e)}")
+
+@notification_router.get("/stream")
+async def stream_notifications(request: Request, user_id: str = Depends(get_stream_user_id)):
+    """
+    Server-Sent Events stream of the user's notifications.
+    Sends the current unread count on connect, then `notification` events for new
+    notifications and `unread_count` deltas, with a heartbeat comment to keep proxies open.
+    """
+    try:
+        subscription = notification_broker.subscribe(user_id)
+    except StreamLimitExceeded as limit_exc:
+        raise HTTPException(status_code=limit_exc.status_code, detail=limit_exc.detail)
+
+    heartbeat_seconds = settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            yield format_sse("unread_count", {"unread_count": await unread_counter.get(user_id)})
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat_seconds)
+                    yield message
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            notification_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so events are delivered immediately
+        },
+        # The generator's finally never runs if the client is gone before the first event
+        background=BackgroundTask(notification_broker.unsubscribe, subscription)
+    )
+
 # ============= Badge Routes (Task 2) =============
 @badges_router.get("/user/{target_user_id}/badges")
+@cached_response(ttl=300, scope="shared", tags=["badges:user:{target_user_id}"])
 async def get_user_badges(target_user_id: str, user_id: str = Depends(get_current_user_id)):
     """
     Get all badges earned by a specific user.
     Returns badge details with earned timestamp.
     """
     try:
-        # Try to fetch user badges using the view
-        try:
-            badges_res = supabase.from_("user_badges_view").select("*").eq(
-                "user_id", target_user_id
-            ).order("earned_at", desc=True).execute()
-            
-            return {"badges": badges_res.data or []}
-        except Exception as view_error:
-            # If view doesn't exist, try direct table query as fallback
-            print(f"Badges view error (trying fallback): {str(view_error)}")
-            
-            try:
-                # Fallback: Direct query from user_badges table with join
-                badges_res = supabase.table("user_badges").select(
-                    "*, badges(name, description, icon_url, criteria)"
-                ).eq("user_id", target_user_id).order("earned_at", desc=True).execute()
-                
-                return {"badges": badges_res.data or []}
-            except Exception as fallback_error:
-                print(f"Badges fallback error: {str(fallback_error)}")
-                # Return empty array instead of crashing
-                return {"badges": []}
-                
+        # The view (with a direct table query as fallback) lives in the badge repository
+        return {"badges": await repos.badges.list_for_user(target_user_id)}
     except Exception as e:
         traceback.print_exc()
         print(f"Badges error: {str(e)}")
-        # Return empty array gracefully instead of 500 error
-        return {"badges": []}
+        # Return empty array gracefully instead of 500 error; as a Response so it is not cached
+        return JSONResponse({"badges": []})
 
 @badges_router.get("/all")
+@cached_response(ttl=3600, scope="shared", tags=["badges:all"])
 async def get_all_badges(user_id: str = Depends(get_current_user_id)):
     """Get all available badges in the system."""
     try:
-        badges_res = supabase.table("badges").select("*").order("name").execute()
-        return {"badges": badges_res.data or []}
+        return {"badges": await repos.badges.list_all()}
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to fetch badges: {str(e)}")
@@ -2657,15 +2811,11 @@ async def start_handover(item_id: str, user_id: str = Depends(get_current_user_i
         import random
         
         # Get item details
-        item_res = supabase.table("items").select(
-            "id, title, user_id, status"
-        ).eq("id", item_id).single().execute()
+        item = await repos.items.get(item_id, "id, title, user_id, status")
         
-        if not item_res.data:
+        if not item:
             raise HTTPException(status_code=404, detail="Item not found.")
         
-        item = item_res.data
-        
         # TODO: In a real implementation, check if user is the claimant
         # For now, we'll allow any authenticated user to start handover
         # You would need a claims table to track who claimed what
@@ -2674,10 +2824,10 @@ async def start_handover(item_id: str, user_id: str = Depends(get_current_user_i
         handover_code = str(random.randint(1000, 9999))
         
         # Update item with handover code and change status
-        supabase.table("items").update({
+        await repos.items.update(item_id, {
             "handover_code": handover_code,
             "status": "Pending Handover"
-        }).eq("id", item_id).execute()
+        })
         
         print(f"🔐 Handover started for item {item_id}, code: {handover_code}")
         
@@ -2701,15 +2851,11 @@ async def complete_handover(item_id: str, code: str = Form(...), user_id: str =
     """
     try:
         # Get item details
-        item_res = supabase.table("items").select(
-            "id, title, user_id, handover_code, university_id"
-        ).eq("id", item_id).single().execute()
+        item = await repos.items.get(item_id, "id, title, user_id, handover_code, university_id")
         
-        if not item_res.data:
+        if not item:
             raise HTTPException(status_code=404, detail="Item not found.")
         
-        item = item_res.data
-        
         # Verify the user is the finder (item owner)
         if item['user_id'] != user_id:
             raise HTTPException(status_code=403, detail="Only the finder can complete handover.")
@@ -2719,10 +2865,11 @@ async def complete_handover(item_id: str, code: str = Form(...), user_id: str =
             raise HTTPException(status_code=400, detail="Invalid handover code.")
         
         # Update item status to Recovered
-        supabase.table("items").update({
+        await repos.items.update(item_id, {
             "status": "Recovered",
             "handover_code": None  # Clear the code
-        }).eq("id", item_id).execute()
+        })
+        invalidate_tags("leaderboard")
         
         # TODO: Get claimant_id from claims table
         # For now, we'll just notify the finder
@@ -2733,16 +2880,12 @@ async def complete_handover(item_id: str, code: str = Form(...), user_id: str =
         
         # Award badges to finder
         # Count returned items (Found items that are now Recovered)
-        returned_count_res = supabase.table("items").select("id", count="exact").eq(
-            "user_id", user_id
-        ).eq("status", "Recovered").execute()
-        
-        returned_count = returned_count_res.count or 0
+        returned_count = await repos.items.count_by_user(user_id, status="Recovered")
         
         if returned_count == 1:
-            award_badge(user_id, "Good Samaritan", item['university_id'])
+            await award_badge(user_id, "Good Samaritan", item['university_id'])
         elif returned_count >= 5:
-            award_badge(user_id, "Campus Hero", item['university_id'])
+            await award_badge(user_id, "Campus Hero", item['university_id'])
         
         print(f"✅ Handover completed for item {item_id}")
         
@@ -2768,32 +2911,30 @@ async def send_thank_you_note(
     """
     try:
         # Get item details
-        item_res = supabase.table("items").select(
-            "id, title, user_id"
-        ).eq("id", item_id).single().execute()
+        item = await repos.items.get(item_id, "id, title, user_id")
         
-        if not item_res.data:
+        if not item:
             raise HTTPException(status_code=404, detail="Item not found.")
         
-        item = item_res.data
         finder_id = item['user_id']
         
         # TODO: Verify user is the claimant
         # For now, allow any authenticated user to send thank you note
         
         # Insert thank you note
-        supabase.table("thank_you_notes").insert({
+        await repos.thank_you_notes.create({
             "item_id": item_id,
             "finder_id": finder_id,
             "claimant_id": user_id,
             "message": message
-        }).execute()
+        })
+        invalidate_tags(f"thank_you_notes:user:{finder_id}")
         
         # Notify finder
-        profile_res = supabase.table("profiles").select("university_id").eq("id", user_id).single().execute()
-        if profile_res.data:
-            university_id = profile_res.data['university_id']
-            create_notification(
+        profile = await repos.profiles.get(user_id, "university_id")
+        if profile:
+            university_id = profile['university_id']
+            await create_notification(
                 recipient_id=finder_id,
                 university_id=university_id,
                 message=f"You received a thank you note for returning {item['title']}!",
@@ -2815,39 +2956,110 @@ async def send_thank_you_note(
         raise HTTPException(status_code=500, detail=f"Failed to send thank you note: {str(e)}")
 
 @handover_router.get("/user/{target_user_id}/thank-you-notes")
+@cached_response(ttl=300, scope="shared", tags=["thank_you_notes:user:{target_user_id}"])
 async def get_user_thank_you_notes(target_user_id: str, user_id: str = Depends(get_current_user_id)):
     """
     Get all thank you notes received by a user.
     """
     try:
-        # Try to fetch thank you notes using the view
-        try:
-            notes_res = supabase.from_("thank_you_notes_view").select("*").eq(
-                "finder_id", target_user_id
-            ).order("created_at", desc=True).execute()
-            
-            return {"notes": notes_res.data or []}
-        except Exception as view_error:
-            # If view doesn't exist, try direct table query as fallback
-            print(f"Thank you notes view error (trying fallback): {str(view_error)}")
-            
-            try:
-                # Fallback: Direct query from thank_you_notes table
-                notes_res = supabase.table("thank_you_notes").select(
-                    "*, items(title, category), profiles!thank_you_notes_sender_id_fkey(full_name, email)"
-                ).eq("finder_id", target_user_id).order("created_at", desc=True).execute()
-                
-                return {"notes": notes_res.data or []}
-            except Exception as fallback_error:
-                print(f"Thank you notes fallback error: {str(fallback_error)}")
-                # Return empty array instead of crashing
-                return {"notes": []}
-                
+        # The view (with a direct table query as fallback) lives in the thank-you note repository
+        return {"notes": await repos.thank_you_notes.list_for_finder(target_user_id)}
     except Exception as e:
         traceback.print_exc()
         print(f"Thank you notes error: {str(e)}")
-        # Return empty array gracefully instead of 500 error
-        return {"notes": []}
+        # Return empty array gracefully instead of 500 error; as a Response so it is not cached
+        return JSONResponse({"notes": []})
+
+# ============= Image Variants =============
+@images_router.get("/variants/{path:path}")
+async def get_image_variant(path: str, request: Request, w: int = 320, format: str = "auto"):
+    """
+    Serve an item image resized to a whitelisted width as WebP/AVIF/JPEG.
+    `path` is the object path inside the item_images bucket (as in the item's image_url).
+    With format=auto the best format the client's Accept header allows is chosen.
+    """
+    fmt = image_variants.negotiate_format(format, request.headers.get("accept", ""))
+    etag = f'W/"{path}@{w}.{fmt}"'
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": etag}
+    if format == "auto":
+        headers["Vary"] = "Accept"
+
+    if request.headers.get("if-none-match") == etag:
+        image_variants.validate(path, w)
+        return Response(status_code=304, headers=headers)
+
+    data = await image_variants.get(path, w, fmt)
+    _, content_type, _ = VARIANT_FORMATS[fmt]
+    return Response(content=data, media_type=content_type, headers=headers)
+
+@admin_router.post("/images/backfill")
+async def backfill_image_variants(limit: int = 200, university_id: int = Depends(get_admin_university_id)):
+    """
+    Generate thumbnails and responsive variants for this university's items that
+    have no thumbnail_url (admin only). Runs in the background.
+    """
+    if image_variants.backfill_running:
+        raise HTTPException(status_code=409, detail="An image backfill is already running.")
+    limit = min(max(limit, 1), 1000)
+    spawn(image_variants.backfill(university_id, limit=limit))
+    return {"message": "Image backfill started.", "limit": limit}
+
+async def backfill_image_hashes(university_id: int, limit: int):
+    """Compute items.image_hash for a university's photos posted before duplicate detection existed."""
+    rows = await repos.items.list_missing(university_id, "image_hash", "id, image_url", limit, require_image=True)
+    hashed = 0
+    for row in rows:
+        path = storage_path_from_url(row["image_url"], "item_images")
+        if not path:
+            continue
+        try:
+            original = await storage.download("item_images", path)
+            image_hash = await image_pool.run("backfill_hash", hash_image, original)
+            await repos.items.update(row["id"], {"image_hash": hash_to_hex(image_hash)})
+            image_hash_index.add(university_id, image_hash, row["id"])
+            hashed += 1
+        except Exception as e:
+            print(f"Image hash backfill failed for item {row['id']}: {e}")
+    print(f"🧬 Image hash backfill for university {university_id}: {hashed} item(s) hashed")
+
+@admin_router.post("/images/backfill-hashes")
+async def backfill_image_hashes_route(limit: int = 500, university_id: int = Depends(get_admin_university_id)):
+    """Compute perceptual hashes for this university's item photos that have none (admin only). Runs in the background."""
+    limit = min(max(limit, 1), 5000)
+    spawn(backfill_image_hashes(university_id, limit))
+    return {"message": "Image hash backfill started.", "limit": limit}
+
+async def backfill_ai_tags(university_id: int, limit: int):
+    """Tag a university's items that have no AI tags, many items per Gemini prompt."""
+    with request_priority(PRIORITY_BACKFILL):
+        await _backfill_ai_tags(university_id, limit)
+
+async def _backfill_ai_tags(university_id: int, limit: int):
+    rows = await repos.items.list_missing(university_id, "ai_tags", "id, title, description", limit)
+    if not rows:
+        return
+    all_tags = await ai_tagger.tag_many([(row["title"], row["description"]) for row in rows])
+    tagged = 0
+    failed = 0
+    for row, tags in zip(rows, all_tags):
+        if tags is None:
+            failed += 1  # Gemini call failed; the item stays untagged for the next backfill
+            continue
+        try:
+            await repos.items.update(row["id"], {"ai_tags": tags})
+            tagged += 1
+        except Exception as e:
+            print(f"AI tag backfill failed for item {row['id']}: {e}")
+    print(f"🏷️ AI tag backfill for university {university_id}: {tagged}/{len(rows)} item(s) tagged, {failed} failed")
+
+@admin_router.post("/items/backfill-tags")
+async def backfill_ai_tags_route(limit: int = 200, university_id: int = Depends(get_admin_university_id)):
+    """Generate AI tags for this university's untagged items in batches (admin only). Runs in the background."""
+    if not model:
+        raise HTTPException(status_code=503, detail="AI tagging is not available.")
+    limit = min(max(limit, 1), 2000)
+    spawn(backfill_ai_tags(university_id, limit))
+    return {"message": "AI tag backfill started.", "limit": limit}
 
 # ============= Include Routers =============
 # Register all API routers with the main app
@@ -2864,8 +3076,15 @@ app.include_router(badges_router)
 app.include_router(handover_router)
 app.include_router(badges_router)
 app.include_router(handover_router)
+app.include_router(images_router)
 
 # ============= Health Check & Root =============
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus metrics, aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    metrics_sampler.sample()  # Fresh queue depths and cache counters for this worker
+    return Response(await run_in_threadpool(render_metrics), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     """
@@ -2876,6 +3095,30 @@ async def health_check():
         "status": "healthy",
         "service": "campustrace-api",
         "ai_enabled": model is not None,
+        "database": repos.stats(),
+        "singleflight": all_singleflight_stats(),
+        "push": push_dispatcher.stats(),
+        "event_loop": event_loop_monitor.stats(),
+        "notification_streams": notification_broker.stats(),
+        "image_pool": image_pool.stats(),
+        "background_queues": all_queue_stats(),
+        "providers": all_limiter_stats(),
+        "provider_health": all_provider_stats(),
+        "image_variants": image_variants.stats(),
+        "image_hashes": image_hash_index.stats(),
+        "ai_tags": ai_tagger.stats(),
+        "suggest_details": {
+            **suggest_stats,
+            "classifier": category_classifier.stats(),
+            "local_hit_rate": round(
+                (suggest_stats["hash_hits"] + suggest_stats["classifier_hits"]) / suggest_stats["requests"], 4
+            ) if suggest_stats["requests"] else 0.0,
+        },
+        "image_search": {
+            **image_search_stats,
+            "hash_hit_rate": round(image_search_stats["hash_hits"] / image_search_stats["searches"], 4)
+            if image_search_stats["searches"] else 0.0,
+        },
         "timestamp": datetime.utcnow().isoformat()
     }
 
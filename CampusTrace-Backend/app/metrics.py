@@ -0,0 +1,178 @@
+"""
+Prometheus metrics, served at /metrics.
+
+With several uvicorn workers every process keeps its own values, so set
+PROMETHEUS_MULTIPROC_DIR to a directory shared by the workers and emptied before the
+server starts; each worker then writes its metrics to files there and /metrics
+aggregates all of them, whichever worker answers the scrape. Without it, /metrics
+reports the answering process only.
+
+Cache hit ratios are exported as hit and miss counters, e.g.
+    sum by (cache) (rate(cache_hits_total[5m]))
+      / sum by (cache) (rate(cache_hits_total[5m]) + rate(cache_misses_total[5m]))
+"""
+import os
+import time
+import asyncio
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# prometheus_client picks single- or multi-process storage when it is first imported
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402
+    REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LAG_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route template and status",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests being handled", ["method"], multiprocess_mode="livesum",
+)
+EXTERNAL_CALL_LATENCY = Histogram(
+    "external_call_duration_seconds", "External call latency, including retries and hedging",
+    ["provider", "operation"], buckets=LATENCY_BUCKETS,
+)
+EXTERNAL_CALL_ERRORS = Counter(
+    "external_call_errors_total", "External calls that failed, by exception type",
+    ["provider", "operation", "error"],
+)
+QUEUE_DEPTH = Gauge(
+    "queue_depth", "Work waiting in in-process queues and pools", ["queue"], multiprocess_mode="livesum",
+)
+CACHE_HITS = Counter("cache_hits_total", "Cache lookups that hit", ["cache"])
+CACHE_MISSES = Counter("cache_misses_total", "Cache lookups that missed", ["cache"])
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer (see app.event_loop_monitor)", buckets=LAG_BUCKETS,
+)
+
+
+@contextmanager
+def external_call(provider: str, operation: str = "call"):
+    """Time one call to an external service and count it as an error if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        EXTERNAL_CALL_ERRORS.labels(provider, operation, type(e).__name__).inc()
+        raise
+    finally:
+        EXTERNAL_CALL_LATENCY.labels(provider, operation).observe(time.perf_counter() - started)
+
+
+def supabase_operation(query) -> str:
+    """Metric label of a PostgREST builder: "table:<name>" or "rpc:<function>"."""
+    path = str(getattr(getattr(query, "request", None), "path", ""))
+    _, _, resource = path.partition("/rest/v1/")
+    if resource.startswith("rpc/"):
+        return f"rpc:{resource[4:]}"
+    return f"table:{resource}" if resource else "query"
+
+
+def render_metrics() -> bytes:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """Per-request latency and status by route template (not raw path, to keep label counts bounded)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status = 500
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+
+        async def status_send(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, status_send)
+        finally:
+            in_flight.dec()
+            # The router records the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(method, route, str(status)).observe(time.perf_counter() - started)
+
+
+class MetricsSampler:
+    """
+    Copies queue depths and cache hit/miss counts from the components' own stats into
+    the Prometheus metrics every `interval` seconds, so /metrics stays cheap and works
+    across processes. Sources return {name: depth} and {name: (hits, misses)}.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._queue_sources: List[Callable[[], Dict[str, int]]] = []
+        self._cache_sources: List[Callable[[], Dict[str, Tuple[int, int]]]] = []
+        self._cache_seen: Dict[str, Tuple[int, int]] = {}
+        self._task = None
+
+    def add_queues(self, source: Callable[[], Dict[str, int]]):
+        self._queue_sources.append(source)
+
+    def add_caches(self, source: Callable[[], Dict[str, Tuple[int, int]]]):
+        self._cache_sources.append(source)
+
+    def sample(self):
+        for source in self._queue_sources:
+            for name, depth in source().items():
+                QUEUE_DEPTH.labels(name).set(depth)
+        for source in self._cache_sources:
+            for name, (hits, misses) in source().items():
+                seen_hits, seen_misses = self._cache_seen.get(name, (0, 0))
+                # Counters only go up; the components' totals are cumulative too
+                CACHE_HITS.labels(name).inc(max(0, hits - seen_hits))
+                CACHE_MISSES.labels(name).inc(max(0, misses - seen_misses))
+                self._cache_seen[name] = (hits, misses)
+
+    async def _run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠️ Metrics sampling failed: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            # Drop this worker's live gauges (in-flight, queue depth) from the aggregate
+            multiprocess.mark_process_dead(os.getpid())
+
+
+metrics_sampler = MetricsSampler(interval=settings.METRICS_SAMPLE_SECONDS)
@@ -0,0 +1,102 @@
+import json
+import asyncio
+import threading
+from typing import Dict, Optional, Set
+
+
+class StreamLimitExceeded(Exception):
+    """Raised when a new stream would exceed the global or per-user connection limit."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class Subscription:
+    def __init__(self, user_id: str, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: str):
+        # A slow client loses its oldest events rather than growing memory without bound
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class NotificationBroker:
+    """
+    In-process pub/sub feeding the notification stream. Publishers call `publish` with a
+    user id; every open stream for that user receives the event as a ready-to-send SSE frame.
+    """
+
+    def __init__(self, max_connections: int = 1000, max_per_user: int = 5, queue_size: int = 100):
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._connections = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    def subscribe(self, user_id: str) -> Subscription:
+        with self._lock:
+            if self._connections >= self.max_connections:
+                raise StreamLimitExceeded(503, "Notification stream is at capacity. Please retry shortly.")
+            user_subs = self._subscribers.setdefault(user_id, set())
+            if len(user_subs) >= self.max_per_user:
+                raise StreamLimitExceeded(429, "Too many open notification streams for this user.")
+            self._loop = asyncio.get_running_loop()
+            subscription = Subscription(user_id, self.queue_size)
+            user_subs.add(subscription)
+            self._connections += 1
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Release a stream's slot. Idempotent: the stream and the response cleanup may both call it."""
+        with self._lock:
+            user_subs = self._subscribers.get(subscription.user_id)
+            if user_subs and subscription in user_subs:
+                user_subs.discard(subscription)
+                self._connections -= 1
+                if not user_subs:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: str, event: str, data: dict):
+        """Send an event to every open stream of a user. Safe to call from worker threads."""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+            loop = self._loop
+        if not subscriptions:
+            return
+        message = format_sse(event, data)
+        self.published += 1
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        for subscription in subscriptions:
+            if running_loop is loop:
+                subscription.offer(message)
+            elif loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(subscription.offer, message)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self._connections,
+            "users": len(self._subscribers),
+            "published": self.published,
+        }
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,189 @@
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.background import spawn
+from app.config import get_settings
+from app.repositories import repos
+from app.notification_broker import NotificationBroker
+from app.push_dispatcher import push_dispatcher
+
+settings = get_settings()
+
+
+class UnreadCounter:
+    """
+    Per-user unread notification counts, maintained incrementally by the API's own
+    create/mark-read/delete paths. A user's count is seeded with one count query and
+    re-seeded after `resync_seconds` to absorb changes made outside this process.
+    """
+
+    def __init__(self, resync_seconds: float = 300, max_users: int = 50000):
+        self.resync_seconds = resync_seconds
+        self.max_users = max_users
+        self._counts: Dict[str, Tuple[int, float]] = {}  # user id -> (count, seeded_at)
+        self._lock = threading.Lock()
+
+    async def get(self, user_id: str) -> int:
+        with self._lock:
+            entry = self._counts.get(user_id)
+        if entry and time.monotonic() - entry[1] < self.resync_seconds:
+            return entry[0]
+
+        count = await repos.notifications.count_unread(user_id)
+        with self._lock:
+            if len(self._counts) >= self.max_users:
+                self._counts.clear()  # Cheap bound; counts are re-seeded on demand
+            self._counts[user_id] = (count, time.monotonic())
+        return count
+
+    def adjust(self, user_ids: Iterable[str], delta: int):
+        """Apply a change to users whose count is already known; unknown users are seeded on next read."""
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._counts.get(user_id)
+                if entry is not None:
+                    self._counts[user_id] = (max(0, entry[0] + delta), entry[1])
+
+    def reset(self, user_id: str, count: int = 0):
+        with self._lock:
+            self._counts[user_id] = (count, time.monotonic())
+
+
+unread_counter = UnreadCounter(resync_seconds=settings.UNREAD_COUNT_RESYNC_SECONDS)
+
+# Feeds /api/notifications/stream; only reaches streams held by this worker process
+notification_broker = NotificationBroker(
+    max_connections=settings.NOTIFICATION_STREAM_MAX_CONNECTIONS,
+    max_per_user=settings.NOTIFICATION_STREAM_MAX_PER_USER,
+)
+
+
+def publish_unread_delta(user_id: str, delta: int):
+    """Tell the user's open streams that their unread count changed."""
+    if delta:
+        notification_broker.publish(user_id, "unread_count", {"delta": delta})
+
+
+def _push_allowed(profile: dict, notification_type: str) -> bool:
+    """Check a recipient's push preferences (based on the profiles table) for a notification type."""
+    if notification_type == 'message' and not profile.get('message_notifications', True):
+        return False
+    if notification_type in ['claim', 'claim_response'] and not profile.get('claim_notifications', True):
+        return False
+    return True
+
+
+async def create_notifications_bulk(
+    recipient_ids: Iterable[str],
+    university_id: int,
+    message: str,
+    link_to: Optional[str] = None,
+    type: str = 'general'
+) -> List[dict]:
+    """
+    Create the same in-app notification for many users with a single insert,
+    then send all push notifications as one batch.
+    """
+    # De-duplicate while keeping order (e.g. a finder who is also the claimant)
+    recipients = list(dict.fromkeys(r for r in recipient_ids if r))
+    if not recipients:
+        return []
+
+    try:
+        rows = [
+            {
+                "recipient_id": recipient_id,
+                "university_id": university_id,
+                "message": message,
+                "link_to": link_to,
+                "type": type,
+            }
+            for recipient_id in recipients
+        ]
+        created = await repos.notifications.create_many(rows)
+        unread_counter.adjust(recipients, 1)
+        print(f"In-app notification created for {len(recipients)} user(s)")
+
+        # Push the new rows to any open notification streams
+        for notification in created or rows:
+            notification_broker.publish(notification["recipient_id"], "notification", notification)
+            publish_unread_delta(notification["recipient_id"], 1)
+
+        # Trigger push notifications asynchronously
+        spawn(send_push_notifications_bulk(recipients, message, type, link_to))
+
+        return created
+    except Exception as e:
+        print(f"Error creating notifications: {e}")
+        return []
+
+
+async def create_notification(recipient_id: str, university_id: int, message: str, link_to: Optional[str] = None, type: str = 'general'):
+    """
+    Create an in-app notification for a user.
+    Types: 'general', 'claim', 'moderation', 'verification', 'message', etc.
+    """
+    await create_notifications_bulk([recipient_id], university_id, message, link_to=link_to, type=type)
+
+
+async def notify_university(
+    university_id: int,
+    message: str,
+    link_to: Optional[str] = None,
+    type: str = 'announcement',
+    role: Optional[str] = None
+) -> List[dict]:
+    """
+    Broadcast a notification to every member of a university (optionally only one role).
+    Used for admin fan-out today and university-wide announcements.
+    """
+    try:
+        members = await repos.profiles.list_for_university(university_id, "id", role=role)
+    except Exception as e:
+        print(f"Error fetching notification recipients for university {university_id}: {e}")
+        return []
+
+    recipient_ids = [member["id"] for member in members]
+    return await create_notifications_bulk(recipient_ids, university_id, message, link_to=link_to, type=type)
+
+
+async def notify_university_admins(university_id: int, message: str, link_to: Optional[str] = None, type: str = 'general') -> List[dict]:
+    """Notify every admin of a university."""
+    return await notify_university(university_id, message, link_to=link_to, type=type, role="admin")
+
+
+async def send_push_notifications_bulk(recipient_ids: List[str], message: str, notification_type: str, link_to: Optional[str] = None):
+    """
+    Fetches push tokens and preferences for all recipients in one query and
+    hands the push messages to the batching Expo dispatcher.
+    """
+    try:
+        profiles = await repos.profiles.get_many(
+            recipient_ids, "id, push_token, message_notifications, claim_notifications, moderation_notifications"
+        )
+
+        push_messages = []
+        for profile in profiles:
+            if not profile.get("push_token"):
+                continue
+            if not _push_allowed(profile, notification_type):
+                print(f"User {profile['id']} has {notification_type} push notifications disabled.")
+                continue
+            push_messages.append({
+                "to": profile["push_token"],
+                "sound": "default",
+                "title": "CampusTrace",
+                "body": message,
+                "data": {"url": link_to}  # Send link_to in data payload
+            })
+
+        if not push_messages:
+            print(f"No push tokens for {len(recipient_ids)} recipient(s), skipping push.")
+            return
+
+        # The dispatcher batches these with other pending pushes (up to 100 per Expo request)
+        push_dispatcher.enqueue(push_messages)
+
+    except Exception as e:
+        print(f"General error in send_push_notifications_bulk: {e}")
@@ -0,0 +1,240 @@
+import time
+import asyncio
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.config import get_settings
+from app.repositories import repos
+from app.resilience import expo_provider, raise_for_retryable_status
+
+settings = get_settings()
+
+EXPO_MAX_MESSAGES_PER_REQUEST = 100
+EXPO_MAX_RECEIPT_IDS_PER_REQUEST = 1000
+
+# Queued by stop(): the send loop sends the batch it is building, then exits
+_STOP = object()
+
+
+class ExpoPushDispatcher:
+    """
+    Buffers outgoing Expo push messages briefly and sends them in batches of up to 100
+    over one pooled HTTP client. Push tickets are kept and their receipts polled in bulk;
+    tokens Expo reports as DeviceNotRegistered are removed from profiles.
+    """
+
+    def __init__(
+        self,
+        send_url: str,
+        receipts_url: str,
+        access_token: Optional[str] = None,
+        linger_seconds: float = 0.25,
+        receipt_delay_seconds: float = 900,
+        receipt_poll_seconds: float = 60,
+        max_pending_receipts: int = 50000,
+    ):
+        self.send_url = send_url
+        self.receipts_url = receipts_url
+        self.access_token = access_token
+        self.linger_seconds = linger_seconds
+        self.receipt_delay_seconds = receipt_delay_seconds
+        self.receipt_poll_seconds = receipt_poll_seconds
+        self.max_pending_receipts = max_pending_receipts
+        self._queue: Optional[asyncio.Queue] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending_receipts: Dict[str, Tuple[str, float]] = {}  # ticket id -> (push token, sent_at)
+        self.sent = 0
+        self.batches = 0
+        self.failed = 0
+        self.pruned_tokens = 0
+        self.dropped_receipts = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def _headers(self) -> dict:
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        }
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        return headers
+
+    def _ensure_running(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            headers=self._headers(),
+        )
+        self._tasks = [
+            asyncio.create_task(self._send_loop()),
+            asyncio.create_task(self._receipt_loop()),
+        ]
+
+    async def start(self):
+        self._ensure_running()
+        print("📮 Expo push dispatcher started.")
+
+    async def stop(self):
+        """Let the send loop finish its current batch, flush what is still queued, then close the client."""
+        if not self._tasks:
+            return
+        send_task, receipt_task = self._tasks
+        receipt_task.cancel()
+        self._queue.put_nowait(_STOP)
+        await asyncio.gather(send_task, receipt_task, return_exceptions=True)
+        self._tasks = []
+        remaining = []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for start in range(0, len(remaining), EXPO_MAX_MESSAGES_PER_REQUEST):
+            await self._send_batch(remaining[start:start + EXPO_MAX_MESSAGES_PER_REQUEST])
+        await self._client.aclose()
+        self._client = None
+        print("📮 Expo push dispatcher stopped.")
+
+    def enqueue(self, messages: Iterable[dict]):
+        """Queue push messages for the next batch. Must be called from the event loop."""
+        self._ensure_running()
+        for message in messages:
+            self._queue.put_nowait(message)
+
+    async def _send_loop(self):
+        while True:
+            message = await self._queue.get()
+            if message is _STOP:
+                return
+            batch = [message]
+            stopping = False
+            deadline = time.monotonic() + self.linger_seconds
+            while len(batch) < EXPO_MAX_MESSAGES_PER_REQUEST:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if message is _STOP:
+                    stopping = True
+                    break
+                batch.append(message)
+            await self._send_batch(batch)
+            if stopping:
+                return
+
+    async def _post(self, url: str, payload) -> httpx.Response:
+        return raise_for_retryable_status(await self._client.post(url, json=payload))
+
+    async def _send_batch(self, batch: List[dict]):
+        try:
+            # Retries 429/5xx and connection failures with backoff; fails fast while Expo is down
+            response = await expo_provider.call(self._post, self.send_url, batch)
+            tickets = response.json().get("data", [])
+        except httpx.HTTPStatusError as e:
+            self.failed += len(batch)
+            print(f"Error sending push batch of {len(batch)}: {e.response.text}")
+            return
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"General error sending push batch of {len(batch)}: {e}")
+            return
+
+        self.batches += 1
+        sent_at = time.monotonic()
+        unregistered = set()
+        # Tickets come back in the same order as the messages
+        for message, ticket in zip(batch, tickets):
+            if ticket.get("status") == "ok" and ticket.get("id"):
+                self.sent += 1
+                self._pending_receipts[ticket["id"]] = (message["to"], sent_at)
+            else:
+                self.failed += 1
+                if (ticket.get("details") or {}).get("error") == "DeviceNotRegistered":
+                    unregistered.add(message["to"])
+        self._trim_pending_receipts()
+        print(f"Push batch sent: {len(batch)} message(s), {len(unregistered)} unregistered device(s).")
+        if unregistered:
+            await self._prune_tokens(unregistered)
+
+    def _trim_pending_receipts(self):
+        """Drop the oldest tickets past the cap, so a long Expo receipts outage can't grow memory without bound."""
+        excess = len(self._pending_receipts) - self.max_pending_receipts
+        if excess <= 0:
+            return
+        # Dicts keep insertion order, so the first keys are the oldest tickets
+        for ticket_id in list(self._pending_receipts)[:excess]:
+            del self._pending_receipts[ticket_id]
+        self.dropped_receipts += excess
+        print(f"⚠️ Dropped {excess} push ticket(s) without checking their receipts.")
+
+    async def _receipt_loop(self):
+        while True:
+            await asyncio.sleep(self.receipt_poll_seconds)
+            try:
+                await self.check_receipts()
+            except Exception as e:
+                print(f"Error checking push receipts: {e}")
+
+    async def check_receipts(self, force: bool = False):
+        """Poll Expo receipts for tickets old enough to have them, in chunks of 1000 ids."""
+        cutoff = time.monotonic() - self.receipt_delay_seconds
+        due = [tid for tid, (_, sent_at) in self._pending_receipts.items() if force or sent_at <= cutoff]
+        unregistered = set()
+        try:
+            for start in range(0, len(due), EXPO_MAX_RECEIPT_IDS_PER_REQUEST):
+                ids = due[start:start + EXPO_MAX_RECEIPT_IDS_PER_REQUEST]
+                response = await expo_provider.call(self._post, self.receipts_url, {"ids": ids})
+                receipts = response.json().get("data", {})
+                for ticket_id in ids:
+                    pending = self._pending_receipts.pop(ticket_id, None)
+                    if pending is None:
+                        continue  # Trimmed while the request was in flight
+                    token, _ = pending
+                    receipt = receipts.get(ticket_id)
+                    if receipt and receipt.get("status") == "error":
+                        self.failed += 1
+                        if (receipt.get("details") or {}).get("error") == "DeviceNotRegistered":
+                            unregistered.add(token)
+        finally:
+            # Their receipts are already popped, so prune even if a later chunk failed
+            if unregistered:
+                await self._prune_tokens(unregistered)
+
+    async def _prune_tokens(self, tokens: Iterable[str]):
+        tokens = list(tokens)
+        try:
+            await repos.profiles.clear_push_tokens(tokens)
+            self.pruned_tokens += len(tokens)
+            print(f"🧹 Removed {len(tokens)} unregistered push token(s).")
+        except Exception as e:
+            print(f"Error pruning push tokens: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "sent": self.sent,
+            "batches": self.batches,
+            "failed": self.failed,
+            "pending_receipts": len(self._pending_receipts),
+            "dropped_receipts": self.dropped_receipts,
+            "pruned_tokens": self.pruned_tokens,
+        }
+
+
+push_dispatcher = ExpoPushDispatcher(
+    send_url=settings.EXPO_PUSH_URL,
+    receipts_url=settings.EXPO_RECEIPTS_URL,
+    access_token=settings.EXPO_ACCESS_TOKEN,
+    linger_seconds=settings.PUSH_BATCH_LINGER_MS / 1000,
+    receipt_delay_seconds=settings.PUSH_RECEIPT_DELAY_SECONDS,
+    max_pending_receipts=settings.PUSH_MAX_PENDING_RECEIPTS,
+)
@@ -0,0 +1,197 @@
+import time
+import heapq
+import asyncio
+import itertools
+import contextvars
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.timing import record_span
+
+settings = get_settings()
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0  # A user is waiting on the response (create, search, suggest)
+PRIORITY_BACKGROUND = 1   # Deferred work for a recent request (enrichment)
+PRIORITY_BACKFILL = 2     # Admin backfills and bulk imports
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+    PRIORITY_BACKFILL: "backfill",
+}
+
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar("provider_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Run the enclosed provider calls (and tasks spawned inside) at `priority`."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+# Registry of every provider limiter created in this process, used for stats reporting
+_limiters: Dict[str, "ProviderLimiter"] = {}
+
+
+class ProviderLimiter:
+    """
+    Token bucket plus concurrency cap for one upstream provider, with a priority
+    queue in front of it: when calls have to wait, interactive callers are admitted
+    before background and backfill work. Interactive callers whose predicted wait
+    (callers queued ahead of them over the refill rate) exceeds `max_wait` seconds get
+    a 503 straight away instead of piling up; the same budget also bounds the actual
+    wait, which the concurrency cap can stretch beyond the prediction.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_concurrency: int, max_wait: float):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._waiters: List[tuple] = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.rejected = 0
+        self.queue_times: Dict[str, dict] = {}
+        _limiters[name] = self
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _can_start(self) -> bool:
+        return self._in_flight < self.max_concurrency and self._tokens >= 1
+
+    def _start(self):
+        self._tokens -= 1
+        self._in_flight += 1
+
+    def _grant(self):
+        """Admit queued callers in priority order while capacity allows."""
+        self._timer = None
+        self._refill()
+        while self._waiters and self._can_start():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # Timed out or cancelled while queued
+            self._start()
+            future.set_result(None)
+        if self._waiters and self._in_flight < self.max_concurrency and self._timer is None:
+            # Out of tokens: wake up when the next one is due
+            delay = max(0.0, (1 - self._tokens) / self.rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._grant)
+
+    def _predicted_wait(self, priority: int) -> float:
+        """Seconds until the token bucket can admit a caller queued now at `priority`."""
+        ahead = sum(1 for p, _, future in self._waiters if p <= priority and not future.done())
+        return max(0.0, ahead + 1 - self._tokens) / self.rate
+
+    def _reject(self):
+        self.rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail=f"The {self.name} AI service is busy. Please try again shortly.",
+            headers={"Retry-After": str(max(1, int(self.max_wait)))},
+        )
+
+    def _release(self):
+        self._in_flight -= 1
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None):
+        """Hold one request slot for the enclosed provider call."""
+        priority = _current_priority.get() if priority is None else priority
+        started = time.monotonic()
+        self._refill()
+        if not self._waiters and self._can_start():
+            self._start()
+        else:
+            # Only interactive callers have a wait budget; deferred work simply waits its turn
+            interactive = priority == PRIORITY_INTERACTIVE
+            if interactive and self._predicted_wait(priority) > self.max_wait:
+                self._reject()
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._seq), future))
+            self._grant()
+            timeout = self.max_wait if interactive else None
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                if future.done() and not future.cancelled():
+                    self._release()  # Admitted just as the budget ran out; give the slot back
+                else:
+                    future.cancel()
+                self._reject()
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()
+                else:
+                    future.cancel()
+                raise
+        waited = time.monotonic() - started
+        self._record(priority, waited)
+        record_span(f"{self.name}_queue", waited)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _record(self, priority: int, seconds: float):
+        timing = self.queue_times.setdefault(
+            PRIORITY_NAMES.get(priority, str(priority)), {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        ms = seconds * 1000
+        timing["count"] += 1
+        timing["total_ms"] += ms
+        timing["max_ms"] = max(timing["max_ms"], ms)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "waiting": sum(1 for _, _, future in self._waiters if not future.done()),
+            "rejected": self.rejected,
+            "queue_time": {
+                name: {
+                    "count": t["count"],
+                    "avg_ms": round(t["total_ms"] / t["count"], 1) if t["count"] else 0.0,
+                    "max_ms": round(t["max_ms"], 1),
+                }
+                for name, t in self.queue_times.items()
+            },
+        }
+
+
+def all_limiter_stats() -> dict:
+    """Stats for every registered provider limiter, keyed by provider name."""
+    return {name: limiter.stats() for name, limiter in list(_limiters.items())}
+
+
+gemini_limiter = ProviderLimiter(
+    "gemini",
+    rate=settings.GEMINI_RATE_PER_SECOND,
+    burst=settings.GEMINI_BURST,
+    max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+    max_wait=settings.GEMINI_MAX_WAIT_SECONDS,
+)
+
+jina_limiter = ProviderLimiter(
+    "jina",
+    rate=settings.JINA_RATE_PER_SECOND,
+    burst=settings.JINA_BURST,
+    max_concurrency=settings.JINA_MAX_CONCURRENCY,
+    max_wait=settings.JINA_MAX_WAIT_SECONDS,
+)
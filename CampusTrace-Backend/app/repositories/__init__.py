@@ -0,0 +1,25 @@
+from app.config import get_settings
+from app.repositories.base import Repositories
+
+settings = get_settings()
+
+
+def create_repositories(backend: str) -> Repositories:
+    """
+    Build the data-access layer for `backend`: "supabase" (production) or "memory",
+    which keeps every table in process so the API runs offline for tests and load tests.
+    """
+    if backend == "supabase":
+        # Imported lazily so the memory backend never creates a Supabase client
+        from app.repositories.supabase import create_supabase_repositories
+        return create_supabase_repositories()
+    if backend == "memory":
+        from app.repositories.memory import MemoryRepositories
+        repositories = MemoryRepositories()
+        if settings.DATA_SEED_FILE:
+            repositories.store.seed_file(settings.DATA_SEED_FILE)
+        return repositories
+    raise ValueError(f"Unknown DATA_BACKEND: {backend!r}")
+
+
+repos = create_repositories(settings.DATA_BACKEND)
@@ -0,0 +1,363 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Column lists are PostgREST-style strings ("id, title" or "*"); rows are plain dicts.
+
+
+class AuthRepository(ABC):
+    """Account lookup and creation (Supabase Auth)."""
+
+    @abstractmethod
+    async def get_user_id(self, token: str) -> Optional[str]:
+        """Resolve an access token to a user id, or None when it is invalid or expired."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def sign_up(self, credentials: dict) -> Any:
+        """Create an account; returns a response whose `.user` has `id`, `confirmed_at` and `identities`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_user(self, user_id: str):
+        raise NotImplementedError
+
+
+class ItemRepository(ABC):
+    """Lost and found posts, including the embedding-based match queries."""
+
+    @abstractmethod
+    async def get(self, item_id: int, columns: str = "*") -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, item_ids: Sequence[int], columns: str = "*", moderation_status: Optional[str] = None) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create(self, item: dict) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, item_id: int, changes: dict) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_approved(
+        self,
+        university_id: int,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        search: Optional[str] = None,
+        exclude_user_id: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        count: bool = False,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Approved items of a university, newest first, each with its poster under "profiles".
+        `search` matches title or description; the total is only counted when `count` is set.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_by_university(
+        self, university_id: int, columns: str = "*", status: Optional[str] = None, moderation_status: Optional[str] = None
+    ) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_by_user(
+        self,
+        user_id: str,
+        columns: str = "*",
+        status: Optional[str] = None,
+        moderation_status: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """A user's items, newest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count_by_user(self, user_id: str, status: Optional[str] = None, moderation_status: Optional[str] = None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_missing(self, university_id: int, column: str, columns: str, limit: int, require_image: bool = False) -> List[dict]:
+        """Items of a university where `column` is null (and, with `require_image`, image_url is set), for backfills."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_pending_enrichment(self, columns: str, limit: int, missing: Optional[str] = None) -> List[dict]:
+        """Items whose background enrichment has not completed, newest first; with `missing`, only those where that column is null."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def page_image_hashes(self, university_id: int, offset: int, limit: int) -> List[dict]:
+        """`id, image_hash` of a university's hashed items, ordered by id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def page_image_embeddings(self, university_id: int, offset: int, limit: int) -> List[dict]:
+        """`title, category, image_embedding` of a university's approved items with an image embedding, newest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def match_by_image_embedding(self, university_id: int, embedding: List[float], threshold: float, count: int) -> List[dict]:
+        """Approved items whose image embedding has cosine similarity >= threshold, best first, with a "similarity" key."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_matches_for_lost_item(
+        self, item_id: int, text_weight: float, image_weight: float, threshold: float, count: int
+    ) -> List[dict]:
+        """Approved Found items scored against a Lost item by weighted text/image similarity, with "match_score" (0-100)."""
+        raise NotImplementedError
+
+
+class ProfileRepository(ABC):
+    @abstractmethod
+    async def get(self, user_id: str, columns: str = "*") -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, user_ids: Sequence[str], columns: str = "*") -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upsert(self, profile: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, user_id: str, changes: dict) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_for_university(self, university_id: int, columns: str = "id", role: Optional[str] = None) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def leaderboard(self, university_id: int, limit: int = 10) -> List[dict]:
+        """Top users of a university by successful returns."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear_push_tokens(self, tokens: Iterable[str]):
+        raise NotImplementedError
+
+
+class ClaimRepository(ABC):
+    @abstractmethod
+    async def create(self, claim: dict) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_with_item(self, claim_id: int) -> Optional[dict]:
+        """A claim with its item's `id, title, user_id, university_id` under "item"."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_for_item(self, item_id: int, status: Optional[str] = None, with_claimant: bool = False) -> List[dict]:
+        """Claims on an item; `with_claimant` adds the claimant's `full_name, email` under "claimant"."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_status(self, claim_id: int, status: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def reject_pending(self, item_id: int):
+        """Reject every claim on an item that is still pending."""
+        raise NotImplementedError
+
+
+class ConversationRepository(ABC):
+    @abstractmethod
+    async def get(self, conversation_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find(self, item_id: int, finder_id: str, claimant_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create(self, item_id: int, finder_id: str, claimant_id: str) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, conversation_id: int):
+        """Delete a conversation and its messages."""
+        raise NotImplementedError
+
+
+class NotificationRepository(ABC):
+    @abstractmethod
+    async def create_many(self, notifications: List[dict]) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count_unread(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_page(self, user_id: str, limit: int, status: Optional[str] = None, before: Optional[dict] = None) -> List[dict]:
+        """
+        A user's notifications ordered by (created_at, id) descending, strictly after the `before`
+        keyset position ({"created_at": aware datetime, "id": int}).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def mark_read(self, user_id: str, ids: Optional[Sequence[int]] = None) -> List[dict]:
+        """Mark a user's unread notifications (all of them, or only `ids`) read; returns the updated rows."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, user_id: str, ids: Optional[Sequence[int]] = None) -> List[dict]:
+        """Delete a user's notifications (all of them, or only `ids`); returns the deleted rows."""
+        raise NotImplementedError
+
+
+class BadgeRepository(ABC):
+    @abstractmethod
+    async def get_by_name(self, name: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def has_badge(self, user_id: str, badge_id: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def award(self, user_id: str, badge_id: int):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_for_user(self, user_id: str) -> List[dict]:
+        """Badges a user has earned with their details, most recent first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_all(self) -> List[dict]:
+        raise NotImplementedError
+
+
+class ThankYouNoteRepository(ABC):
+    @abstractmethod
+    async def create(self, note: dict) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_for_finder(self, finder_id: str) -> List[dict]:
+        """Notes a finder received with item and sender details, most recent first."""
+        raise NotImplementedError
+
+
+class SettingsRepository(ABC):
+    @abstractmethod
+    async def get(self, university_id: int) -> Dict[str, str]:
+        """A university's site settings as {setting_key: setting_value}."""
+        raise NotImplementedError
+
+
+class UniversityRepository(ABC):
+    @abstractmethod
+    async def get(self, university_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_by_name(self, name: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create(self, name: str, status: str) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_status(self, university_id: int, status: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, university_id: int):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_active(self) -> List[dict]:
+        """`id, name` of active universities, by name."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_domain(self, domain: str) -> Optional[dict]:
+        """The allowed_domains row for an email domain, with the university's name under "universities"."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_domain(self, university_id: int, domain: str):
+        raise NotImplementedError
+
+
+class VerificationRepository(ABC):
+    @abstractmethod
+    async def create(self, verification: dict) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, verification_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_pending(self, university_id: int) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_status(self, verification_id: int, status: str):
+        raise NotImplementedError
+
+
+class BackupRepository(ABC):
+    @abstractmethod
+    async def export_university(self, university_id: int) -> Dict[str, List[dict]]:
+        """Every row belonging to a university, keyed by table name."""
+        raise NotImplementedError
+
+
+class Repositories:
+    """The data-access layer the API runs on; one implementation per backend."""
+
+    def __init__(
+        self,
+        backend: str,
+        auth: AuthRepository,
+        items: ItemRepository,
+        profiles: ProfileRepository,
+        claims: ClaimRepository,
+        conversations: ConversationRepository,
+        notifications: NotificationRepository,
+        badges: BadgeRepository,
+        thank_you_notes: ThankYouNoteRepository,
+        settings: SettingsRepository,
+        universities: UniversityRepository,
+        verifications: VerificationRepository,
+        backups: BackupRepository,
+    ):
+        self.backend = backend
+        self.auth = auth
+        self.items = items
+        self.profiles = profiles
+        self.claims = claims
+        self.conversations = conversations
+        self.notifications = notifications
+        self.badges = badges
+        self.thank_you_notes = thank_you_notes
+        self.settings = settings
+        self.universities = universities
+        self.verifications = verifications
+        self.backups = backups
+
+    def stats(self) -> dict:
+        return {"backend": self.backend}
+
+    def close(self):
+        pass
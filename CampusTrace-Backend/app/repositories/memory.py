@@ -0,0 +1,585 @@
+import json
+import copy
+from types import SimpleNamespace
+from uuid import uuid4
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.repositories.base import (
+    AuthRepository, BackupRepository, BadgeRepository, ClaimRepository, ConversationRepository,
+    ItemRepository, NotificationRepository, ProfileRepository, Repositories, SettingsRepository,
+    ThankYouNoteRepository, UniversityRepository, VerificationRepository
+)
+
+# Column defaults the Postgres schema would fill in on insert
+DEFAULTS = {
+    "items": {"moderation_status": "pending", "enrichment_status": "complete", "ai_tags": None, "image_hash": None,
+              "image_url": None, "thumbnail_url": None, "text_embedding": None, "image_embedding": None},
+    "profiles": {"role": "member", "is_verified": False, "is_banned": False, "successful_returns": 0, "avatar_url": None,
+                 "push_token": None, "match_notifications": True, "claim_notifications": True, "message_notifications": True,
+                 "moderation_notifications": True, "email_notifications_enabled": True},
+    "notifications": {"status": "unread", "type": "general", "link_to": None},
+    "claims": {"status": "pending"},
+    "universities": {"status": "pending"},
+    "user_verifications": {"status": "pending"},
+}
+TABLES = (
+    "universities", "allowed_domains", "site_settings", "profiles", "items", "claims", "conversations",
+    "messages", "notifications", "badges", "user_badges", "thank_you_notes", "user_verifications",
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _project(row: dict, columns: str) -> dict:
+    if columns.strip() == "*":
+        return copy.deepcopy(row)
+    return {name: copy.deepcopy(row.get(name)) for name in (c.strip() for c in columns.split(",")) if name}
+
+
+def _timestamp(value) -> datetime:
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _newest_first(rows: List[dict]) -> List[dict]:
+    return sorted(rows, key=lambda r: (str(r.get("created_at") or ""), r.get("id") or 0), reverse=True)
+
+
+def _unit_matrix(vectors: List[List[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _cosine(query: List[float], vectors: List[List[float]]) -> np.ndarray:
+    """Cosine similarity of `query` against each row of `vectors`."""
+    q = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    if norm == 0 or not vectors:
+        return np.zeros(len(vectors), dtype=np.float32)
+    return _unit_matrix(vectors) @ (q / norm)
+
+
+def _embedding(value) -> Optional[List[float]]:
+    # Rows seeded from a Postgres export carry pgvector columns as "[0.1,0.2,...]" strings
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value or None
+
+
+class MemoryStore:
+    """
+    Tables as lists of row dicts, shared by the in-memory repositories. Every operation
+    runs without awaiting, so it is atomic on the event loop without locks. Rows handed
+    out are copies; callers may mutate them freely.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, List[dict]] = {table: [] for table in TABLES}
+        self._last_ids: Dict[str, int] = {}
+        self.operations = 0
+
+    def seed(self, data: Dict[str, List[dict]]):
+        """Load rows (e.g. a /api/backup export), filling in ids, timestamps and column defaults."""
+        for table, rows in data.items():
+            self.insert(table, rows)
+
+    def seed_file(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            self.seed(json.load(f))
+
+    def insert(self, table: str, rows: Iterable[dict]) -> List[dict]:
+        self.operations += 1
+        inserted = []
+        for row in rows:
+            row = {"created_at": _now(), **DEFAULTS.get(table, {}), **row}
+            last_id = self._last_ids.get(table, 0)
+            if row.get("id") is None:
+                row["id"] = last_id + 1
+            if isinstance(row["id"], int):
+                self._last_ids[table] = max(last_id, row["id"])
+            self.tables.setdefault(table, []).append(row)
+            inserted.append(copy.deepcopy(row))
+        return inserted
+
+    def select(self, table: str, where: Callable[[dict], bool] = lambda row: True, columns: str = "*") -> List[dict]:
+        self.operations += 1
+        return [_project(row, columns) for row in self.tables.get(table, []) if where(row)]
+
+    def first(self, table: str, where: Callable[[dict], bool], columns: str = "*") -> Optional[dict]:
+        self.operations += 1
+        row = next((row for row in self.tables.get(table, []) if where(row)), None)
+        return _project(row, columns) if row is not None else None
+
+    def rows(self, table: str) -> List[dict]:
+        """The stored rows themselves (not copies), for reads that project afterwards."""
+        self.operations += 1
+        return self.tables.get(table, [])
+
+    def update(self, table: str, where: Callable[[dict], bool], changes: dict) -> List[dict]:
+        self.operations += 1
+        updated = []
+        for row in self.tables.get(table, []):
+            if where(row):
+                row.update(copy.deepcopy(changes))
+                updated.append(copy.deepcopy(row))
+        return updated
+
+    def delete(self, table: str, where: Callable[[dict], bool]) -> List[dict]:
+        self.operations += 1
+        kept, deleted = [], []
+        for row in self.tables.get(table, []):
+            (deleted if where(row) else kept).append(row)
+        self.tables[table] = kept
+        return deleted
+
+    def stats(self) -> dict:
+        return {"operations": self.operations, "rows": {table: len(rows) for table, rows in self.tables.items() if rows}}
+
+
+class MemoryAuthRepository(AuthRepository):
+    """Tokens of the form "user-<profile id>" authenticate as that user, like fakes.supabase."""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def get_user_id(self, token: str) -> Optional[str]:
+        if not token.startswith("user-"):
+            return None
+        user_id = token[len("user-"):]
+        return user_id if self.store.first("profiles", lambda p: p["id"] == user_id, "id") else None
+
+    async def sign_up(self, credentials: dict):
+        email = credentials["email"]
+        if self.store.first("profiles", lambda p: p.get("email") == email, "id"):
+            raise Exception("User already registered")
+        # What the on-signup trigger does in Postgres: create the profile from the metadata
+        metadata = credentials.get("options", {}).get("data", {})
+        user_id = str(uuid4())
+        self.store.insert("profiles", [{"id": user_id, "email": email, **metadata}])
+        return SimpleNamespace(user=SimpleNamespace(id=user_id, email=email, confirmed_at=None, identities=[{"provider": "email"}]))
+
+    async def delete_user(self, user_id: str):
+        self.store.delete("profiles", lambda p: p["id"] == user_id)
+
+
+class MemoryItemRepository(ItemRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _with_poster(self, item: dict) -> dict:
+        poster = self.store.first("profiles", lambda p: p["id"] == item.get("user_id"), "id, full_name, email")
+        return {**copy.deepcopy(item), "profiles": poster}
+
+    async def get(self, item_id: int, columns: str = "*") -> Optional[dict]:
+        return self.store.first("items", lambda i: str(i["id"]) == str(item_id), columns)
+
+    async def get_many(self, item_ids: Sequence[int], columns: str = "*", moderation_status: Optional[str] = None) -> List[dict]:
+        ids = {str(item_id) for item_id in item_ids}
+        return self.store.select("items", lambda i: str(i["id"]) in ids and (
+            moderation_status is None or i.get("moderation_status") == moderation_status
+        ), columns)
+
+    async def create(self, item: dict) -> dict:
+        return self.store.insert("items", [item])[0]
+
+    async def update(self, item_id: int, changes: dict) -> List[dict]:
+        return self.store.update("items", lambda i: str(i["id"]) == str(item_id), changes)
+
+    async def list_approved(
+        self,
+        university_id: int,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        search: Optional[str] = None,
+        exclude_user_id: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        count: bool = False,
+    ) -> Tuple[List[dict], Optional[int]]:
+        needle = search.lower() if search else None
+
+        def where(item: dict) -> bool:
+            return (
+                item.get("university_id") == university_id
+                and item.get("moderation_status") == "approved"
+                and (not status or item.get("status") == status)
+                and (not category or item.get("category") == category)
+                and (not exclude_user_id or item.get("user_id") != exclude_user_id)
+                and (not needle or needle in (item.get("title") or "").lower() or needle in (item.get("description") or "").lower())
+            )
+
+        matches = _newest_first([item for item in self.store.rows("items") if where(item)])
+        page = [self._with_poster(item) for item in matches[offset:offset + limit]]
+        return page, len(matches) if count else None
+
+    async def list_by_university(
+        self, university_id: int, columns: str = "*", status: Optional[str] = None, moderation_status: Optional[str] = None
+    ) -> List[dict]:
+        return self.store.select("items", lambda i: i.get("university_id") == university_id
+                                 and (not status or i.get("status") == status)
+                                 and (not moderation_status or i.get("moderation_status") == moderation_status), columns)
+
+    async def list_by_user(
+        self,
+        user_id: str,
+        columns: str = "*",
+        status: Optional[str] = None,
+        moderation_status: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        rows = _newest_first([
+            i for i in self.store.rows("items")
+            if i.get("user_id") == user_id
+            and (not status or i.get("status") == status)
+            and (not moderation_status or i.get("moderation_status") == moderation_status)
+        ])
+        return [_project(row, columns) for row in rows[:limit]]
+
+    async def count_by_user(self, user_id: str, status: Optional[str] = None, moderation_status: Optional[str] = None) -> int:
+        return sum(
+            1 for i in self.store.rows("items")
+            if i.get("user_id") == user_id
+            and (not status or i.get("status") == status)
+            and (not moderation_status or i.get("moderation_status") == moderation_status)
+        )
+
+    async def list_missing(self, university_id: int, column: str, columns: str, limit: int, require_image: bool = False) -> List[dict]:
+        return self.store.select("items", lambda i: i.get("university_id") == university_id
+                                 and i.get(column) is None
+                                 and (not require_image or i.get("image_url") is not None), columns)[:limit]
+
+    async def list_pending_enrichment(self, columns: str, limit: int, missing: Optional[str] = None) -> List[dict]:
+        rows = _newest_first([
+            i for i in self.store.rows("items")
+            if i.get("enrichment_status") == "pending" and (missing is None or i.get(missing) is None)
+        ])
+        return [_project(row, columns) for row in rows[:limit]]
+
+    async def page_image_hashes(self, university_id: int, offset: int, limit: int) -> List[dict]:
+        rows = sorted(
+            (i for i in self.store.rows("items") if i.get("university_id") == university_id and i.get("image_hash") is not None),
+            key=lambda i: i["id"]
+        )
+        return [_project(row, "id, image_hash") for row in rows[offset:offset + limit]]
+
+    async def page_image_embeddings(self, university_id: int, offset: int, limit: int) -> List[dict]:
+        rows = _newest_first([
+            i for i in self.store.rows("items")
+            if i.get("university_id") == university_id and i.get("moderation_status") == "approved"
+            and i.get("image_embedding") is not None
+        ])
+        return [_project(row, "title, category, image_embedding") for row in rows[offset:offset + limit]]
+
+    async def match_by_image_embedding(self, university_id: int, embedding: List[float], threshold: float, count: int) -> List[dict]:
+        candidates, vectors = [], []
+        for item in self.store.rows("items"):
+            vector = _embedding(item.get("image_embedding"))
+            if item.get("university_id") == university_id and item.get("moderation_status") == "approved" \
+                    and vector and len(vector) == len(embedding):
+                candidates.append(item)
+                vectors.append(vector)
+        similarities = _cosine(embedding, vectors)
+        ranked = sorted(zip(similarities.tolist(), candidates), key=lambda pair: -pair[0])
+        return [
+            {**_project(item, "id, title, description, status, category, location, image_url, thumbnail_url, ai_tags, created_at, user_id, university_id"),
+             "similarity": similarity}
+            for similarity, item in ranked if similarity >= threshold
+        ][:count]
+
+    async def find_matches_for_lost_item(
+        self, item_id: int, text_weight: float, image_weight: float, threshold: float, count: int
+    ) -> List[dict]:
+        lost = self.store.first("items", lambda i: str(i["id"]) == str(item_id))
+        if not lost:
+            return []
+        lost_text, lost_image = _embedding(lost.get("text_embedding")), _embedding(lost.get("image_embedding"))
+        matches = []
+        for found in self.store.rows("items"):
+            if found.get("university_id") != lost.get("university_id") or found.get("status") != "Found" \
+                    or found.get("moderation_status") != "approved" or found.get("user_id") == lost.get("user_id"):
+                continue
+            found_text, found_image = _embedding(found.get("text_embedding")), _embedding(found.get("image_embedding"))
+            text_score = float(_cosine(lost_text, [found_text])[0]) if lost_text and found_text else None
+            image_score = float(_cosine(lost_image, [found_image])[0]) if lost_image and found_image else None
+            if text_score is None and image_score is None:
+                continue
+            # Without a photo on both sides the text similarity carries the whole score
+            if image_score is None:
+                score = text_score
+            elif text_score is None:
+                score = image_score
+            else:
+                score = text_weight * text_score + image_weight * image_score
+            if score >= threshold:
+                matches.append({
+                    **_project(found, "id, title, description, status, category, location, image_url, thumbnail_url, created_at, user_id"),
+                    "match_score": round(score * 100, 2),
+                })
+        return sorted(matches, key=lambda m: -m["match_score"])[:count]
+
+
+class MemoryProfileRepository(ProfileRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def get(self, user_id: str, columns: str = "*") -> Optional[dict]:
+        return self.store.first("profiles", lambda p: p["id"] == user_id, columns)
+
+    async def get_many(self, user_ids: Sequence[str], columns: str = "*") -> List[dict]:
+        ids = set(user_ids)
+        return self.store.select("profiles", lambda p: p["id"] in ids, columns)
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        return self.store.first("profiles", lambda p: p.get("email") == email, "id")
+
+    async def upsert(self, profile: dict):
+        if not self.store.update("profiles", lambda p: p["id"] == profile["id"], profile):
+            self.store.insert("profiles", [profile])
+
+    async def update(self, user_id: str, changes: dict) -> List[dict]:
+        return self.store.update("profiles", lambda p: p["id"] == user_id, changes)
+
+    async def list_for_university(self, university_id: int, columns: str = "id", role: Optional[str] = None) -> List[dict]:
+        return self.store.select("profiles", lambda p: p.get("university_id") == university_id
+                                 and (not role or p.get("role") == role), columns)
+
+    async def leaderboard(self, university_id: int, limit: int = 10) -> List[dict]:
+        rows = sorted(
+            (p for p in self.store.rows("profiles") if p.get("university_id") == university_id),
+            key=lambda p: -(p.get("successful_returns") or 0)
+        )
+        return [_project(p, "id, full_name, email, avatar_url, successful_returns") for p in rows[:limit]]
+
+    async def clear_push_tokens(self, tokens: Iterable[str]):
+        tokens = set(tokens)
+        self.store.update("profiles", lambda p: p.get("push_token") in tokens, {"push_token": None})
+
+
+class MemoryClaimRepository(ClaimRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def create(self, claim: dict) -> dict:
+        return self.store.insert("claims", [claim])[0]
+
+    async def get_with_item(self, claim_id: int) -> Optional[dict]:
+        claim = self.store.first("claims", lambda c: c["id"] == claim_id)
+        if claim:
+            claim["item"] = self.store.first("items", lambda i: i["id"] == claim["item_id"], "id, title, user_id, university_id")
+        return claim
+
+    async def list_for_item(self, item_id: int, status: Optional[str] = None, with_claimant: bool = False) -> List[dict]:
+        claims = self.store.select("claims", lambda c: c["item_id"] == item_id and (not status or c.get("status") == status))
+        if with_claimant:
+            for claim in claims:
+                claim["claimant"] = self.store.first("profiles", lambda p: p["id"] == claim["claimant_id"], "full_name, email")
+        return claims
+
+    async def set_status(self, claim_id: int, status: str):
+        self.store.update("claims", lambda c: c["id"] == claim_id, {"status": status})
+
+    async def reject_pending(self, item_id: int):
+        self.store.update("claims", lambda c: c["item_id"] == item_id and c.get("status") == "pending", {"status": "rejected"})
+
+
+class MemoryConversationRepository(ConversationRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def get(self, conversation_id: int) -> Optional[dict]:
+        return self.store.first("conversations", lambda c: c["id"] == conversation_id, "id, item_id, finder_id, claimant_id")
+
+    async def find(self, item_id: int, finder_id: str, claimant_id: str) -> Optional[dict]:
+        return self.store.first("conversations", lambda c: c["item_id"] == item_id and c["finder_id"] == finder_id
+                                and c["claimant_id"] == claimant_id, "id")
+
+    async def create(self, item_id: int, finder_id: str, claimant_id: str) -> dict:
+        return self.store.insert("conversations", [{"item_id": item_id, "finder_id": finder_id, "claimant_id": claimant_id}])[0]
+
+    async def delete(self, conversation_id: int):
+        self.store.delete("messages", lambda m: m.get("conversation_id") == conversation_id)
+        self.store.delete("conversations", lambda c: c["id"] == conversation_id)
+
+
+class MemoryNotificationRepository(NotificationRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _selected(self, user_id: str, ids: Optional[Sequence[int]]) -> Callable[[dict], bool]:
+        wanted = set(ids) if ids is not None else None
+        return lambda n: n.get("recipient_id") == user_id and (wanted is None or n["id"] in wanted)
+
+    async def create_many(self, notifications: List[dict]) -> List[dict]:
+        return self.store.insert("notifications", notifications)
+
+    async def count_unread(self, user_id: str) -> int:
+        return sum(1 for n in self.store.rows("notifications") if n.get("recipient_id") == user_id and n.get("status") == "unread")
+
+    async def list_page(self, user_id: str, limit: int, status: Optional[str] = None, before: Optional[dict] = None) -> List[dict]:
+        position = (before["created_at"], before["id"]) if before else None
+        rows = _newest_first([
+            n for n in self.store.rows("notifications")
+            if n.get("recipient_id") == user_id and (not status or n.get("status") == status)
+            and (position is None or (_timestamp(n["created_at"]), n["id"]) < position)
+        ])
+        return [_project(row, "*") for row in rows[:limit]]
+
+    async def mark_read(self, user_id: str, ids: Optional[Sequence[int]] = None) -> List[dict]:
+        selected = self._selected(user_id, ids)
+        return self.store.update("notifications", lambda n: selected(n) and n.get("status") == "unread", {"status": "read"})
+
+    async def delete(self, user_id: str, ids: Optional[Sequence[int]] = None) -> List[dict]:
+        return self.store.delete("notifications", self._selected(user_id, ids))
+
+
+class MemoryBadgeRepository(BadgeRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def get_by_name(self, name: str) -> Optional[dict]:
+        return self.store.first("badges", lambda b: b.get("name") == name, "id")
+
+    async def has_badge(self, user_id: str, badge_id: int) -> bool:
+        return self.store.first("user_badges", lambda ub: ub["user_id"] == user_id and ub["badge_id"] == badge_id, "id") is not None
+
+    async def award(self, user_id: str, badge_id: int):
+        self.store.insert("user_badges", [{"user_id": user_id, "badge_id": badge_id, "earned_at": _now()}])
+
+    async def list_for_user(self, user_id: str) -> List[dict]:
+        # Shaped like user_badges_view: the user_badges row with the badge's details alongside
+        rows = []
+        for earned in self.store.select("user_badges", lambda ub: ub["user_id"] == user_id):
+            badge = self.store.first("badges", lambda b: b["id"] == earned["badge_id"], "name, description, icon_url, criteria") or {}
+            rows.append({**earned, **badge})
+        return sorted(rows, key=lambda r: str(r.get("earned_at") or ""), reverse=True)
+
+    async def list_all(self) -> List[dict]:
+        return sorted(self.store.select("badges"), key=lambda b: b.get("name") or "")
+
+
+class MemoryThankYouNoteRepository(ThankYouNoteRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def create(self, note: dict) -> dict:
+        return self.store.insert("thank_you_notes", [note])[0]
+
+    async def list_for_finder(self, finder_id: str) -> List[dict]:
+        notes = _newest_first(self.store.select("thank_you_notes", lambda n: n.get("finder_id") == finder_id))
+        for note in notes:
+            note["items"] = self.store.first("items", lambda i: str(i["id"]) == str(note.get("item_id")), "title, category")
+            note["profiles"] = self.store.first("profiles", lambda p: p["id"] == note.get("claimant_id"), "full_name, email")
+        return notes
+
+
+class MemorySettingsRepository(SettingsRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def get(self, university_id: int) -> Dict[str, str]:
+        rows = self.store.select("site_settings", lambda s: s.get("university_id") == university_id)
+        return {row["setting_key"]: row["setting_value"] for row in rows}
+
+
+class MemoryUniversityRepository(UniversityRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def get(self, university_id: int) -> Optional[dict]:
+        return self.store.first("universities", lambda u: u["id"] == university_id, "id, name, status")
+
+    async def find_by_name(self, name: str) -> Optional[dict]:
+        return self.store.first("universities", lambda u: u.get("name") == name, "id")
+
+    async def create(self, name: str, status: str) -> dict:
+        return self.store.insert("universities", [{"name": name, "status": status}])[0]
+
+    async def set_status(self, university_id: int, status: str):
+        self.store.update("universities", lambda u: u["id"] == university_id, {"status": status})
+
+    async def delete(self, university_id: int):
+        self.store.delete("allowed_domains", lambda d: d.get("university_id") == university_id)
+        self.store.delete("universities", lambda u: u["id"] == university_id)
+
+    async def list_active(self) -> List[dict]:
+        return sorted(self.store.select("universities", lambda u: u.get("status") == "active", "id, name"), key=lambda u: u["name"])
+
+    async def get_domain(self, domain: str) -> Optional[dict]:
+        row = self.store.first("allowed_domains", lambda d: d.get("domain_name") == domain, "university_id")
+        if row:
+            row["universities"] = self.store.first("universities", lambda u: u["id"] == row["university_id"], "name")
+        return row
+
+    async def add_domain(self, university_id: int, domain: str):
+        if self.store.first("allowed_domains", lambda d: d.get("domain_name") == domain):
+            raise Exception('duplicate key value violates unique constraint "allowed_domains_domain_name_key"')
+        self.store.insert("allowed_domains", [{"university_id": university_id, "domain_name": domain}])
+
+
+class MemoryVerificationRepository(VerificationRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def create(self, verification: dict) -> dict:
+        return self.store.insert("user_verifications", [verification])[0]
+
+    async def get(self, verification_id: int) -> Optional[dict]:
+        return self.store.first("user_verifications", lambda v: v["id"] == verification_id)
+
+    async def list_pending(self, university_id: int) -> List[dict]:
+        return self.store.select("user_verifications", lambda v: v.get("university_id") == university_id
+                                 and v.get("status") == "pending")
+
+    async def set_status(self, verification_id: int, status: str):
+        self.store.update("user_verifications", lambda v: v["id"] == verification_id, {"status": status})
+
+
+class MemoryBackupRepository(BackupRepository):
+    TENANT_TABLES = ["profiles", "items", "allowed_domains", "site_settings", "user_verifications", "notifications"]
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def export_university(self, university_id: int) -> Dict[str, List[dict]]:
+        backup_data = {
+            table: self.store.select(table, lambda row: row.get("university_id") == university_id)
+            for table in self.TENANT_TABLES
+        }
+        item_ids = {item["id"] for item in backup_data["items"]}
+        backup_data["claims"] = self.store.select("claims", lambda c: c.get("item_id") in item_ids)
+        backup_data["conversations"] = self.store.select("conversations", lambda c: c.get("item_id") in item_ids)
+        convo_ids = {convo["id"] for convo in backup_data["conversations"]}
+        backup_data["messages"] = self.store.select("messages", lambda m: m.get("conversation_id") in convo_ids)
+        return backup_data
+
+
+class MemoryRepositories(Repositories):
+    """Every repository over one in-process MemoryStore: the whole API runs without Supabase."""
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self.store = store or MemoryStore()
+        super().__init__(
+            "memory",
+            auth=MemoryAuthRepository(self.store),
+            items=MemoryItemRepository(self.store),
+            profiles=MemoryProfileRepository(self.store),
+            claims=MemoryClaimRepository(self.store),
+            conversations=MemoryConversationRepository(self.store),
+            notifications=MemoryNotificationRepository(self.store),
+            badges=MemoryBadgeRepository(self.store),
+            thank_you_notes=MemoryThankYouNoteRepository(self.store),
+            settings=MemorySettingsRepository(self.store),
+            universities=MemoryUniversityRepository(self.store),
+            verifications=MemoryVerificationRepository(self.store),
+            backups=MemoryBackupRepository(self.store),
+        )
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, **self.store.stats()}
@@ -0,0 +1,442 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.db import Database, db, supabase
+from app.repositories.base import (
+    AuthRepository, BackupRepository, BadgeRepository, ClaimRepository, ConversationRepository,
+    ItemRepository, NotificationRepository, ProfileRepository, Repositories, SettingsRepository,
+    ThankYouNoteRepository, UniversityRepository, VerificationRepository
+)
+
+
+def _first(res) -> Optional[dict]:
+    return res.data[0] if res.data else None
+
+
+class SupabaseAuthRepository(AuthRepository):
+    async def get_user_id(self, token: str) -> Optional[str]:
+        user_response = await db.run(supabase.auth.get_user, token)
+        return user_response.user.id if user_response and user_response.user else None
+
+    async def sign_up(self, credentials: dict):
+        return await db.run(supabase.auth.sign_up, credentials)
+
+    async def delete_user(self, user_id: str):
+        await db.run(supabase.auth.admin.delete_user, user_id)
+
+
+class SupabaseItemRepository(ItemRepository):
+    async def get(self, item_id: int, columns: str = "*") -> Optional[dict]:
+        return _first(await db.execute(supabase.table("items").select(columns).eq("id", item_id).limit(1)))
+
+    async def get_many(self, item_ids: Sequence[int], columns: str = "*", moderation_status: Optional[str] = None) -> List[dict]:
+        query = supabase.table("items").select(columns).in_("id", list(item_ids))
+        if moderation_status:
+            query = query.eq("moderation_status", moderation_status)
+        return (await db.execute(query)).data or []
+
+    async def create(self, item: dict) -> dict:
+        return (await db.execute(supabase.table("items").insert(item))).data[0]
+
+    async def update(self, item_id: int, changes: dict) -> List[dict]:
+        return (await db.execute(supabase.table("items").update(changes).eq("id", item_id))).data or []
+
+    async def list_approved(
+        self,
+        university_id: int,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        search: Optional[str] = None,
+        exclude_user_id: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        count: bool = False,
+    ) -> Tuple[List[dict], Optional[int]]:
+        query = supabase.table("items").select(
+            "*, profiles(id, full_name, email)",
+            count="exact" if count else None
+        ).eq("university_id", university_id).eq("moderation_status", "approved")
+        if status:
+            query = query.eq("status", status)
+        if category:
+            query = query.eq("category", category)
+        if search:
+            query = query.or_(f"title.ilike.%{search}%,description.ilike.%{search}%")
+        if exclude_user_id:
+            query = query.neq("user_id", exclude_user_id)
+        res = await db.execute(query.order("created_at", desc=True).range(offset, offset + limit - 1))
+        return res.data or [], res.count
+
+    async def list_by_university(
+        self, university_id: int, columns: str = "*", status: Optional[str] = None, moderation_status: Optional[str] = None
+    ) -> List[dict]:
+        query = supabase.table("items").select(columns).eq("university_id", university_id)
+        if status:
+            query = query.eq("status", status)
+        if moderation_status:
+            query = query.eq("moderation_status", moderation_status)
+        return (await db.execute(query)).data or []
+
+    async def list_by_user(
+        self,
+        user_id: str,
+        columns: str = "*",
+        status: Optional[str] = None,
+        moderation_status: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        query = supabase.table("items").select(columns).eq("user_id", user_id)
+        if status:
+            query = query.eq("status", status)
+        if moderation_status:
+            query = query.eq("moderation_status", moderation_status)
+        query = query.order("created_at", desc=True)
+        if limit:
+            query = query.limit(limit)
+        return (await db.execute(query)).data or []
+
+    async def count_by_user(self, user_id: str, status: Optional[str] = None, moderation_status: Optional[str] = None) -> int:
+        query = supabase.table("items").select("id", count="exact", head=True).eq("user_id", user_id)
+        if status:
+            query = query.eq("status", status)
+        if moderation_status:
+            query = query.eq("moderation_status", moderation_status)
+        return (await db.execute(query)).count or 0
+
+    async def list_missing(self, university_id: int, column: str, columns: str, limit: int, require_image: bool = False) -> List[dict]:
+        query = supabase.table("items").select(columns).eq("university_id", university_id).is_(column, "null")
+        if require_image:
+            query = query.not_.is_("image_url", "null")
+        return (await db.execute(query.limit(limit))).data or []
+
+    async def list_pending_enrichment(self, columns: str, limit: int, missing: Optional[str] = None) -> List[dict]:
+        query = supabase.table("items").select(columns).eq("enrichment_status", "pending")
+        if missing:
+            query = query.is_(missing, "null")
+        return (await db.execute(query.order("created_at", desc=True).limit(limit))).data or []
+
+    async def page_image_hashes(self, university_id: int, offset: int, limit: int) -> List[dict]:
+        return (await db.execute(
+            supabase.table("items").select("id, image_hash")
+            .eq("university_id", university_id)
+            .not_.is_("image_hash", "null")
+            .order("id")
+            .range(offset, offset + limit - 1)
+        )).data or []
+
+    async def page_image_embeddings(self, university_id: int, offset: int, limit: int) -> List[dict]:
+        return (await db.execute(
+            supabase.table("items").select("title, category, image_embedding")
+            .eq("university_id", university_id)
+            .eq("moderation_status", "approved")
+            .not_.is_("image_embedding", "null")
+            .order("created_at", desc=True)
+            .range(offset, offset + limit - 1)
+        )).data or []
+
+    async def match_by_image_embedding(self, university_id: int, embedding: List[float], threshold: float, count: int) -> List[dict]:
+        return (await db.execute(supabase.rpc("match_items_by_image_embedding", {
+            "p_university_id": university_id,
+            "p_query_embedding": embedding,
+            "p_match_threshold": threshold,
+            "p_match_count": count
+        }))).data or []
+
+    async def find_matches_for_lost_item(
+        self, item_id: int, text_weight: float, image_weight: float, threshold: float, count: int
+    ) -> List[dict]:
+        return (await db.execute(supabase.rpc("find_matches_for_lost_item", {
+            "p_item_id": item_id,
+            "p_text_weight": text_weight,
+            "p_image_weight": image_weight,
+            "p_match_threshold": threshold,
+            "p_match_count": count
+        }))).data or []
+
+
+class SupabaseProfileRepository(ProfileRepository):
+    async def get(self, user_id: str, columns: str = "*") -> Optional[dict]:
+        return _first(await db.execute(supabase.table("profiles").select(columns).eq("id", user_id).limit(1)))
+
+    async def get_many(self, user_ids: Sequence[str], columns: str = "*") -> List[dict]:
+        return (await db.execute(supabase.table("profiles").select(columns).in_("id", list(user_ids)))).data or []
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        return _first(await db.execute(supabase.table("profiles").select("id").eq("email", email).limit(1)))
+
+    async def upsert(self, profile: dict):
+        await db.execute(supabase.table("profiles").upsert(profile))
+
+    async def update(self, user_id: str, changes: dict) -> List[dict]:
+        return (await db.execute(supabase.table("profiles").update(changes).eq("id", user_id))).data or []
+
+    async def list_for_university(self, university_id: int, columns: str = "id", role: Optional[str] = None) -> List[dict]:
+        query = supabase.table("profiles").select(columns).eq("university_id", university_id)
+        if role:
+            query = query.eq("role", role)
+        return (await db.execute(query)).data or []
+
+    async def leaderboard(self, university_id: int, limit: int = 10) -> List[dict]:
+        # Try RPC first, fallback to direct query if it fails
+        try:
+            return (await db.execute(supabase.rpc("get_leaderboard_for_university", {
+                "p_university_id": university_id,
+                "p_limit": limit
+            }))).data or []
+        except Exception as rpc_error:
+            print(f"Leaderboard RPC error (trying fallback): {str(rpc_error)}")
+            return (await db.execute(
+                supabase.table("profiles")
+                .select("id, full_name, email, avatar_url, successful_returns")
+                .eq("university_id", university_id)
+                .order("successful_returns", desc=True)
+                .limit(limit)
+            )).data or []
+
+    async def clear_push_tokens(self, tokens: Iterable[str]):
+        await db.execute(supabase.table("profiles").update({"push_token": None}).in_("push_token", list(tokens)))
+
+
+class SupabaseClaimRepository(ClaimRepository):
+    async def create(self, claim: dict) -> dict:
+        return (await db.execute(supabase.table("claims").insert(claim))).data[0]
+
+    async def get_with_item(self, claim_id: int) -> Optional[dict]:
+        return _first(await db.execute(
+            supabase.table("claims").select("*, item:items(id, title, user_id, university_id)").eq("id", claim_id).limit(1)
+        ))
+
+    async def list_for_item(self, item_id: int, status: Optional[str] = None, with_claimant: bool = False) -> List[dict]:
+        columns = "*, claimant:profiles!claimant_id(full_name, email)" if with_claimant else "*"
+        query = supabase.table("claims").select(columns).eq("item_id", item_id)
+        if status:
+            query = query.eq("status", status)
+        return (await db.execute(query)).data or []
+
+    async def set_status(self, claim_id: int, status: str):
+        await db.execute(supabase.table("claims").update({"status": status}).eq("id", claim_id))
+
+    async def reject_pending(self, item_id: int):
+        await db.execute(supabase.table("claims").update({"status": "rejected"}).eq("item_id", item_id).eq("status", "pending"))
+
+
+class SupabaseConversationRepository(ConversationRepository):
+    async def get(self, conversation_id: int) -> Optional[dict]:
+        return _first(await db.execute(
+            supabase.table("conversations").select("id, item_id, finder_id, claimant_id").eq("id", conversation_id).limit(1)
+        ))
+
+    async def find(self, item_id: int, finder_id: str, claimant_id: str) -> Optional[dict]:
+        return _first(await db.execute(
+            supabase.table("conversations")
+            .select("id")
+            .eq("item_id", item_id)
+            .eq("finder_id", finder_id)
+            .eq("claimant_id", claimant_id)
+            .limit(1)
+        ))
+
+    async def create(self, item_id: int, finder_id: str, claimant_id: str) -> dict:
+        return (await db.execute(supabase.table("conversations").insert({
+            "item_id": item_id,
+            "finder_id": finder_id,
+            "claimant_id": claimant_id
+        }))).data[0]
+
+    async def delete(self, conversation_id: int):
+        # Messages first, then the conversation they belong to
+        await db.execute(supabase.table("messages").delete().eq("conversation_id", conversation_id))
+        await db.execute(supabase.table("conversations").delete().eq("id", conversation_id))
+
+
+class SupabaseNotificationRepository(NotificationRepository):
+    async def create_many(self, notifications: List[dict]) -> List[dict]:
+        return (await db.execute(supabase.table("notifications").insert(notifications))).data or []
+
+    async def count_unread(self, user_id: str) -> int:
+        return (await db.execute(
+            supabase.table("notifications").select("id", count="exact", head=True)
+            .eq("recipient_id", user_id).eq("status", "unread")
+        )).count or 0
+
+    async def list_page(self, user_id: str, limit: int, status: Optional[str] = None, before: Optional[dict] = None) -> List[dict]:
+        query = supabase.table("notifications").select("*").eq("recipient_id", user_id)
+        if status:
+            query = query.eq("status", status)
+        if before:
+            created_at = before["created_at"].isoformat()
+            query = query.or_(
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{before["id"]})'
+            )
+        return (await db.execute(query.order("created_at", desc=True).order("id", desc=True).limit(limit))).data or []
+
+    async def mark_read(self, user_id: str, ids: Optional[Sequence[int]] = None) -> List[dict]:
+        query = supabase.table("notifications").update({"status": "read"}).eq("recipient_id", user_id).eq("status", "unread")
+        if ids is not None:
+            query = query.in_("id", list(ids))
+        return (await db.execute(query)).data or []
+
+    async def delete(self, user_id: str, ids: Optional[Sequence[int]] = None) -> List[dict]:
+        query = supabase.table("notifications").delete().eq("recipient_id", user_id)
+        if ids is not None:
+            query = query.in_("id", list(ids))
+        return (await db.execute(query)).data or []
+
+
+class SupabaseBadgeRepository(BadgeRepository):
+    async def get_by_name(self, name: str) -> Optional[dict]:
+        return _first(await db.execute(supabase.table("badges").select("id").eq("name", name).limit(1)))
+
+    async def has_badge(self, user_id: str, badge_id: int) -> bool:
+        res = await db.execute(supabase.table("user_badges").select("id").eq("user_id", user_id).eq("badge_id", badge_id).limit(1))
+        return bool(res.data)
+
+    async def award(self, user_id: str, badge_id: int):
+        await db.execute(supabase.table("user_badges").insert({"user_id": user_id, "badge_id": badge_id}))
+
+    async def list_for_user(self, user_id: str) -> List[dict]:
+        try:
+            return (await db.execute(
+                supabase.from_("user_badges_view").select("*").eq("user_id", user_id).order("earned_at", desc=True)
+            )).data or []
+        except Exception as view_error:
+            # If view doesn't exist, try direct table query as fallback
+            print(f"Badges view error (trying fallback): {str(view_error)}")
+            return (await db.execute(
+                supabase.table("user_badges").select("*, badges(name, description, icon_url, criteria)")
+                .eq("user_id", user_id).order("earned_at", desc=True)
+            )).data or []
+
+    async def list_all(self) -> List[dict]:
+        return (await db.execute(supabase.table("badges").select("*").order("name"))).data or []
+
+
+class SupabaseThankYouNoteRepository(ThankYouNoteRepository):
+    async def create(self, note: dict) -> dict:
+        return (await db.execute(supabase.table("thank_you_notes").insert(note))).data[0]
+
+    async def list_for_finder(self, finder_id: str) -> List[dict]:
+        try:
+            return (await db.execute(
+                supabase.from_("thank_you_notes_view").select("*").eq("finder_id", finder_id).order("created_at", desc=True)
+            )).data or []
+        except Exception as view_error:
+            # If view doesn't exist, try direct table query as fallback
+            print(f"Thank you notes view error (trying fallback): {str(view_error)}")
+            return (await db.execute(
+                supabase.table("thank_you_notes").select(
+                    "*, items(title, category), profiles!thank_you_notes_sender_id_fkey(full_name, email)"
+                ).eq("finder_id", finder_id).order("created_at", desc=True)
+            )).data or []
+
+
+class SupabaseSettingsRepository(SettingsRepository):
+    async def get(self, university_id: int) -> Dict[str, str]:
+        res = await db.execute(
+            supabase.table("site_settings").select("setting_key, setting_value").eq("university_id", university_id)
+        )
+        return {row["setting_key"]: row["setting_value"] for row in res.data or []}
+
+
+class SupabaseUniversityRepository(UniversityRepository):
+    async def get(self, university_id: int) -> Optional[dict]:
+        return _first(await db.execute(supabase.table("universities").select("id, name, status").eq("id", university_id).limit(1)))
+
+    async def find_by_name(self, name: str) -> Optional[dict]:
+        return _first(await db.execute(supabase.table("universities").select("id").eq("name", name).limit(1)))
+
+    async def create(self, name: str, status: str) -> dict:
+        return (await db.execute(supabase.table("universities").insert({"name": name, "status": status}))).data[0]
+
+    async def set_status(self, university_id: int, status: str):
+        await db.execute(supabase.table("universities").update({"status": status}).eq("id", university_id))
+
+    async def delete(self, university_id: int):
+        await db.execute(supabase.table("universities").delete().eq("id", university_id))
+
+    async def list_active(self) -> List[dict]:
+        return (await db.execute(supabase.table("universities").select("id, name").eq("status", "active").order("name"))).data or []
+
+    async def get_domain(self, domain: str) -> Optional[dict]:
+        return _first(await db.execute(
+            supabase.table("allowed_domains").select("university_id, universities(name)").eq("domain_name", domain).limit(1)
+        ))
+
+    async def add_domain(self, university_id: int, domain: str):
+        await db.execute(supabase.table("allowed_domains").insert({"university_id": university_id, "domain_name": domain}))
+
+
+class SupabaseVerificationRepository(VerificationRepository):
+    async def create(self, verification: dict) -> dict:
+        return (await db.execute(supabase.table("user_verifications").insert(verification))).data[0]
+
+    async def get(self, verification_id: int) -> Optional[dict]:
+        return _first(await db.execute(supabase.table("user_verifications").select("*").eq("id", verification_id).limit(1)))
+
+    async def list_pending(self, university_id: int) -> List[dict]:
+        return (await db.execute(
+            supabase.table("user_verifications").select("*").eq("university_id", university_id).eq("status", "pending")
+        )).data or []
+
+    async def set_status(self, verification_id: int, status: str):
+        await db.execute(supabase.table("user_verifications").update({"status": status}).eq("id", verification_id))
+
+
+class SupabaseBackupRepository(BackupRepository):
+    # Tables that have direct university_id foreign key
+    TENANT_TABLES = ["profiles", "items", "allowed_domains", "site_settings", "user_verifications", "notifications"]
+
+    async def _select_in(self, table: str, column: str, values: list) -> List[dict]:
+        if not values:
+            return []
+        try:
+            return (await db.execute(supabase.table(table).select("*").in_(column, values))).data or []
+        except Exception as e:
+            print(f"Error fetching {table}: {e}")
+            return []
+
+    async def export_university(self, university_id: int) -> Dict[str, List[dict]]:
+        backup_data = {}
+        for table in self.TENANT_TABLES:
+            try:
+                backup_data[table] = (await db.execute(supabase.table(table).select("*").eq("university_id", university_id))).data or []
+            except Exception as e:
+                print(f"Error fetching {table}: {e}")
+                backup_data[table] = []
+
+        # Claims and conversations hang off the university's items, messages off its conversations
+        item_ids = [item["id"] for item in backup_data["items"] if "id" in item]
+        backup_data["claims"] = await self._select_in("claims", "item_id", item_ids)
+        backup_data["conversations"] = await self._select_in("conversations", "item_id", item_ids)
+        convo_ids = [convo["id"] for convo in backup_data["conversations"] if "id" in convo]
+        backup_data["messages"] = await self._select_in("messages", "conversation_id", convo_ids)
+        return backup_data
+
+
+class SupabaseRepositories(Repositories):
+    def __init__(self, database: Database):
+        super().__init__(
+            "supabase",
+            auth=SupabaseAuthRepository(),
+            items=SupabaseItemRepository(),
+            profiles=SupabaseProfileRepository(),
+            claims=SupabaseClaimRepository(),
+            conversations=SupabaseConversationRepository(),
+            notifications=SupabaseNotificationRepository(),
+            badges=SupabaseBadgeRepository(),
+            thank_you_notes=SupabaseThankYouNoteRepository(),
+            settings=SupabaseSettingsRepository(),
+            universities=SupabaseUniversityRepository(),
+            verifications=SupabaseVerificationRepository(),
+            backups=SupabaseBackupRepository(),
+        )
+        self.database = database
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, **self.database.stats()}
+
+    def close(self):
+        self.database.shutdown()
+
+
+def create_supabase_repositories() -> SupabaseRepositories:
+    return SupabaseRepositories(db)
@@ -0,0 +1,317 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import backoff
+import httpx
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.metrics import external_call
+from app.rate_limit import jina_limiter
+from app.timing import span
+
+settings = get_settings()
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    GEMINI_RETRYABLE: Tuple[Type[BaseException], ...] = (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.TooManyRequests,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )
+except ImportError:
+    GEMINI_RETRYABLE = ()
+
+# Failures that happen before the request reaches the provider; safe to retry even for non-idempotent calls
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class ProviderUnavailable(HTTPException):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"The {provider} service is temporarily unavailable. Please try again shortly.",
+            headers={"Retry-After": str(max(1, int(retry_after)))},
+        )
+        self.provider = provider
+
+
+class RetryableStatus(Exception):
+    """An HTTP status worth retrying (429 / 5xx); raise it from the wrapped call."""
+
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(f"HTTP {status_code}: {message[:200]}")
+        self.status_code = status_code
+
+
+def raise_for_retryable_status(response: httpx.Response) -> httpx.Response:
+    """Turn 429/5xx into RetryableStatus and other 4xx into HTTPStatusError."""
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RetryableStatus(response.status_code, response.text)
+    response.raise_for_status()
+    return response
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `recovery_seconds`. Then one trial call is let through (half-open): success
+    closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.opened = 0
+
+    @property
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.recovery_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.retry_after <= 0:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        """The call finished without telling us anything about provider health."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self._failures = 0
+        self._trial_in_flight = False
+        self.state = "closed"
+
+    def record_failure(self):
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Recent successful call latencies, for the hedging delay and stats."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# Registry of every provider created in this process, used for stats reporting
+_providers: Dict[str, "ResilientProvider"] = {}
+
+
+class ResilientProvider:
+    """
+    Call policy for one external provider: a per-attempt timeout, retries with
+    jittered exponential backoff on `retry_on` errors, an optional hedged second
+    request once an attempt is slower than the recent p95, and a circuit breaker
+    that fails fast while the provider is down. Only enable retries beyond
+    CONNECT_ERRORS, `retry_on_timeout` and hedging for idempotent calls: a timed-out
+    request may still have been processed. `hedge_slot` is entered around each hedged
+    request, so hedges count against the provider's rate limit like any other call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        max_tries: int = 3,
+        retry_on: Tuple[Type[BaseException], ...] = CONNECT_ERRORS,
+        retry_on_timeout: bool = False,
+        hedge: bool = False,
+        hedge_slot: Optional[Callable[[], AsyncContextManager]] = None,
+        hedge_min_delay: float = 0.05,
+        hedge_max_delay: float = 10.0,
+        max_backoff: float = 8.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_tries = max_tries
+        self.retry_on = tuple(retry_on) + ((asyncio.TimeoutError,) if retry_on_timeout else ())
+        # Timeouts count against the breaker whether or not they are retried
+        self.failure_on = self.retry_on + (asyncio.TimeoutError,)
+        self.hedge = hedge
+        self.hedge_slot = hedge_slot
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.short_circuited = 0
+        _providers[name] = self
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` under this provider's policy."""
+        self.calls += 1
+
+        def on_backoff(details):
+            self.retries += 1
+            print(f"🔁 {self.name}: retrying after {details['exception']!r} (try {details['tries']})")
+
+        @backoff.on_exception(
+            backoff.expo,
+            self.retry_on,
+            max_tries=self.max_tries,
+            max_value=self.max_backoff,
+            jitter=backoff.full_jitter,
+            giveup=lambda _e: self.breaker.state == "open",
+            on_backoff=on_backoff,
+        )
+        async def attempt():
+            if not self.breaker.allow():
+                self.short_circuited += 1
+                raise ProviderUnavailable(self.name, self.breaker.retry_after)
+            try:
+                result = await self._attempt(fn, args, kwargs)
+            except self.failure_on:
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # Any other outcome (e.g. a 4xx) means the provider answered; don't hold the trial slot
+                self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+
+        try:
+            with span(self.name), external_call(self.name):
+                return await attempt()
+        except self.failure_on:
+            self.failures += 1
+            raise
+
+    async def _timed(self, fn, args, kwargs) -> Any:
+        started = time.monotonic()
+        result = await asyncio.wait_for(fn(*args, **kwargs), self.timeout)
+        self.latency.add(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, fn, args, kwargs) -> Any:
+        if self.hedge_slot is None:
+            return await self._timed(fn, args, kwargs)
+        async with self.hedge_slot():
+            return await self._timed(fn, args, kwargs)
+
+    async def _attempt(self, fn, args, kwargs) -> Any:
+        if not self.hedge or self.latency.count < 20:
+            return await self._timed(fn, args, kwargs)
+
+        delay = min(self.hedge_max_delay, max(self.hedge_min_delay, self.latency.quantile(0.95)))
+        primary = asyncio.ensure_future(self._timed(fn, args, kwargs))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            # Slower than usual: race a second identical request against the first
+            self.hedged += 1
+            hedge = asyncio.ensure_future(self._hedged(fn, args, kwargs))
+            tasks.add(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both failed; report the primary's error (the hedge may only have been refused a slot)
+            raise primary.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "short_circuited": self.short_circuited,
+            "breaker_opened": self.breaker.opened,
+            "p50_ms": round(self.latency.quantile(0.5) * 1000, 1),
+            "p95_ms": round(self.latency.quantile(0.95) * 1000, 1),
+        }
+
+
+def all_provider_stats() -> dict:
+    """Stats for every registered provider, keyed by provider name."""
+    return {name: provider.stats() for name, provider in list(_providers.items())}
+
+
+def _breaker() -> CircuitBreaker:
+    return CircuitBreaker(settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD, settings.CIRCUIT_BREAKER_RECOVERY_SECONDS)
+
+
+# Embeddings are idempotent: retry any transient error (timeouts too) and hedge slow requests
+jina_provider = ResilientProvider(
+    "jina",
+    timeout=settings.JINA_TIMEOUT_SECONDS,
+    max_tries=settings.JINA_MAX_TRIES,
+    retry_on=(httpx.TransportError, RetryableStatus),
+    retry_on_timeout=True,
+    hedge=settings.JINA_HEDGE,
+    hedge_slot=jina_limiter.slot,
+    breaker=_breaker(),
+)
+
+# Generation is idempotent but billed per token: retry (timeouts too), never hedge
+gemini_provider = ResilientProvider(
+    "gemini",
+    timeout=settings.GEMINI_TIMEOUT_SECONDS,
+    max_tries=settings.GEMINI_MAX_TRIES,
+    retry_on=GEMINI_RETRYABLE,
+    retry_on_timeout=True,
+    breaker=_breaker(),
+)
+
+# reCAPTCHA tokens are single-use: only retry requests that never reached Google (not timeouts)
+recaptcha_provider = ResilientProvider("recaptcha", timeout=10.0, max_tries=2, breaker=_breaker())
+
+# Expo asks clients to retry 429/5xx with backoff; a timed-out send may have been delivered, so no timeout retries
+expo_provider = ResilientProvider(
+    "expo", timeout=15.0, max_tries=3, retry_on=CONNECT_ERRORS + (RetryableStatus,), breaker=_breaker()
+)
+
+# Sending email is not idempotent: timeout and breaker only
+resend_provider = ResilientProvider("resend", timeout=15.0, max_tries=1, breaker=_breaker())
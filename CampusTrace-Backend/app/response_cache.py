@@ -0,0 +1,113 @@
+import json
+import hashlib
+import inspect
+from functools import wraps
+from typing import Iterable, NamedTuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from app.cache import TTLCache, invalidate_tags
+from app.config import get_settings
+from app.timing import span
+
+settings = get_settings()
+
+# Keyword arguments that identify the caller / tenant, in lookup order per scope
+_SCOPE_KWARGS = {
+    "user": ("user_id", "current_user_id", "admin_id", "claimant_id", "finder_id"),
+    "university": ("university_id",),
+    "shared": (),
+}
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+response_cache = TTLCache(
+    name="http_responses",
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    sizeof=lambda entry: len(entry.body) + 128,
+)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Compare ignoring the weak validator prefix, as allowed for If-None-Match
+    wanted = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == wanted for candidate in if_none_match.split(","))
+
+
+def _build_response(entry: CachedResponse, request: Request, cache_status: str) -> Response:
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": "private, no-cache",
+        "X-Cache": cache_status,
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def cached_response(ttl: int, scope: str = "user", tags: Iterable[str] = ()):
+    """
+    Cache a JSON GET endpoint in-process and answer conditional requests with 304.
+    - scope: "user" keys on the authenticated user, "university" on the tenant, "shared" on the URL only.
+    - tags: format strings filled from the endpoint's kwargs (e.g. "badges:user:{target_user_id}"),
+      so write endpoints can call `invalidate_tags(...)` to drop stale entries.
+    """
+    if scope not in _SCOPE_KWARGS:
+        raise ValueError(f"Unknown cache scope: {scope}")
+    tags = tuple(tags)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        inject_request = "request" not in signature.parameters
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs.pop("request") if inject_request else kwargs["request"]
+
+            identity = ""
+            for name in _SCOPE_KWARGS[scope]:
+                if kwargs.get(name) is not None:
+                    identity = str(kwargs[name])
+                    break
+            query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+            key = f"{scope}:{identity}:{request.url.path}?{query}"
+
+            entry = response_cache.get(key)
+            if entry is not None:
+                return _build_response(entry, request, "HIT")
+
+            if not inject_request:
+                kwargs["request"] = request
+            result = await func(*args, **kwargs)
+            if isinstance(result, Response):
+                return result  # Handlers that build their own response are passed through untouched
+
+            with span("serialize"):
+                body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode("utf-8")
+            etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            entry = CachedResponse(body, etag)
+            resolved_tags = [tag.format(**kwargs) for tag in tags]
+            response_cache.set(key, entry, ttl=ttl, tags=resolved_tags)
+            return _build_response(entry, request, "MISS")
+
+        if inject_request:
+            params = list(signature.parameters.values())
+            params.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+            wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
+
+    return decorator
+
+
+__all__ = ["cached_response", "invalidate_tags", "response_cache"]
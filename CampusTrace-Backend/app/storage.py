@@ -0,0 +1,134 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import backoff
+import httpx
+
+from app.config import get_settings
+from app.metrics import external_call
+from app.timing import span
+
+settings = get_settings()
+
+
+class StorageError(Exception):
+    """Raised when Supabase Storage rejects a request."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Storage error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class TransientStorageError(StorageError):
+    """A storage failure worth retrying (429 / 5xx)."""
+
+
+class AsyncStorage:
+    """
+    Async client for Supabase Storage over one pooled HTTP connection.
+    Uploads retry transient failures with jittered backoff, several files can be
+    uploaded in parallel, and public URLs are built locally instead of via an API call.
+    """
+
+    def __init__(self, supabase_url: str, service_key: str, max_connections: int = 20, max_tries: int = 3):
+        self.base_url = f"{supabase_url.rstrip('/')}/storage/v1"
+        self.service_key = service_key
+        self.max_connections = max_connections
+        self.max_tries = max_tries
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.service_key}", "apikey": self.service_key},
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def public_url(self, bucket: str, path: str) -> str:
+        """Public URL of an object in a public bucket (same format as get_public_url)."""
+        return f"{self.base_url}/object/public/{bucket}/{quote(path)}"
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        @backoff.on_exception(
+            backoff.expo,
+            (httpx.TransportError, TransientStorageError),
+            max_tries=self.max_tries,
+            jitter=backoff.full_jitter,
+        )
+        async def send():
+            response = await self.client.request(method, url, **kwargs)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise TransientStorageError(response.status_code, response.text)
+            if response.status_code >= 400:
+                raise StorageError(response.status_code, response.text)
+            return response
+
+        with span("storage"), external_call("supabase", "storage"):
+            return await send()
+
+    async def upload(self, bucket: str, path: str, data: bytes, content_type: str = "application/octet-stream", upsert: bool = False) -> str:
+        """Upload one object and return its public URL."""
+        await self._request(
+            "POST",
+            f"/object/{bucket}/{quote(path)}",
+            content=data,
+            headers={"Content-Type": content_type, "x-upsert": "true" if upsert else "false"},
+        )
+        return self.public_url(bucket, path)
+
+    async def upload_many(self, files: Iterable[Tuple[str, str, bytes, str]], upsert: bool = False) -> List[str]:
+        """
+        Upload (bucket, path, data, content_type) tuples in parallel; returns public URLs in order.
+        If any upload fails, the ones that succeeded are removed again before the error is raised.
+        """
+        files = list(files)
+        results = await asyncio.gather(*(
+            self.upload(bucket, path, data, content_type, upsert=upsert) for bucket, path, data, content_type in files
+        ), return_exceptions=True)
+        error = next((result for result in results if isinstance(result, BaseException)), None)
+        if error is None:
+            return list(results)
+
+        uploaded: Dict[str, List[str]] = {}
+        for (bucket, path, _, _), result in zip(files, results):
+            if not isinstance(result, BaseException):
+                uploaded.setdefault(bucket, []).append(path)
+        for bucket, paths in uploaded.items():
+            try:
+                await self.remove(bucket, paths)
+            except (StorageError, httpx.HTTPError) as e:
+                print(f"Could not remove orphaned uploads {paths}: {e}")
+        raise error
+
+    async def remove(self, bucket: str, paths: List[str]):
+        await self._request("DELETE", f"/object/{bucket}", json={"prefixes": paths})
+
+    async def download(self, bucket: str, path: str) -> bytes:
+        response = await self._request("GET", f"/object/{bucket}/{quote(path)}")
+        return response.content
+
+    async def list(self, bucket: str, prefix: str, limit: int = 1000) -> List[dict]:
+        response = await self._request(
+            "POST",
+            f"/object/list/{bucket}",
+            json={"prefix": prefix, "limit": limit, "offset": 0, "sortBy": {"column": "name", "order": "desc"}},
+        )
+        return response.json()
+
+
+storage = AsyncStorage(
+    settings.PYTHON_SUPABASE_URL,
+    settings.PYTHON_SUPABASE_KEY,
+    max_connections=settings.STORAGE_MAX_CONNECTIONS,
+    max_tries=settings.STORAGE_UPLOAD_MAX_TRIES,
+)
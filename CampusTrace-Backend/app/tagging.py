@@ -0,0 +1,175 @@
+import re
+import asyncio
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.cache import TTLCache
+from app.rate_limit import ProviderLimiter
+from app.resilience import gemini_provider
+
+MAX_TAGS = 7
+
+TAG_PROMPT = """
+        Generate 5-7 relevant, comma-separated keywords (tags) for a lost or found item in a Philippine university.
+        Include item type, color, brand, and potential Taglish (Tagalog-English) terms.
+        Do not use hashtags.
+
+        Title: '{title}'
+        Description: '{description}'
+
+        Example:
+        Title: 'Black Jansport backpack'
+        Description: 'Naiwan sa library, may libro sa loob.'
+        Tags: backpack, itim, jansport, bag, library, libro
+        """
+
+BATCH_TAG_PROMPT = """
+        Generate 5-7 relevant, comma-separated keywords (tags) for EACH of the lost or found items below,
+        posted in a Philippine university. Include item type, color, brand, and potential Taglish
+        (Tagalog-English) terms. Do not use hashtags.
+
+        Answer with exactly one line per item, in the form "<number>: tag, tag, tag".
+
+        Example:
+        1. Title: 'Black Jansport backpack' Description: 'Naiwan sa library, may libro sa loob.'
+        Answer:
+        1: backpack, itim, jansport, bag, library, libro
+
+        Items:
+        {items}
+        """
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_BATCH_LINE = re.compile(r"^\s*(?:item\s*)?(\d+)\s*[:.)\-]\s*(.+)$", re.IGNORECASE)
+
+
+def normalize_tag_text(title: str, description: str) -> str:
+    """Cache key for a title/description pair: case, punctuation and spacing do not change the tags."""
+    text = f"{title or ''}\n{description or ''}".lower()
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text)).strip()
+
+
+def parse_tags(text: str) -> List[str]:
+    tags_string = text.strip().replace("#", "")
+    if tags_string.lower().startswith("tags:"):
+        tags_string = tags_string[5:]
+    tags_list = [tag.strip().lower() for tag in tags_string.split(',') if tag.strip()]
+    return tags_list[:MAX_TAGS]
+
+
+def parse_batch_tags(text: str, count: int) -> Dict[int, List[str]]:
+    """Parse "<n>: tags" lines of a batch answer into {item index (0-based): tags}."""
+    results = {}
+    for line in text.splitlines():
+        match = _BATCH_LINE.match(line)
+        if not match:
+            continue
+        index = int(match.group(1)) - 1
+        if 0 <= index < count and index not in results:
+            tags = parse_tags(match.group(2))
+            if tags:
+                results[index] = tags
+    return results
+
+
+class AITagger:
+    """
+    Gemini tag generation with a normalized-text cache, sharing the Gemini provider
+    limiter with the other Gemini features. `tag_many` tags up to `batch_size` items
+    per prompt for backfills and bulk imports; items missing from a batch answer are
+    retried one at a time, but a failed batch call fails all of its items.
+    Failures (including limiter and circuit-breaker 503s) are returned as None, so
+    callers can tell them apart from an answer with no tags ([]).
+    """
+
+    def __init__(self, limiter: ProviderLimiter, cache_ttl: float = 86400, cache_entries: int = 10000, batch_size: int = 20):
+        self.model = None  # Set on startup once Gemini is configured
+        self.batch_size = batch_size
+        self.cache = TTLCache("ai_tags", max_entries=cache_entries, default_ttl=cache_ttl)
+        self.limiter = limiter
+        self.gemini_calls = 0
+        self.batch_calls = 0
+        self.failures = 0
+
+    async def _generate(self, prompt: str) -> str:
+        async with self.limiter.slot():
+            self.gemini_calls += 1
+            response = await gemini_provider.call(self.model.generate_content_async, prompt)
+        return response.text
+
+    async def tag(self, title: str, description: str) -> Optional[List[str]]:
+        if not self.model:
+            return []
+        key = normalize_tag_text(title, description)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return list(cached)
+        try:
+            tags = parse_tags(await self._generate(TAG_PROMPT.format(title=title, description=description)))
+        except Exception as e:
+            self.failures += 1
+            print(f"Error generating AI tags: {e}")
+            return None
+        if tags:
+            # Failures are not cached so the next post with this text tries again
+            self.cache.set(key, tuple(tags))
+        return tags
+
+    async def tag_many(self, items: Sequence[Tuple[str, str]]) -> List[Optional[List[str]]]:
+        """Tags for each (title, description) pair, in order (None where tagging failed)."""
+        if not self.model:
+            return [[] for _ in items]
+
+        keys = [normalize_tag_text(title, description) for title, description in items]
+        results: Dict[str, Optional[List[str]]] = {}
+        pending: Dict[str, Tuple[str, str]] = {}
+        for key, item in zip(keys, items):
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[key] = list(cached)
+            elif key not in results:
+                pending.setdefault(key, item)
+
+        pending_keys = list(pending)
+        chunks = [pending_keys[i:i + self.batch_size] for i in range(0, len(pending_keys), self.batch_size)]
+        for chunk_results in await asyncio.gather(*(self._tag_batch(chunk, pending) for chunk in chunks)):
+            results.update(chunk_results)
+
+        return [results.get(key) for key in keys]
+
+    async def _tag_batch(self, keys: List[str], pending: Dict[str, Tuple[str, str]]) -> Dict[str, Optional[List[str]]]:
+        if len(keys) == 1:
+            title, description = pending[keys[0]]
+            return {keys[0]: await self.tag(title, description)}
+
+        lines = "\n".join(
+            f"{number}. Title: '{pending[key][0]}' Description: '{pending[key][1]}'"
+            for number, key in enumerate(keys, start=1)
+        )
+        try:
+            self.batch_calls += 1
+            parsed = parse_batch_tags(await self._generate(BATCH_TAG_PROMPT.format(items=lines)), len(keys))
+        except Exception as e:
+            # Retrying each item on its own would turn one failing call into len(keys) more
+            self.failures += 1
+            print(f"Error generating batch AI tags for {len(keys)} item(s): {e}")
+            return {key: None for key in keys}
+
+        results = {}
+        for index, key in enumerate(keys):
+            tags: Optional[List[str]] = parsed.get(index)
+            if tags:
+                self.cache.set(key, tuple(tags))
+                results[key] = tags
+            else:
+                title, description = pending[key]
+                results[key] = await self.tag(title, description)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "gemini_calls": self.gemini_calls,
+            "batch_calls": self.batch_calls,
+            "failures": self.failures,
+            "cache": self.cache.stats(),
+        }
@@ -0,0 +1,116 @@
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestTimings:
+    """Span durations of one request, summed per name (so parallel calls can add up to more than the request took)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}  # name -> [total ms, count]
+        self.finished = False
+
+    def add(self, name: str, ms: float):
+        if self.finished:
+            return  # Tasks spawned by the request can outlive it
+        span = self.spans.setdefault(name, [0.0, 0])
+        span[0] += ms
+        span[1] += 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one metric per span name plus the total so far."""
+        metrics = [f'{name};dur={total:.1f};desc="{count}x"' for name, (total, count) in self.spans.items()]
+        metrics.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(metrics)
+
+    def breakdown(self) -> str:
+        return ", ".join(
+            f"{name} {total:.0f}ms ({count}x)"
+            for name, (total, count) in sorted(self.spans.items(), key=lambda pair: -pair[1][0])
+        ) or "no spans"
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def record_span(name: str, seconds: float):
+    """Add an already-measured duration to the current request, if there is one."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds * 1000)
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time the enclosed block as `name` on the current request; a no-op outside requests
+    (startup, background workers). Works around sync code and awaits alike:
+
+        with span("db"):
+            res = await db.execute(query)
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000)
+
+
+class TimingMiddleware:
+    """
+    Collect spans for each request. With `server_timing` enabled the breakdown is
+    returned in a Server-Timing header (visible in browser dev tools); requests slower
+    than `slow_request_ms` are logged with the breakdown either way. Streaming
+    (text/event-stream) responses are exempt from the slow log.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False, slow_request_ms: float = 0):
+        self.app = app
+        self.server_timing = server_timing
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+        streaming = False
+
+        async def timed_send(message: Message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                streaming = any(
+                    key == b"content-type" and value.startswith(b"text/event-stream") for key, value in headers
+                )
+                if self.server_timing:
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            timings.finished = True
+            elapsed_ms = timings.elapsed_ms()
+            if self.slow_request_ms and elapsed_ms >= self.slow_request_ms and not streaming:
+                print(
+                    f"🐢 Slow request: {scope['method']} {scope['path']} -> {status} in {elapsed_ms:.0f}ms "
+                    f"[{timings.breakdown()}]"
+                )
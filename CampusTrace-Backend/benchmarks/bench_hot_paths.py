@@ -0,0 +1,276 @@
+"""
+CPU microbenchmarks for the backend's hot functions, with saved baselines to compare against.
+
+Run from CampusTrace-Backend/:
+    python -m benchmarks.bench_hot_paths                          # run everything
+    python -m benchmarks.bench_hot_paths -k image                 # only benchmarks whose name contains "image"
+    python -m benchmarks.bench_hot_paths --save before            # store the results as a baseline
+    python -m benchmarks.bench_hot_paths --compare before         # compare against it
+    python -m benchmarks.bench_hot_paths --compare before --fail-threshold 10
+
+Like pytest-benchmark, each benchmark is calibrated so that one round lasts at least
+--min-round-ms, and is then repeated for --min-time seconds (and at least --min-rounds
+rounds). The report gives per-call min, median, mean and stddev, plus calls per second.
+Baselines are JSON files in benchmarks/baselines/ (--compare also accepts a path). They
+record the commit, Python version and machine, because numbers from different machines
+are not comparable. --fail-threshold makes the run exit non-zero when a benchmark's median
+is slower than the baseline by more than that percentage.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# app.main builds its settings at import; these benchmarks never reach the network
+os.environ.setdefault("PYTHON_SUPABASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("PYTHON_SUPABASE_KEY", "benchmark")
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+from fastapi.encoders import jsonable_encoder
+
+from app.main import calculate_cosine_similarity, calculate_simple_match_score
+from app.category_classifier import map_category
+from app.image_processing import (
+    ITEM_IMAGE_SIZE, decode_image, image_data_url, prepare_item_image_hashed, process_image_efficiently,
+)
+from benchmarks.bench_image_pipeline import make_phone_photo
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+EMBEDDING_DIM = 2048  # jina-embeddings-v4
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def bench(name: str):
+    """Register a setup function; it builds the inputs and returns the zero-argument call to time."""
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+# ============= Fixtures =============
+
+_rng = random.Random(42)
+
+
+def _vector(dim: int = EMBEDDING_DIM) -> List[float]:
+    return [_rng.gauss(0.0, 1.0) for _ in range(dim)]
+
+
+def _item(n: int, status: str) -> dict:
+    return {
+        "id": n,
+        "title": _rng.choice(["Black leather wallet", "Blue iPhone 13", "Gray Jansport backpack", "Hydro Flask tumbler"]),
+        "description": "Lost near the library second floor, has a sticker on the back and a name tag inside. "
+                       "Please contact me if found, reward offered.",
+        "status": status,
+        "category": _rng.choice(["Accessories", "Electronics", "Bags", "Others"]),
+        "location": _rng.choice(["Library", "Cafeteria", "Gym"]),
+        "image_url": f"https://example.supabase.co/storage/v1/object/public/item_images/{n}.jpg",
+        "thumbnail_url": f"https://example.supabase.co/storage/v1/object/public/item_images/{n}_thumb.jpg",
+        "ai_tags": ["wallet", "black", "leather", "cards"],
+        "created_at": datetime(2025, 3, 1, 8, n % 60, tzinfo=timezone.utc),
+        "text_embedding": _vector(),
+        "image_embedding": _vector(),
+        "profiles": {"id": f"user-{n}", "full_name": "Juan Dela Cruz", "avatar_url": None},
+    }
+
+
+_photo: Optional[bytes] = None
+
+
+def _phone_photo() -> bytes:
+    global _photo
+    if _photo is None:
+        _photo = make_phone_photo()
+    return _photo
+
+
+# ============= Benchmarks =============
+
+@bench("cosine_similarity")
+def cosine_similarity():
+    a, b = _vector(), _vector()
+    return lambda: calculate_cosine_similarity(a, b)
+
+
+@bench("cosine_similarity_100_candidates")
+def cosine_similarity_candidates():
+    # The in-Python ranking loop: one query vector against a page of candidates
+    query, candidates = _vector(), [_vector() for _ in range(100)]
+    return lambda: [calculate_cosine_similarity(query, candidate) for candidate in candidates]
+
+
+@bench("simple_match_score")
+def simple_match_score():
+    lost, found = _item(1, "Lost"), _item(2, "Found")
+    return lambda: calculate_simple_match_score(lost, found)
+
+
+@bench("process_image_efficiently_12mp")
+def process_image_12mp():
+    photo = _phone_photo()
+    return lambda: process_image_efficiently(photo)
+
+
+@bench("create_item_image_variants_12mp")
+def create_item_variants_12mp():
+    # Resize to the 800px storage/embedding image, the 200px thumbnail and the dHash
+    photo = _phone_photo()
+    return lambda: prepare_item_image_hashed(photo)
+
+
+@bench("suggest_details_category_mapping")
+def suggest_category_mapping():
+    answers = [
+        ("smartphone", ["phone", "case", "screen"]),
+        ("black leather wallet", ["wallet", "cards", "money"]),
+        ("water bottle", ["tumbler", "metal", "sticker"]),
+        ("gadget", ["black", "round", "notebook"]),
+        ("object", ["blue", "plastic", "small"]),
+    ]
+    return lambda: [map_category(object_type, keywords) for object_type, keywords in answers]
+
+
+@bench("jina_image_data_url_800px")
+def jina_image_data_url():
+    # The JPEG + base64 encoding of an upload-sized image sent to Jina (runs in the image pool)
+    image = decode_image(_phone_photo(), ITEM_IMAGE_SIZE)
+    return lambda: image_data_url(image)
+
+
+@bench("json_items_page_with_embeddings")
+def json_items_page():
+    # A 20-item page with both embeddings, encoded the way response_cache encodes it
+    page = {"items": [_item(n, "Found") for n in range(20)], "total": 20, "page": 1}
+    return lambda: json.dumps(jsonable_encoder(page), separators=(",", ":")).encode("utf-8")
+
+
+# ============= Runner =============
+
+def run_benchmark(fn: Callable[[], object], min_time: float, min_rounds: int, min_round_ms: float) -> dict:
+    fn()  # Warm-up: first-call imports, caches and allocations
+    # Calibrate: enough calls per round that timer overhead does not matter
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed * 1000 >= min_round_ms or iterations >= 1 << 20:
+            break
+        iterations *= 2 if elapsed == 0 else max(2, min(10, int(min_round_ms / 1000 / elapsed) + 1))
+
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < min_rounds or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - started) / iterations)
+
+    median = statistics.median(samples)
+    return {
+        "rounds": len(samples),
+        "iterations": iterations,
+        "min_us": round(min(samples) * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 3),
+        "stddev_us": round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0,
+        "ops_per_second": round(1 / median, 2) if median else 0.0,
+    }
+
+
+def format_us(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:.2f}s"
+    if us >= 1e3:
+        return f"{us / 1e3:.2f}ms"
+    return f"{us:.2f}µs"
+
+
+def load_baseline(name: str) -> dict:
+    path = Path(name) if name.endswith(".json") else BASELINE_DIR / f"{name}.json"
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to repeat each benchmark for")
+    parser.add_argument("--min-rounds", type=int, default=5)
+    parser.add_argument("--min-round-ms", type=float, default=10.0, help="Calibrated length of one round")
+    parser.add_argument("--save", metavar="NAME", help="Save the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Baseline name (or .json path) to compare against")
+    parser.add_argument("--fail-threshold", type=float, help="Exit non-zero if a median is this many percent slower")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not args.keyword or args.keyword in name]
+    if args.list or not names:
+        print("\n".join(names or BENCHMARKS))
+        return
+
+    baseline = load_baseline(args.compare)["benchmarks"] if args.compare else {}
+    results, regressions = {}, []
+    header = f"{'benchmark':<36} {'min':>10} {'median':>10} {'mean':>10} {'stddev':>10} {'ops/s':>12} {'rounds':>7}"
+    print(header + (f" {'vs baseline':>12}" if args.compare else ""))
+    for name in names:
+        fn = BENCHMARKS[name]()
+        result = results[name] = run_benchmark(fn, args.min_time, args.min_rounds, args.min_round_ms)
+        line = (f"{name:<36} {format_us(result['min_us']):>10} {format_us(result['median_us']):>10} "
+                f"{format_us(result['mean_us']):>10} {format_us(result['stddev_us']):>10} "
+                f"{result['ops_per_second']:>12,.1f} {result['rounds']:>7}")
+        before = baseline.get(name)
+        if before:
+            change = (result["median_us"] - before["median_us"]) / before["median_us"] * 100
+            line += f" {change:>+11.1f}%"
+            if args.fail_threshold is not None and change > args.fail_threshold:
+                regressions.append(name)
+                line += " ❌"
+        elif args.compare:
+            line += f" {'new':>12}"
+        print(line, flush=True)
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "saved_at": datetime.now(timezone.utc).isoformat(),
+                "git_commit": git_commit(),
+                "machine": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "processor": platform.processor() or platform.machine(),
+                    "cpus": os.cpu_count(),
+                },
+                "benchmarks": results,
+            }, f, indent=2)
+        print(f"\n💾 Baseline saved to {path}")
+
+    if regressions:
+        print(f"\n❌ Slower than the baseline by more than {args.fail_threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Exercise the resilience layer against the fault-injecting fake Jina server.
+
+Run from CampusTrace-Backend/:
+    python -m benchmarks.check_resilience [--calls 200]
+
+Starts fakes.jina in-process and checks three scenarios:
+  flaky   30% of requests fail with 503   -> retries keep the success rate >= 97%
+  tail    4% of requests take 1s           -> hedging after the p95 delay cuts p99 well below 1s
+  outage  every request fails              -> the breaker opens and calls fail fast,
+                                              then closes again once the provider recovers
+Exits non-zero if any check fails.
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import threading
+import statistics
+
+# Settings need these to load; the checks never talk to Supabase
+os.environ.setdefault("PYTHON_SUPABASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("PYTHON_SUPABASE_KEY", "unused")
+
+import httpx
+import uvicorn
+
+from app.resilience import CircuitBreaker, ProviderUnavailable, ResilientProvider, RetryableStatus, raise_for_retryable_status
+from fakes import jina as fake_jina
+
+
+def start_fake_server() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fake_jina.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def make_provider(name: str, hedge: bool = False, max_tries: int = 4) -> ResilientProvider:
+    return ResilientProvider(
+        name,
+        timeout=5.0,
+        max_tries=max_tries,
+        retry_on=(httpx.TransportError, RetryableStatus),
+        hedge=hedge,
+        max_backoff=0.2,
+        breaker=CircuitBreaker(failure_threshold=5, recovery_seconds=1.0),
+    )
+
+
+async def run_calls(client: httpx.AsyncClient, base_url: str, provider: ResilientProvider, calls: int, concurrency: int = 10):
+    async def post(i: int):
+        response = raise_for_retryable_status(
+            await client.post(f"{base_url}/v1/embeddings", json={"input": [f"item {i}"]})
+        )
+        return response.json()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await provider.call(post, i)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return latencies, errors
+
+
+def p99(latencies):
+    return statistics.quantiles(latencies, n=100)[98] if len(latencies) >= 2 else float("nan")
+
+
+async def main(calls: int) -> bool:
+    base_url = start_fake_server()
+    ok = True
+    async with httpx.AsyncClient(timeout=None) as client:
+        # Flaky provider: retries absorb transient 503s
+        await client.post(f"{base_url}/faults", json={"error_rate": 0.3})
+        provider = make_provider("flaky")
+        latencies, errors = await run_calls(client, base_url, provider, calls)
+        success = len(latencies) / calls
+        print(f"flaky : success {success:.1%} with {provider.retries} retries")
+        ok &= success >= 0.97
+
+        # Slow tail: hedging after the p95 delay (warmed up first so the p95 is known)
+        await client.post(f"{base_url}/faults", json={"slow_rate": 0.04, "slow_seconds": 1.0, "latency_seconds": 0.01})
+        plain_latencies, _ = await run_calls(client, base_url, make_provider("tail-plain"), calls)
+        hedged_provider = make_provider("tail-hedged", hedge=True)
+        await client.post(f"{base_url}/faults", json={"latency_seconds": 0.01})
+        await run_calls(client, base_url, hedged_provider, 50)
+        await client.post(f"{base_url}/faults", json={"slow_rate": 0.04, "slow_seconds": 1.0, "latency_seconds": 0.01})
+        hedged_latencies, _ = await run_calls(client, base_url, hedged_provider, calls)
+        print(
+            f"tail  : p99 {p99(plain_latencies) * 1000:.0f}ms plain vs {p99(hedged_latencies) * 1000:.0f}ms hedged "
+            f"({hedged_provider.hedged} hedged, {hedged_provider.hedge_wins} won)"
+        )
+        ok &= p99(hedged_latencies) < 0.5 * p99(plain_latencies)
+
+        # Outage: the breaker opens and short-circuits, then recovers
+        await client.post(f"{base_url}/faults", json={"down": True})
+        provider = make_provider("outage", max_tries=1)
+        await run_calls(client, base_url, provider, 10, concurrency=1)
+        started = time.perf_counter()
+        try:
+            await provider.call(client.get, base_url)
+            fast_fail = False
+        except ProviderUnavailable:
+            fast_fail = True
+        fail_ms = (time.perf_counter() - started) * 1000
+        print(f"outage: breaker {provider.breaker.state}, short-circuited call took {fail_ms:.2f}ms")
+        ok &= fast_fail and fail_ms < 5
+
+        await client.post(f"{base_url}/faults", json={})
+        await asyncio.sleep(provider.breaker.recovery_seconds)
+        await run_calls(client, base_url, provider, 5, concurrency=1)
+        print(f"outage: breaker {provider.breaker.state} after recovery")
+        ok &= provider.breaker.state == "closed"
+
+    print("✅ All resilience checks passed" if ok else "❌ Some resilience checks failed")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.calls)) else 1)
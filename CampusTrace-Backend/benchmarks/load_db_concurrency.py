@@ -0,0 +1,172 @@
+"""
+Show how request throughput scales with concurrency now that Supabase calls run off the event loop.
+
+Run from CampusTrace-Backend/:
+    python -m benchmarks.load_db_concurrency [--latency-ms 20] [--requests 400]
+
+Starts fakes.supabase with a fixed round-trip latency, then runs the real API
+(one uvicorn worker) against it twice: with DB_EXECUTOR_WORKERS=1, which serialises database
+calls the way the old blocking `.execute()` calls on the event loop did, and with the
+configured pool. Each run drives GET /api/notifications (an auth lookup plus one query) at
+increasing client concurrency and reports requests/second and latency percentiles.
+Exits non-zero if the pooled run does not scale.
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+from uuid import uuid4
+
+import httpx
+
+CONCURRENCY_LEVELS = (1, 4, 16, 64)
+USERS = 50
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_supabase(latency_ms: float) -> tuple:
+    # Its own process, so the fake never competes with the load generator for the GIL
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "fakes.supabase:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    wait_until_up(f"http://127.0.0.1:{port}/_stats", process)
+    base_url = f"http://127.0.0.1:{port}"
+    user_ids = [str(uuid4()) for _ in range(USERS)]
+    httpx.post(f"{base_url}/_config", json={"latency_ms": latency_ms})
+    httpx.post(f"{base_url}/_seed", json={
+        "profiles": [{"id": user_id, "university_id": 1, "role": "member"} for user_id in user_ids],
+        "notifications": [
+            {"recipient_id": user_id, "university_id": 1, "message": f"Notification {n}", "status": "unread", "type": "general"}
+            for user_id in user_ids for n in range(5)
+        ],
+    })
+    return process, base_url, user_ids
+
+
+def start_api(supabase_url: str, db_workers: int) -> tuple:
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHON_SUPABASE_URL": supabase_url,
+        "PYTHON_SUPABASE_KEY": "fake",
+        "DB_EXECUTOR_WORKERS": str(db_workers),
+        "ENRICHMENT_RECOVER_ON_STARTUP": "false",
+        "GEMINI_API_KEY": "",
+        "JINA_API_KEY": "",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_up(f"{base_url}/health", process)
+    return process, base_url
+
+
+def wait_until_up(url: str, process: subprocess.Popen):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{url} did not come up")
+
+
+async def drive(base_url: str, user_ids: list, concurrency: int, requests: int) -> dict:
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+    # One single-connection client per virtual user: a shared httpx pool scans every
+    # connection on each request, and at 64 connections that made this process, not
+    # the API, the bottleneck on small machines
+    limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+    clients = [httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) for _ in range(concurrency)]
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for i in counter:
+            headers = {"Authorization": f"Bearer user-{user_ids[i % len(user_ids)]}"}
+            started = time.perf_counter()
+            try:
+                response = await client.get("/api/notifications", headers=headers)
+            except httpx.TransportError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for client in clients))
+        elapsed = time.perf_counter() - started
+    finally:
+        for client in clients:
+            await client.aclose()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "concurrency": concurrency,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 1),
+        "p95_ms": round(quantiles[94] * 1000, 1),
+        "errors": errors,
+    }
+
+
+def run(label: str, supabase_url: str, user_ids: list, db_workers: int, requests: int) -> list:
+    process, base_url = start_api(supabase_url, db_workers)
+    try:
+        print(f"\n{label} (DB_EXECUTOR_WORKERS={db_workers})")
+        print(f"{'concurrency':>12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        results = []
+        for concurrency in CONCURRENCY_LEVELS:
+            result = asyncio.run(drive(base_url, user_ids, concurrency, requests))
+            results.append(result)
+            print(f"{concurrency:>12} {result['rps']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['errors']:>7}")
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=20, help="Simulated Supabase round trip")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per concurrency level")
+    parser.add_argument("--workers", type=int, default=32, help="DB_EXECUTOR_WORKERS for the pooled run")
+    args = parser.parse_args()
+
+    # The load generator, the API and the fake share these CPUs, which caps the pooled run
+    print(f"{os.cpu_count()} CPU(s), {args.latency_ms:g} ms simulated Supabase round trip")
+    fake, supabase_url, user_ids = start_fake_supabase(args.latency_ms)
+    try:
+        serial = run("Serialised database calls", supabase_url, user_ids, 1, args.requests)
+        pooled = run("Pooled database calls", supabase_url, user_ids, args.workers, args.requests)
+    finally:
+        fake.terminate()
+
+    speedup = pooled[-1]["rps"] / serial[-1]["rps"]
+    scaling = pooled[-1]["rps"] / pooled[0]["rps"]
+    print(f"\nAt concurrency {CONCURRENCY_LEVELS[-1]}: {speedup:.1f}x the serialised throughput, "
+          f"{scaling:.1f}x the pooled single-client throughput")
+    ok = speedup >= 4 and not any(r["errors"] for r in serial + pooled)
+    print("✅ Throughput scales with concurrency" if ok else "❌ Throughput did not scale")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
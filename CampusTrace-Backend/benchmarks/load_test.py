@@ -0,0 +1,642 @@
+"""
+End-to-end load test of the real API against local stand-ins for every external service.
+
+Run from CampusTrace-Backend/:
+    python -m benchmarks.load_test [--duration 30] [--users 40] [--mix default] [--output results.json]
+
+Starts fakes.supabase (REST, Auth, Storage), fakes.jina, fakes.gemini, fakes.expo and
+fakes.recaptcha as separate processes. Each one simulates its service time from a latency
+spec, "<median ms>" or "<median ms>:<p99 ms>" for a log-normal tail, e.g.
+--latency supabase=25:150 --latency gemini=1200:4000. The script seeds a university with
+users and items, then boots the API under uvicorn against them. With --backend memory, data
+access runs on the in-process repositories instead of PostgREST; uploads still go to the
+fake Storage.
+
+Virtual users each loop over a weighted mix of scenarios (--mix, a preset name or
+"feed=40,create_item=10,...") with --think-ms between requests. After --warmup seconds the
+script records --duration seconds and reports, per scenario:
+  - requests/second
+  - p50, p95 and p99 latency
+  - status codes
+It also reports event-loop lag: the API's /health lag histogram, diffed over the measured
+window. That covers a single worker process; with --workers > 1 it is whichever worker
+answered /health.
+
+--output writes everything as JSON. --baseline compares a run against an earlier JSON file
+and exits non-zero when a scenario's p95 or throughput is worse by more than
+--max-regression percent.
+"""
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from PIL import Image, ImageDraw
+
+from benchmarks.load_db_concurrency import free_port, wait_until_up
+from fakes.latency import Latency
+
+ROOT = Path(__file__).resolve().parent.parent
+CERT_FILE = ROOT / "fakes" / "certs" / "localhost.crt"
+UNIVERSITY_ID = 1
+EMAIL_DOMAIN = "loadtest.edu"
+
+DEFAULT_LATENCY = {
+    "supabase": "25:150",
+    "jina": "300:1200",
+    "gemini": "1200:4000",
+    "expo": "80:300",
+    "recaptcha": "120:400",
+}
+
+MIXES = {
+    "default": {
+        "feed": 30, "feed_search": 5, "dashboard": 12, "notifications": 12, "leaderboard": 4,
+        "find_matches": 6, "item_claims": 4, "submit_claim": 4, "create_item": 8,
+        "image_search": 5, "suggest_details": 5, "generate_description": 3, "signup": 2,
+    },
+    "browse": {"feed": 45, "feed_search": 10, "dashboard": 20, "notifications": 15, "leaderboard": 10},
+    "post": {
+        "create_item": 30, "suggest_details": 20, "generate_description": 15,
+        "image_search": 15, "submit_claim": 10, "feed": 10,
+    },
+}
+
+OBJECTS = [
+    ("Wallet", "Accessories", "Black leather wallet with a few cards inside."),
+    ("Phone", "Electronics", "Blue smartphone with a cracked screen protector."),
+    ("Backpack", "Bags", "Gray backpack with a keychain on the zipper."),
+    ("Umbrella", "Accessories", "Red folding umbrella, slightly bent handle."),
+    ("Water bottle", "Others", "Green metal tumbler with stickers."),
+    ("Calculator", "Electronics", "Scientific calculator with a name label on the back."),
+    ("ID card", "Documents", "Student ID in a clear lanyard holder."),
+    ("Notebook", "Books", "Spiral notebook with engineering notes."),
+]
+LOCATIONS = ["Library", "Cafeteria", "Gym", "Engineering Building", "Main Gate", "Chapel"]
+
+
+# ============= Fakes and API processes =============
+
+def wait_for_port(port: int, process: subprocess.Popen):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"port {port} did not open")
+
+
+def start_fakes(latencies: Dict[str, Latency], embedding_dim: int) -> tuple:
+    processes, urls = [], {}
+    env = {**os.environ, "FAKE_JINA_DIM": str(embedding_dim)}
+    for name, latency in latencies.items():
+        env.update(latency.env(name.upper()))
+
+    for name in ("supabase", "jina", "expo", "recaptcha"):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"fakes.{name}:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        processes.append(process)
+        urls[name] = f"http://127.0.0.1:{port}"
+        wait_until_up(f"{urls[name]}/_stats" if name == "supabase" else f"{urls[name]}/stats", process)
+
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "fakes.gemini", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    processes.append(process)
+    urls["gemini"] = f"127.0.0.1:{port}"
+    wait_for_port(port, process)
+    return processes, urls
+
+
+def start_api(urls: Dict[str, str], backend: str, seed_file: Optional[str], workers: int, log_file) -> tuple:
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHON_SUPABASE_URL": urls["supabase"],
+        "PYTHON_SUPABASE_KEY": "fake",
+        "DATA_BACKEND": backend,
+        "GEMINI_API_KEY": "fake",
+        "GEMINI_API_ENDPOINT": urls["gemini"],
+        "GRPC_DEFAULT_SSL_ROOTS_FILE_PATH": str(CERT_FILE),
+        "JINA_API_KEY": "fake",
+        "JINA_EMBEDDING_URL": f"{urls['jina']}/v1/embeddings",
+        "EXPO_PUSH_URL": f"{urls['expo']}/v2/push/send",
+        "EXPO_RECEIPTS_URL": f"{urls['expo']}/v2/push/getReceipts",
+        "RECAPTCHA_SECRET_KEY": "fake",
+        "RECAPTCHA_VERIFY_URL": f"{urls['recaptcha']}/recaptcha/api/siteverify",
+        "RESEND_API_KEY": "",
+        "ENRICHMENT_RECOVER_ON_STARTUP": "false",
+        "IMAGE_VARIANT_CACHE_DIR": tempfile.mkdtemp(prefix="campustrace-variants-"),
+    }
+    if seed_file:
+        env["DATA_SEED_FILE"] = seed_file
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_up(f"{base_url}/health", process)
+    return process, base_url
+
+
+def stop(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# ============= Seed data =============
+
+def unit_vector(rng: random.Random, dim: int) -> List[float]:
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [round(v / norm, 6) for v in vector]
+
+
+def build_seed(users: int, items: int, embedding_dim: int, rng: random.Random) -> dict:
+    profiles = [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "full_name": f"Load User {n}",
+            "email": f"user{n}@{EMAIL_DOMAIN}",
+            "university_id": UNIVERSITY_ID,
+            "role": "member",
+            "is_verified": True,
+            # A third of users have a device registered, so notifications also exercise push
+            "push_token": f"ExponentPushToken[load-{n}]" if n % 3 == 0 else None,
+        }
+        for n in range(users)
+    ]
+    now = time.time()
+    item_rows = []
+    for n in range(items):
+        title, category, description = OBJECTS[n % len(OBJECTS)]
+        item_rows.append({
+            "id": n + 1,
+            "title": f"{title} #{n}",
+            "description": description,
+            "status": "Found" if n % 2 == 0 else "Lost",
+            "category": category,
+            "location": rng.choice(LOCATIONS),
+            "user_id": profiles[n % users]["id"],
+            "university_id": UNIVERSITY_ID,
+            "moderation_status": "approved",
+            "enrichment_status": "complete",
+            "ai_tags": [title.lower(), category.lower()],
+            "text_embedding": unit_vector(rng, embedding_dim),
+            "image_embedding": unit_vector(rng, embedding_dim),
+            "created_at": datetime.fromtimestamp(now - (items - n) * 60, timezone.utc).isoformat(),
+        })
+    return {
+        "universities": [{"id": UNIVERSITY_ID, "name": "Load Test University", "status": "active"}],
+        "allowed_domains": [{"id": 1, "university_id": UNIVERSITY_ID, "domain_name": EMAIL_DOMAIN}],
+        "site_settings": [
+            {"id": 1, "university_id": UNIVERSITY_ID, "setting_key": "auto_approve_posts", "setting_value": "true"},
+            {"id": 2, "university_id": UNIVERSITY_ID, "setting_key": "keyword_blacklist", "setting_value": "[]"},
+        ],
+        "profiles": profiles,
+        "items": item_rows,
+        "badges": [
+            {"id": n + 1, "name": name, "description": name}
+            for n, name in enumerate(["New Member", "Eagle Eye", "Good Samaritan", "Campus Hero"])
+        ],
+        "notifications": [
+            {"id": n * 5 + k + 1, "recipient_id": profile["id"], "university_id": UNIVERSITY_ID,
+             "message": f"Notification {k}", "status": "unread" if k < 2 else "read", "type": "general"}
+            for n, profile in enumerate(profiles) for k in range(5)
+        ],
+    }
+
+
+def canned_rpc_results(seed: dict) -> dict:
+    """The fake PostgREST has no vector search; its RPCs answer with plausible fixed rows."""
+    found = [item for item in seed["items"] if item["status"] == "Found"]
+    columns = ("id", "title", "description", "status", "category", "location", "image_url", "created_at", "user_id")
+    return {
+        "find_matches_for_lost_item": [
+            {**{c: item.get(c) for c in columns}, "match_score": 90 - n * 5} for n, item in enumerate(found[:3])
+        ],
+        "match_items_by_image_embedding": [
+            {**{c: item.get(c) for c in columns}, "similarity": 0.9 - n * 0.02} for n, item in enumerate(found[:10])
+        ],
+        "get_leaderboard_for_university": [
+            {"id": p["id"], "full_name": p["full_name"], "avatar_url": None, "successful_returns": 10 - n}
+            for n, p in enumerate(seed["profiles"][:10])
+        ],
+    }
+
+
+def load_seed(urls: Dict[str, str], seed: dict, backend: str, workdir: str) -> Optional[str]:
+    if backend == "memory":
+        seed_file = os.path.join(workdir, "seed.json")
+        with open(seed_file, "w", encoding="utf-8") as f:
+            json.dump(seed, f)
+        return seed_file
+    httpx.post(f"{urls['supabase']}/_seed", json=seed, timeout=120).raise_for_status()
+    for function, result in canned_rpc_results(seed).items():
+        httpx.post(f"{urls['supabase']}/_rpc/{function}", json=result).raise_for_status()
+    return None
+
+
+# ============= Virtual users and scenarios =============
+
+def make_images(count: int, rng: random.Random) -> List[bytes]:
+    """Distinct camera-sized JPEGs, so uploads pay for real decoding and resizing."""
+    images = []
+    for _ in range(count):
+        image = Image.new("RGB", (1600, 1200), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x, y = rng.randrange(1400), rng.randrange(1000)
+            draw.rectangle((x, y, x + rng.randrange(50, 400), y + rng.randrange(50, 400)),
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+class VirtualUser:
+    def __init__(self, profile: dict, own_items: List[dict], others_found: List[dict], images: List[bytes], rng: random.Random):
+        self.id = profile["id"]
+        self.headers = {"Authorization": f"Bearer user-{self.id}"}
+        self.lost_ids = [item["id"] for item in own_items if item["status"] == "Lost"]
+        self.found_ids = [item["id"] for item in own_items if item["status"] == "Found"]
+        self.others_found_ids = [item["id"] for item in others_found]
+        self.images = images
+        self.rng = rng
+
+    def image(self) -> tuple:
+        return ("photo.jpg", self.rng.choice(self.images), "image/jpeg")
+
+
+async def feed(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    params = {"page": user.rng.randint(1, 3), "limit": 20}
+    if user.rng.random() < 0.3:
+        params["status"] = user.rng.choice(["Found", "Lost"])
+    return await client.get("/api/items", params=params, headers=user.headers)
+
+
+async def feed_search(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    search = user.rng.choice(OBJECTS)[0].split()[0].lower()
+    return await client.get("/api/items", params={"search": search}, headers=user.headers)
+
+
+async def dashboard(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.get("/api/dashboard-summary", headers=user.headers)
+
+
+async def notifications(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.get("/api/notifications", params={"limit": 20}, headers=user.headers)
+
+
+async def leaderboard(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.get("/api/items/leaderboard", headers=user.headers)
+
+
+async def find_matches(client: httpx.AsyncClient, user: VirtualUser) -> Optional[httpx.Response]:
+    if not user.lost_ids:
+        return None
+    return await client.get(f"/api/items/find-matches/{user.rng.choice(user.lost_ids)}", headers=user.headers)
+
+
+async def item_claims(client: httpx.AsyncClient, user: VirtualUser) -> Optional[httpx.Response]:
+    if not user.found_ids:
+        return None
+    return await client.get(f"/api/claims/item/{user.rng.choice(user.found_ids)}", headers=user.headers)
+
+
+async def submit_claim(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.post("/api/claims/create", headers=user.headers, json={
+        "item_id": user.rng.choice(user.others_found_ids),
+        "verification_message": "It has my initials scratched on the back and a blue sticker.",
+    })
+
+
+async def create_item(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    title, category, description = user.rng.choice(OBJECTS)
+    item = {
+        "title": title,
+        "description": description,
+        "status": user.rng.choice(["Found", "Lost"]),
+        "category": category,
+        "location": user.rng.choice(LOCATIONS),
+    }
+    return await client.post(
+        "/api/items/create", headers=user.headers,
+        data={"item_data": json.dumps(item)}, files={"image_file": user.image()},
+    )
+
+
+async def image_search(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.post("/api/items/image-search", headers=user.headers, files={"image_file": user.image()})
+
+
+async def suggest_details(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.post("/api/items/ai/suggest-details-from-image", headers=user.headers,
+                             files={"image_file": user.image()})
+
+
+async def generate_description(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    title, category, description = user.rng.choice(OBJECTS)
+    return await client.post("/api/items/generate-description", headers=user.headers, json={
+        "title": title, "category": category, "draft_description": description.lower(),
+    })
+
+
+async def signup(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+    return await client.post("/api/auth/signup", json={
+        "email": f"new-{uuid.uuid4().hex[:12]}@{EMAIL_DOMAIN}",
+        "password": "load-test-password",
+        "full_name": "New Load User",
+        "captchaToken": "load-test",
+    })
+
+
+SCENARIOS: Dict[str, Callable[[httpx.AsyncClient, VirtualUser], Awaitable[Optional[httpx.Response]]]] = {
+    "feed": feed,
+    "feed_search": feed_search,
+    "dashboard": dashboard,
+    "notifications": notifications,
+    "leaderboard": leaderboard,
+    "find_matches": find_matches,
+    "item_claims": item_claims,
+    "submit_claim": submit_claim,
+    "create_item": create_item,
+    "image_search": image_search,
+    "suggest_details": suggest_details,
+    "generate_description": generate_description,
+    "signup": signup,
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    if spec in MIXES:
+        return MIXES[spec]
+    mix = {}
+    for term in spec.split(","):
+        name, _, weight = term.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name.strip()}'; choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# ============= Measurement =============
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def lag_window(before: dict, after: dict) -> dict:
+    """Event-loop lag over the measured window, from two /health snapshots of the cumulative histogram."""
+    samples = after["samples"] - before["samples"]
+    if samples <= 0:
+        return {"samples": 0}
+    counts = [(a[0], a[1] - b[1]) for a, b in zip(after["histogram"], before["histogram"])]
+
+    def bucket_quantile(q: float):
+        # Upper bound of the bucket holding the q-th sample (so an upper estimate)
+        target = q * samples
+        return next((bound for bound, cumulative in counts if cumulative >= target), counts[-1][0])
+
+    total_ms = after["mean_ms"] * after["samples"] - before["mean_ms"] * before["samples"]
+    return {
+        "samples": samples,
+        "mean_ms": round(total_ms / samples, 2),
+        "p50_ms_le": bucket_quantile(0.5),
+        "p99_ms_le": bucket_quantile(0.99),
+        "max_ms_since_start": after["max_ms"],
+        "histogram": [[bound, cumulative] for bound, cumulative in counts],
+    }
+
+
+async def run_load(base_url: str, users: List[VirtualUser], mix: Dict[str, float], args) -> dict:
+    names, weights = list(mix), list(mix.values())
+    records: Dict[str, dict] = {name: {"latencies": [], "statuses": {}} for name in names}
+    limits = httpx.Limits(max_connections=len(users), max_keepalive_connections=len(users))
+    timeout = httpx.Timeout(120.0, connect=10.0)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + args.warmup
+        measure_until = measure_from + args.duration
+
+        async def virtual_user(user: VirtualUser):
+            # Stagger starts so users do not arrive in lockstep
+            await asyncio.sleep(user.rng.random() * args.think_ms / 1000)
+            while loop.time() < measure_until:
+                name = user.rng.choices(names, weights)[0]
+                started = loop.time()
+                try:
+                    response = await SCENARIOS[name](client, user)
+                    if response is None:
+                        continue
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                finished = loop.time()
+                if measure_from <= started and finished <= measure_until:
+                    record = records[name]
+                    record["latencies"].append(finished - started)
+                    record["statuses"][status] = record["statuses"].get(status, 0) + 1
+                await asyncio.sleep(user.rng.expovariate(1000 / args.think_ms) if args.think_ms else 0)
+
+        async def health_at(when: float) -> dict:
+            await asyncio.sleep(max(0.0, when - loop.time()))
+            return (await client.get("/health")).json()
+
+        health_tasks = [asyncio.create_task(health_at(measure_from)), asyncio.create_task(health_at(measure_until))]
+        await asyncio.gather(*(virtual_user(user) for user in users))
+        health_before, health_after = await asyncio.gather(*health_tasks)
+
+    scenarios, total_requests, total_errors = {}, 0, 0
+    for name, record in records.items():
+        ordered = sorted(record["latencies"])
+        errors = sum(count for status, count in record["statuses"].items() if not status.startswith(("2", "3")))
+        total_requests += len(ordered)
+        total_errors += errors
+        scenarios[name] = {
+            "requests": len(ordered),
+            "errors": errors,
+            "rps": round(len(ordered) / args.duration, 2),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1) if ordered else 0.0,
+            "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+            "statuses": record["statuses"],
+        }
+    return {
+        "summary": {
+            "requests": total_requests,
+            "errors": total_errors,
+            "rps": round(total_requests / args.duration, 2),
+            "duration_s": args.duration,
+        },
+        "scenarios": scenarios,
+        "event_loop": lag_window(health_before["event_loop"], health_after["event_loop"]),
+        "api_health": {key: health_after.get(key) for key in ("database", "provider_health", "background_queues", "push")},
+    }
+
+
+def fake_stats(urls: Dict[str, str]) -> dict:
+    stats = {}
+    for name, path in (("supabase", "/_stats"), ("jina", "/stats"), ("expo", "/stats"), ("recaptcha", "/stats")):
+        try:
+            stats[name] = httpx.get(f"{urls[name]}{path}").json()
+        except httpx.HTTPError as e:
+            stats[name] = {"error": str(e)}
+    return stats
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# ============= Reporting =============
+
+def print_report(result: dict):
+    print(f"\n{'scenario':<22} {'req':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, s in sorted(result["scenarios"].items(), key=lambda pair: -pair[1]["requests"]):
+        print(f"{name:<22} {s['requests']:>6} {s['rps']:>7} {s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} {s['errors']:>7}")
+    summary = result["summary"]
+    print(f"{'total':<22} {summary['requests']:>6} {summary['rps']:>7} {'':>8} {'':>8} {'':>8} {summary['errors']:>7}")
+    lag = result["event_loop"]
+    if lag.get("samples"):
+        print(f"\nEvent-loop lag: mean {lag['mean_ms']} ms, p50 <= {lag['p50_ms_le']} ms, p99 <= {lag['p99_ms_le']} ms "
+              f"({lag['samples']} samples)")
+
+
+def compare(result: dict, baseline: dict, max_regression: float) -> bool:
+    """Print per-scenario changes against a baseline run; False if any scenario regressed."""
+    ok = True
+    print(f"\n{'vs baseline':<22} {'req/s':>16} {'p95 ms':>18}")
+    for name, current in sorted(result["scenarios"].items()):
+        before = baseline.get("scenarios", {}).get(name)
+        if not before or before["requests"] < 20 or current["requests"] < 20:
+            continue
+        rps_change = (current["rps"] - before["rps"]) / before["rps"] * 100 if before["rps"] else 0.0
+        p95_change = (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        regressed = rps_change < -max_regression or p95_change > max_regression
+        ok = ok and not regressed
+        print(f"{name:<22} {before['rps']:>6} -> {current['rps']:<7} {before['p95_ms']:>7} -> {current['p95_ms']:<8}"
+              f"{'  ❌ regressed' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before the measurement")
+    parser.add_argument("--users", type=int, default=40, help="Concurrent virtual users")
+    parser.add_argument("--think-ms", type=float, default=250, help="Mean pause between a user's requests (exponential)")
+    parser.add_argument("--mix", default="default", help=f"Preset ({', '.join(MIXES)}) or 'scenario=weight,...'")
+    parser.add_argument("--latency", action="append", default=[], metavar="SERVICE=SPEC",
+                        help="Latency of a fake, e.g. supabase=25:150 (median:p99 ms); repeatable")
+    parser.add_argument("--backend", choices=["supabase", "memory"], default="supabase")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the API")
+    parser.add_argument("--seed-users", type=int, default=200)
+    parser.add_argument("--seed-items", type=int, default=400)
+    parser.add_argument("--embedding-dim", type=int, default=512)
+    parser.add_argument("--random-seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the result as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier JSON result to compare against")
+    parser.add_argument("--max-regression", type=float, default=20, help="Allowed p95/throughput regression in percent")
+    args = parser.parse_args()
+
+    specs = dict(DEFAULT_LATENCY)
+    for override in args.latency:
+        service, _, spec = override.partition("=")
+        if service not in specs:
+            raise SystemExit(f"Unknown service '{service}'; choose from {', '.join(specs)}")
+        specs[service] = spec
+    latencies = {service: Latency.parse(spec) for service, spec in specs.items()}
+    mix = parse_mix(args.mix)
+
+    rng = random.Random(args.random_seed)
+    workdir = tempfile.mkdtemp(prefix="campustrace-load-")
+    seed = build_seed(args.seed_users, args.seed_items, args.embedding_dim, rng)
+    images = make_images(48, rng)
+    api_log_path = os.path.join(workdir, "api.log")
+
+    processes = []
+    try:
+        fakes, urls = start_fakes(latencies, args.embedding_dim)
+        processes.extend(fakes)
+        seed_file = load_seed(urls, seed, args.backend, workdir)
+        with open(api_log_path, "wb") as api_log:
+            api, base_url = start_api(urls, args.backend, seed_file, args.workers, api_log)
+            processes.insert(0, api)
+
+            users = []
+            for profile in rng.sample(seed["profiles"], min(args.users, len(seed["profiles"]))):
+                own = [item for item in seed["items"] if item["user_id"] == profile["id"]]
+                others_found = [item for item in seed["items"] if item["status"] == "Found" and item["user_id"] != profile["id"]]
+                users.append(VirtualUser(profile, own, others_found, images, random.Random(rng.random())))
+
+            print(f"Load test: {len(users)} users, mix '{args.mix}', {args.warmup:g}s warmup + {args.duration:g}s, "
+                  f"backend {args.backend}, {args.workers} worker(s)")
+            print("Latency (median:p99 ms): " + ", ".join(f"{service}={spec}" for service, spec in specs.items()))
+            result = asyncio.run(run_load(base_url, users, mix, args))
+            result["fakes"] = fake_stats(urls)
+    finally:
+        stop(processes)
+
+    result = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "users": len(users), "duration_s": args.duration, "warmup_s": args.warmup, "think_ms": args.think_ms,
+            "mix": mix, "latency": specs, "backend": args.backend, "workers": args.workers,
+            "seed_users": args.seed_users, "seed_items": args.seed_items, "embedding_dim": args.embedding_dim,
+        },
+        **result,
+    }
+    print_report(result)
+    print(f"\nAPI log: {api_log_path}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    ok = True
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            ok = compare(result, json.load(f), args.max_regression)
+        print("✅ No regressions against the baseline" if ok else "❌ Regressions against the baseline")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Local stand-in for the Expo push API, for exercising the push dispatcher without real devices.
+
+Run:   uvicorn fakes.expo:app --port 9100
+Then:  EXPO_PUSH_URL=http://127.0.0.1:9100/v2/push/send
+       EXPO_RECEIPTS_URL=http://127.0.0.1:9100/v2/push/getReceipts
+
+Tokens containing "unregistered" are rejected with DeviceNotRegistered on the ticket,
+tokens containing "stale" succeed on send but fail with DeviceNotRegistered on the receipt.
+Requests take a simulated service time read from FAKE_EXPO_LATENCY_MS and
+FAKE_EXPO_LATENCY_P99_MS (see fakes.latency).
+"""
+from typing import Dict, List
+from uuid import uuid4
+
+from fastapi import Body, FastAPI, HTTPException
+
+from fakes.latency import Latency
+
+app = FastAPI(title="Fake Expo Push API")
+
+MAX_MESSAGES_PER_REQUEST = 100
+latency = Latency.from_env("EXPO")
+
+_tickets: Dict[str, str] = {}  # ticket id -> push token
+stats = {"requests": 0, "messages": 0, "receipt_requests": 0}
+
+
+def _device_not_registered(token: str) -> dict:
+    return {
+        "status": "error",
+        "message": f'"{token}" is not a registered push notification recipient',
+        "details": {"error": "DeviceNotRegistered"},
+    }
+
+
+@app.post("/v2/push/send")
+async def send(messages=Body(...)):
+    if isinstance(messages, dict):
+        messages = [messages]
+    if len(messages) > MAX_MESSAGES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail="Too many messages in one request")
+    stats["requests"] += 1
+    stats["messages"] += len(messages)
+    await latency.wait()
+
+    tickets: List[dict] = []
+    for message in messages:
+        token = message.get("to", "")
+        if "unregistered" in token:
+            tickets.append(_device_not_registered(token))
+            continue
+        ticket_id = uuid4().hex
+        _tickets[ticket_id] = token
+        tickets.append({"status": "ok", "id": ticket_id})
+    return {"data": tickets}
+
+
+@app.post("/v2/push/getReceipts")
+async def get_receipts(payload: dict = Body(...)):
+    stats["receipt_requests"] += 1
+    await latency.wait()
+    receipts = {}
+    for ticket_id in payload.get("ids", []):
+        token = _tickets.pop(ticket_id, None)
+        if token is None:
+            continue
+        receipts[ticket_id] = _device_not_registered(token) if "stale" in token else {"status": "ok"}
+    return {"data": receipts}
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
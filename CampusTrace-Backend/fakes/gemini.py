@@ -0,0 +1,129 @@
+"""
+Local stand-in for the Gemini API (GenerativeService over gRPC), answering the prompts this
+API sends in the shapes it parses.
+
+Run:   python -m fakes.gemini --port 9103
+Then:  GEMINI_API_KEY=fake GEMINI_API_ENDPOINT=127.0.0.1:9103
+       GRPC_DEFAULT_SSL_ROOTS_FILE_PATH=fakes/certs/localhost.crt
+
+The SDK's async client only talks gRPC over TLS, so the fake serves TLS with the self-signed
+certificate in fakes/certs (valid for 127.0.0.1 and localhost, for local testing only), and
+GRPC_DEFAULT_SSL_ROOTS_FILE_PATH makes the API process trust it.
+
+Answers: prompts with an image get "Object/Color/Keywords" lines, tag prompts get tags (one
+numbered line per item for batch prompts), anything else gets a description, streamed in
+chunks for StreamGenerateContent. Each request takes a simulated service time read from
+FAKE_GEMINI_LATENCY_MS and FAKE_GEMINI_LATENCY_P99_MS (see fakes.latency).
+"""
+import re
+import asyncio
+import argparse
+from pathlib import Path
+
+import grpc
+from google.ai import generativelanguage_v1beta as glm
+
+from fakes.latency import Latency
+
+SERVICE = "google.ai.generativelanguage.v1beta.GenerativeService"
+CERT_DIR = Path(__file__).parent / "certs"
+
+OBJECTS = [
+    ("wallet", "black", "wallet, leather, cards, money"),
+    ("phone", "blue", "phone, smartphone, case, screen"),
+    ("backpack", "gray", "backpack, bag, zipper, school"),
+    ("umbrella", "red", "umbrella, folding, rain"),
+    ("water bottle", "green", "tumbler, bottle, metal, sticker"),
+]
+TAGS = "wallet, black, leather, pitaka, cards, library"
+DESCRIPTION = (
+    "Black leather wallet found near the library entrance. Contains several cards and a "
+    "student ID. [Specify any unique marks/stickers]. Please describe the contents to claim it."
+)
+
+latency = Latency.from_env("GEMINI")
+stats = {"requests": 0, "streams": 0}
+
+
+def _prompt(request: glm.GenerateContentRequest) -> tuple:
+    texts, has_image = [], False
+    for content in request.contents:
+        for part in content.parts:
+            texts.append(part.text)
+            has_image = has_image or bool(part.inline_data.data)
+    return "\n".join(texts), has_image
+
+
+def answer(request: glm.GenerateContentRequest) -> str:
+    prompt, has_image = _prompt(request)
+    if has_image:
+        kind, color, keywords = OBJECTS[len(prompt) % len(OBJECTS)]
+        return f"Object: {kind}\nColor: {color}\nKeywords: {keywords}"
+    if "one line per item" in prompt:
+        items = prompt.split("Items:", 1)[-1]
+        count = len(re.findall(r"^\s*\d+\. Title:", items, re.MULTILINE))
+        return "\n".join(f"{n}: {TAGS}" for n in range(1, count + 1))
+    if "keywords (tags)" in prompt:
+        return f"Tags: {TAGS}"
+    return DESCRIPTION
+
+
+def _response(text: str) -> glm.GenerateContentResponse:
+    return glm.GenerateContentResponse(candidates=[glm.Candidate(
+        content=glm.Content(parts=[glm.Part(text=text)], role="model"),
+        finish_reason=glm.Candidate.FinishReason.STOP,
+        index=0,
+    )])
+
+
+async def generate_content(request, context):
+    stats["requests"] += 1
+    await latency.wait()
+    return _response(answer(request))
+
+
+async def stream_generate_content(request, context):
+    stats["requests"] += 1
+    stats["streams"] += 1
+    await latency.wait()
+    words = answer(request).split(" ")
+    for start in range(0, len(words), 8):
+        yield _response(" ".join(words[start:start + 8]) + " ")
+        await asyncio.sleep(0.02)
+
+
+async def serve(port: int):
+    server = grpc.aio.server()
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(SERVICE, {
+        "GenerateContent": grpc.unary_unary_rpc_method_handler(
+            generate_content,
+            request_deserializer=glm.GenerateContentRequest.deserialize,
+            response_serializer=glm.GenerateContentResponse.serialize,
+        ),
+        "StreamGenerateContent": grpc.unary_stream_rpc_method_handler(
+            stream_generate_content,
+            request_deserializer=glm.GenerateContentRequest.deserialize,
+            response_serializer=glm.GenerateContentResponse.serialize,
+        ),
+    }),))
+    credentials = grpc.ssl_server_credentials([(
+        (CERT_DIR / "localhost.key").read_bytes(),
+        (CERT_DIR / "localhost.crt").read_bytes(),
+    )])
+    server.add_secure_port(f"127.0.0.1:{port}", credentials)
+    await server.start()
+    print(f"Fake Gemini listening on 127.0.0.1:{port}", flush=True)
+    try:
+        await server.wait_for_termination()
+    finally:
+        print(f"Fake Gemini stats: {stats}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini API (gRPC)")
+    parser.add_argument("--port", type=int, default=9103)
+    asyncio.run(serve(parser.parse_args().port))
+
+
+if __name__ == "__main__":
+    main()
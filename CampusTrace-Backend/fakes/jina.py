@@ -0,0 +1,83 @@
+"""
+Local stand-in for the Jina embeddings API, with fault injection for resilience testing.
+
+Run:   uvicorn fakes.jina:app --port 9101
+Then:  JINA_EMBEDDING_URL=http://127.0.0.1:9101/v1/embeddings JINA_API_KEY=fake
+
+Embeddings are deterministic unit vectors derived from the input, so identical inputs
+always embed identically. Faults are configured at runtime:
+
+    POST /faults {"error_rate": 0.2, "error_status": 503, "slow_rate": 0.05, "slow_seconds": 3, "down": false}
+
+`down` makes every request fail; `error_rate` / `slow_rate` apply per request. Independently of
+faults, every request takes a simulated service time read from FAKE_JINA_LATENCY_MS and
+FAKE_JINA_LATENCY_P99_MS (see fakes.latency).
+"""
+import os
+import json
+import random
+import asyncio
+import hashlib
+from typing import Optional
+
+from fastapi import Body, FastAPI, HTTPException
+from pydantic import BaseModel
+
+from fakes.latency import Latency
+
+app = FastAPI(title="Fake Jina Embeddings API")
+
+EMBEDDING_DIM = int(os.getenv("FAKE_JINA_DIM", "2048"))
+latency = Latency.from_env("JINA")
+
+
+class Faults(BaseModel):
+    error_rate: float = 0.0
+    error_status: int = 503
+    slow_rate: float = 0.0
+    slow_seconds: float = 2.0
+    latency_seconds: float = 0.0  # Added to every request
+    down: bool = False
+
+
+faults = Faults()
+stats = {"requests": 0, "errors": 0, "slow": 0}
+
+
+def embed(item) -> list:
+    seed = hashlib.blake2b(json.dumps(item, sort_keys=True).encode(), digest_size=8).digest()
+    rng = random.Random(int.from_bytes(seed, "big"))
+    vector = [rng.gauss(0.0, 1.0) for _ in range(EMBEDDING_DIM)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [v / norm for v in vector]
+
+
+@app.post("/v1/embeddings")
+async def embeddings(payload: dict = Body(...)):
+    stats["requests"] += 1
+    await latency.wait()
+    if faults.latency_seconds:
+        await asyncio.sleep(faults.latency_seconds)
+    if faults.down or random.random() < faults.error_rate:
+        stats["errors"] += 1
+        raise HTTPException(status_code=faults.error_status, detail="Injected fault")
+    if random.random() < faults.slow_rate:
+        stats["slow"] += 1
+        await asyncio.sleep(faults.slow_seconds)
+    inputs = payload.get("input") or []
+    return {
+        "model": payload.get("model"),
+        "data": [{"index": i, "embedding": embed(item)} for i, item in enumerate(inputs)],
+    }
+
+
+@app.post("/faults")
+async def set_faults(new_faults: Optional[Faults] = None):
+    global faults
+    faults = new_faults or Faults()
+    return faults
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
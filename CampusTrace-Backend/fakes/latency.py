@@ -0,0 +1,54 @@
+"""
+Simulated service time for the local stand-ins.
+
+A latency is a median and an optional p99 in milliseconds. With no p99 (or a p99 not above
+the median) every request waits exactly the median; otherwise waits are drawn from a
+log-normal distribution with that median and p99, which gives the long right tail real
+network services have. Each fake reads its defaults from FAKE_<NAME>_LATENCY_MS and
+FAKE_<NAME>_LATENCY_P99_MS, and the load test passes specs like "20" or "20:150".
+"""
+import os
+import math
+import random
+import asyncio
+from typing import Optional
+
+from pydantic import BaseModel
+
+Z_99 = 2.326  # Standard normal quantile at 0.99
+
+
+class Latency(BaseModel):
+    median_ms: float = 0.0
+    p99_ms: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, name: str) -> "Latency":
+        p99 = os.getenv(f"FAKE_{name}_LATENCY_P99_MS")
+        return cls(median_ms=float(os.getenv(f"FAKE_{name}_LATENCY_MS", "0")), p99_ms=float(p99) if p99 else None)
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """"<median_ms>" or "<median_ms>:<p99_ms>"."""
+        median, _, p99 = spec.partition(":")
+        return cls(median_ms=float(median), p99_ms=float(p99) if p99 else None)
+
+    def env(self, name: str) -> dict:
+        env = {f"FAKE_{name}_LATENCY_MS": str(self.median_ms)}
+        if self.p99_ms is not None:
+            env[f"FAKE_{name}_LATENCY_P99_MS"] = str(self.p99_ms)
+        return env
+
+    def sample(self) -> float:
+        """One simulated service time, in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        if not self.p99_ms or self.p99_ms <= self.median_ms:
+            return self.median_ms / 1000
+        sigma = math.log(self.p99_ms / self.median_ms) / Z_99
+        return random.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+    async def wait(self):
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
@@ -0,0 +1,38 @@
+"""
+Local stand-in for Google reCAPTCHA siteverify.
+
+Run:   uvicorn fakes.recaptcha:app --port 9104
+Then:  RECAPTCHA_VERIFY_URL=http://127.0.0.1:9104/recaptcha/api/siteverify RECAPTCHA_SECRET_KEY=fake
+
+Every token passes except ones containing "invalid". Requests take a simulated service time
+read from FAKE_RECAPTCHA_LATENCY_MS and FAKE_RECAPTCHA_LATENCY_P99_MS (see fakes.latency).
+"""
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Form
+
+from fakes.latency import Latency
+
+app = FastAPI(title="Fake reCAPTCHA")
+
+latency = Latency.from_env("RECAPTCHA")
+stats = {"requests": 0, "failed": 0}
+
+
+@app.post("/recaptcha/api/siteverify")
+async def siteverify(secret: str = Form(""), response: str = Form("")):
+    stats["requests"] += 1
+    await latency.wait()
+    if not secret or "invalid" in response:
+        stats["failed"] += 1
+        return {"success": False, "error-codes": ["invalid-input-response"]}
+    return {
+        "success": True,
+        "challenge_ts": datetime.now(timezone.utc).isoformat(),
+        "hostname": "localhost",
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
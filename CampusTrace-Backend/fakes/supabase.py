@@ -0,0 +1,308 @@
+"""
+Local stand-in for the parts of Supabase the API uses (PostgREST tables and RPCs, auth user
+lookup and sign-up, Storage objects), for load tests that should measure this service rather
+than the network.
+
+Run:   uvicorn fakes.supabase:app --port 9102
+Then:  PYTHON_SUPABASE_URL=http://127.0.0.1:9102 PYTHON_SUPABASE_KEY=fake
+
+Tables live in memory and start empty; seed them with POST /_seed {"table": [rows...]}.
+Every request first waits a simulated round trip to the hosted service: `latency_ms` is the
+median and, when set, `latency_p99_ms` gives a log-normal tail (see fakes.latency):
+
+    POST /_config {"latency_ms": 20, "latency_p99_ms": 120}
+
+Bearer tokens of the form "user-<uuid>" authenticate as that user id. Storage objects live
+in memory too and are served back from their public URLs.
+"""
+import json
+import itertools
+from uuid import uuid4
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Body, FastAPI, Request, Response
+from pydantic import BaseModel
+
+from fakes.latency import Latency
+
+app = FastAPI(title="Fake Supabase")
+
+
+_default_latency = Latency.from_env("SUPABASE")
+
+
+class Config(BaseModel):
+    latency_ms: float = _default_latency.median_ms
+    latency_p99_ms: Optional[float] = _default_latency.p99_ms
+
+    @property
+    def latency(self) -> Latency:
+        return Latency(median_ms=self.latency_ms, p99_ms=self.latency_p99_ms)
+
+
+config = Config()
+tables: Dict[str, List[dict]] = {}
+objects: Dict[Tuple[str, str], Tuple[bytes, str]] = {}  # (bucket, path) -> (data, content type)
+rpc_results: Dict[str, object] = {}  # RPC name -> canned result
+stats = {"requests": 0}
+_ids = itertools.count(1)
+
+# PostgREST query parameters that are not column filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "or", "and", "on_conflict", "columns"}
+
+
+def _parse_value(raw: str):
+    if raw == "null":
+        return None
+    if raw in ("true", "false"):
+        return raw == "true"
+    return raw.strip('"')
+
+
+def _matches(row: dict, column: str, expression: str) -> bool:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, raw = expression.partition(".")
+    value = row.get(column)
+    if op == "in":
+        candidates = [_parse_value(v) for v in raw.strip("()").split(",") if v]
+        result = str(value) in [str(c) for c in candidates]
+    elif op == "is":
+        result = value is _parse_value(raw) if raw == "null" else value == _parse_value(raw)
+    elif op in ("eq", "neq", "lt", "lte", "gt", "gte"):
+        target = _parse_value(raw)
+        if value is None:
+            result = op == "neq"
+        else:
+            left, right = (float(value), float(target)) if _is_number(value) and _is_number(target) else (str(value), str(target))
+            result = {
+                "eq": left == right, "neq": left != right,
+                "lt": left < right, "lte": left <= right,
+                "gt": left > right, "gte": left >= right,
+            }[op]
+    else:
+        result = True  # Unsupported operators (ilike, cs, fts...) do not filter
+    return result != negate
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
+        return not isinstance(value, bool)
+    except (TypeError, ValueError):
+        return False
+
+
+def _filtered(table: str, request: Request) -> List[dict]:
+    rows = tables.get(table, [])
+    for column, expression in request.query_params.multi_items():
+        if column not in RESERVED_PARAMS:
+            rows = [row for row in rows if _matches(row, column, expression)]
+    return rows
+
+
+def _ordered(rows: List[dict], request: Request) -> List[dict]:
+    order = request.query_params.get("order")
+    for term in reversed(order.split(",") if order else []):
+        column, *modifiers = term.split(".")
+        rows = sorted(rows, key=lambda r: (r.get(column) is None, str(r.get(column))), reverse="desc" in modifiers)
+    return rows
+
+
+def _respond(request: Request, rows: List[dict], total: Optional[int] = None, status_code: int = 200) -> Response:
+    prefer = request.headers.get("prefer", "")
+    headers = {}
+    if "count=exact" in prefer:
+        count = len(rows) if total is None else total
+        headers["Content-Range"] = f"0-{max(count - 1, 0)}/{count}"
+    if request.headers.get("accept") == "application/vnd.pgrst.object+json":
+        if len(rows) != 1:
+            return Response(
+                json.dumps({"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned",
+                            "details": f"The result contains {len(rows)} rows", "hint": None}),
+                status_code=406, media_type="application/json", headers=headers,
+            )
+        return Response(json.dumps(rows[0], default=str), status_code=status_code, media_type="application/json", headers=headers)
+    if request.method == "HEAD" or "return=minimal" in prefer:
+        return Response(status_code=status_code if request.method != "HEAD" else 200, headers=headers)
+    return Response(json.dumps(rows, default=str), status_code=status_code, media_type="application/json", headers=headers)
+
+
+@app.middleware("http")
+async def simulate_latency(request: Request, call_next):
+    stats["requests"] += 1
+    if not request.url.path.startswith("/_"):
+        await config.latency.wait()
+    return await call_next(request)
+
+
+@app.api_route("/rest/v1/{table}", methods=["GET", "HEAD"])
+async def select_rows(table: str, request: Request):
+    rows = _ordered(_filtered(table, request), request)
+    total = len(rows)
+    offset = int(request.query_params.get("offset", 0))
+    limit = request.query_params.get("limit")
+    rows = rows[offset:offset + int(limit) if limit else None]
+    return _respond(request, rows, total=total)
+
+
+@app.post("/rest/v1/rpc/{function}")
+async def call_rpc(function: str, request: Request):
+    result = rpc_results.get(function, [])
+    return Response(json.dumps(result, default=str), media_type="application/json")
+
+
+@app.post("/rest/v1/{table}")
+async def insert_rows(table: str, request: Request, payload=Body(...)):
+    rows = payload if isinstance(payload, list) else [payload]
+    now = datetime.now(timezone.utc).isoformat()
+    inserted = []
+    existing = tables.setdefault(table, [])
+    upsert = "resolution=merge-duplicates" in request.headers.get("prefer", "")
+    for row in rows:
+        row = {"created_at": now, **row}
+        row.setdefault("id", next(_ids))
+        match = next((r for r in existing if r.get("id") == row["id"]), None) if upsert else None
+        if match is not None:
+            match.update(row)
+            inserted.append(match)
+        else:
+            existing.append(row)
+            inserted.append(row)
+    return _respond(request, inserted, status_code=201)
+
+
+@app.patch("/rest/v1/{table}")
+async def update_rows(table: str, request: Request, changes: dict = Body(...)):
+    rows = _filtered(table, request)
+    for row in rows:
+        row.update(changes)
+    return _respond(request, rows)
+
+
+@app.delete("/rest/v1/{table}")
+async def delete_rows(table: str, request: Request):
+    rows = _filtered(table, request)
+    doomed = {id(row) for row in rows}
+    tables[table] = [row for row in tables.get(table, []) if id(row) not in doomed]
+    return _respond(request, rows)
+
+
+@app.get("/auth/v1/user")
+async def get_user(request: Request):
+    token = request.headers.get("authorization", "").removeprefix("Bearer ")
+    if not token.startswith("user-"):
+        return Response(json.dumps({"code": 401, "msg": "invalid JWT"}), status_code=401, media_type="application/json")
+    return {
+        "id": token[len("user-"):],
+        "aud": "authenticated",
+        "role": "authenticated",
+        "email": f"{token}@example.edu",
+        "app_metadata": {},
+        "user_metadata": {},
+        "created_at": "2024-01-01T00:00:00+00:00",
+    }
+
+
+@app.post("/auth/v1/signup")
+async def sign_up(payload: dict = Body(...)):
+    user_id = str(uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": user_id,
+        "aud": "authenticated",
+        "role": "authenticated",
+        "email": payload.get("email"),
+        "app_metadata": {"provider": "email"},
+        "user_metadata": payload.get("data") or {},
+        "identities": [{
+            "id": user_id,
+            "identity_id": str(uuid4()),
+            "user_id": user_id,
+            "identity_data": {"email": payload.get("email")},
+            "provider": "email",
+            "created_at": now,
+        }],
+        "created_at": now,
+        "confirmation_sent_at": now,
+    }
+
+
+@app.delete("/auth/v1/admin/users/{user_id}")
+async def delete_user(user_id: str):
+    return {}
+
+
+@app.post("/storage/v1/object/list/{bucket}")
+async def list_objects(bucket: str, payload: dict = Body(...)):
+    prefix = (payload.get("prefix") or "").strip("/")
+    names = sorted(
+        (path[len(prefix):].lstrip("/") for b, path in objects if b == bucket and path.startswith(prefix)),
+        reverse=True,
+    )
+    return [{"name": name, "id": name, "metadata": {}} for name in names[:payload.get("limit", 100)]]
+
+
+@app.post("/storage/v1/object/{bucket}/{path:path}")
+async def upload_object(bucket: str, path: str, request: Request):
+    if (bucket, path) in objects and request.headers.get("x-upsert") != "true":
+        return Response(json.dumps({"statusCode": "409", "error": "Duplicate", "message": "The resource already exists"}),
+                        status_code=400, media_type="application/json")
+    objects[(bucket, path)] = (await request.body(), request.headers.get("content-type", "application/octet-stream"))
+    return {"Key": f"{bucket}/{path}"}
+
+
+@app.delete("/storage/v1/object/{bucket}")
+async def remove_objects(bucket: str, payload: dict = Body(...)):
+    removed = [path for path in payload.get("prefixes", []) if objects.pop((bucket, path), None) is not None]
+    return [{"name": path, "bucket_id": bucket} for path in removed]
+
+
+@app.get("/storage/v1/object/public/{bucket}/{path:path}")
+@app.get("/storage/v1/object/{bucket}/{path:path}")
+async def download_object(bucket: str, path: str):
+    if (bucket, path) not in objects:
+        return Response(json.dumps({"statusCode": "404", "error": "not_found", "message": "Object not found"}),
+                        status_code=400, media_type="application/json")
+    data, content_type = objects[(bucket, path)]
+    return Response(data, media_type=content_type)
+
+
+@app.post("/_seed")
+async def seed(payload: Dict[str, List[dict]] = Body(...)):
+    global _ids
+    for table, rows in payload.items():
+        tables.setdefault(table, []).extend(rows)
+    # Ids assigned to later inserts must not collide with seeded ones
+    seeded_ids = [row["id"] for rows in payload.values() for row in rows if isinstance(row.get("id"), int)]
+    if seeded_ids:
+        _ids = itertools.count(max(max(seeded_ids) + 1, next(_ids)))
+    return {table: len(rows) for table, rows in tables.items()}
+
+
+@app.post("/_rpc/{function}")
+async def set_rpc_result(function: str, result=Body(...)):
+    rpc_results[function] = result
+    return {"function": function}
+
+
+@app.post("/_reset")
+async def reset():
+    tables.clear()
+    rpc_results.clear()
+    objects.clear()
+    return {}
+
+
+@app.post("/_config")
+async def set_config(new_config: Optional[Config] = None):
+    global config
+    config = new_config or Config()
+    return config
+
+
+@app.get("/_stats")
+async def get_stats():
+    return {**stats, "tables": {table: len(rows) for table, rows in tables.items()}, "objects": len(objects)}
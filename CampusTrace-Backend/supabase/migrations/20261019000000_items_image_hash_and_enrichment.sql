@@ -0,0 +1,27 @@
+-- Columns used by duplicate photo detection and background enrichment.
+-- Apply with `supabase db push` (or paste into the SQL editor) before deploying the backend.
+
+-- 64-bit perceptual hash (dHash) of the item photo as 16 hex chars, see app/image_hash.py
+alter table public.items
+    add column if not exists image_hash text;
+
+-- Earlier item whose photo matched this one on upload, for moderators to review
+alter table public.items
+    add column if not exists possible_duplicate_of bigint references public.items (id) on delete set null;
+
+-- AI tags and embeddings are computed after the item is created; existing rows already have them
+alter table public.items
+    add column if not exists enrichment_status text not null default 'complete';
+
+alter table public.items
+    drop constraint if exists items_enrichment_status_check;
+alter table public.items
+    add constraint items_enrichment_status_check check (enrichment_status in ('pending', 'complete', 'failed'));
+
+-- Loading a university's hash index on startup (page_image_hashes)
+create index if not exists items_university_image_hash_idx
+    on public.items (university_id, id) where image_hash is not null;
+
+-- Re-queueing interrupted enrichment on startup (list_pending_enrichment)
+create index if not exists items_enrichment_pending_idx
+    on public.items (created_at desc) where enrichment_status = 'pending';